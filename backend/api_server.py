@@ -1,8 +1,13 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
+import os
 import uvicorn
+from message_store import MessageStore
+from metrics import MetricsRegistry, add_metrics_endpoint
+from response_cache import ResponseCache
+from signal_bus import DEFAULT_ADDRESS, BusSubscriber
 
 app = FastAPI()
 
@@ -20,18 +25,84 @@ class Message(BaseModel):
     sender: str
     text: str
     timestamp: str
+    is_trading_signal: bool = False
+    trading_signal: Optional[dict] = None
+    follow_up: Optional[List[str]] = None
 
-# Store messages in memory (you can replace this with a database later)
-messages: List[Message] = []
+# Durable, append-only message store
+store = MessageStore(os.getenv('MESSAGE_DB_PATH', 'messages.db'))
+
+# Serialized GET responses, invalidated by every write
+cache = ResponseCache()
+
+# Request latency histograms and cache stats on GET /metrics
+registry = MetricsRegistry(prefix="api_server")
+registry.register_stats("response_cache", cache.get_stats)
+add_metrics_endpoint(app, registry)
+
+async def store_bus_batch(messages, bus_id, last_seq):
+    """Store a batch published by the bot on the signal bus"""
+    if store.append_many(messages, (bus_id, last_seq)):
+        cache.invalidate()
+
+# Messages arrive from the bot over the signal bus; POST /messages still works
+bus_subscriber = BusSubscriber(
+    "api_server",
+    store_bus_batch,
+    os.getenv('SIGNAL_BUS_ADDRESS', DEFAULT_ADDRESS),
+    get_offset=store.get_bus_offset
+)
+registry.register_stats("signal_bus", bus_subscriber.get_stats)
+
+@app.on_event("startup")
+async def subscribe_to_bus():
+    bus_subscriber.start()
 
 @app.get("/messages")
-async def get_messages():
-    return messages
+async def get_messages(
+    request: Request,
+    cursor: Optional[int] = None,
+    since: Optional[str] = None,
+    channel: Optional[List[str]] = Query(None),
+    signals_only: bool = False,
+    instrument: Optional[List[str]] = Query(None),
+    limit: int = Query(100, ge=1, le=1000)
+):
+    """Get messages after `cursor`; pass back `next_cursor` to poll for new ones
+
+    `channel` and `instrument` may be repeated to match any of several values.
+    Responses carry an ETag; send it back in If-None-Match to get a 304
+    while nothing has been written.
+    """
+    def build():
+        messages, next_cursor = store.query(
+            cursor=cursor,
+            since=since,
+            channels=channel,
+            signals_only=signals_only,
+            instruments=instrument,
+            limit=limit
+        )
+        return {"messages": messages, "next_cursor": next_cursor}
+    
+    return cache.respond(request, build)
 
 @app.post("/messages")
 async def add_message(message: Message):
-    messages.append(message)
-    return {"status": "success"}
+    message_id = store.append(message.dict())
+    cache.invalidate()
+    return {"status": "success", "id": message_id}
+
+@app.post("/messages/batch")
+async def add_messages(messages: List[Message]):
+    count = store.append_many(message.dict() for message in messages)
+    cache.invalidate()
+    return {"status": "success", "count": count}
+
+@app.on_event("shutdown")
+async def close_store():
+    await bus_subscriber.stop()
+    store.close()
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,237 @@
+"""Vectorized backtest of parsed signals against OHLC bars
+
+Replays signals imported by history_import.py against local price bars to
+judge which channels are worth auto-trading. Each signal is traded the way
+TradingPlatform.place_signal_orders does it: one equal-volume leg per TP,
+all sharing the first SL level, entered at the signal's entry price on the
+first bar after the message.
+
+First-hit searches use range min/max tables (binary lifting), so every
+signal/level pair costs O(log horizon) NumPy gathers instead of a scan.
+
+Usage: python backtest.py SIGNALS BARS [--horizon BARS] [--save-bars FILE.npy]
+
+BARS is a CSV with time,open,high,low,close columns (unix seconds or
+dates such as 2024.01.31 13:05), a .npy file of BAR_DTYPE records, or a raw
+.bin file of BAR_DTYPE records. Binary files are memory-mapped.
+"""
+import argparse
+import csv
+import time
+
+import numpy as np
+
+from history_import import load_signals
+
+# Record layout of binary bar files
+BAR_DTYPE = np.dtype([
+    ("time", "<i8"),
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+])
+
+# Bars a signal may stay open before it is marked to market (two weeks of minutes)
+DEFAULT_HORIZON = 20160
+
+# First-level codes: 0 is the stop loss, n is TP n
+SL_HIT = 0
+NO_HIT = -1
+
+
+def load_bars(path):
+    """Load OHLC bars sorted by time, memory-mapping binary files"""
+    if path.endswith(".npy"):
+        return np.load(path, mmap_mode="r")
+    if path.endswith(".bin"):
+        return np.memmap(path, dtype=BAR_DTYPE, mode="r")
+
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = [name.strip().lower().strip("<>") for name in next(reader)]
+        index = {name: header.index(name) for name in BAR_DTYPE.names}
+        rows = list(reader)
+
+    bars = np.empty(len(rows), dtype=BAR_DTYPE)
+    times = [row[index["time"]].strip() for row in rows]
+    if times and times[0].replace(".", "", 1).isdigit():
+        bars["time"] = np.array(times, dtype=np.float64).astype(np.int64)
+    else:
+        # MT5 exports use 2024.01.31 13:05; numpy wants 2024-01-31T13:05
+        normalized = [t.replace(".", "-", 2).replace(" ", "T", 1) for t in times]
+        bars["time"] = np.array(normalized, dtype="datetime64[s]").astype(np.int64)
+    for name in BAR_DTYPE.names[1:]:
+        bars[name] = np.array([row[index[name]] for row in rows], dtype=np.float64)
+    return bars[np.argsort(bars["time"], kind="stable")]
+
+
+class RangeTable:
+    """Sparse table of running minima or maxima over power-of-two windows"""
+
+    def __init__(self, values, op, max_window):
+        self.op = op
+        self.levels = [np.ascontiguousarray(values, dtype=np.float64)]
+        step = 1
+        while step * 2 <= max_window and step * 2 <= len(values):
+            previous = self.levels[-1]
+            self.levels.append(op(previous[:-step], previous[step:]))
+            step *= 2
+
+    def first_hit(self, start, level, horizon):
+        """Index of the first bar in [start, start + horizon) reaching `level`, or -1
+
+        For a minimum table a bar reaches the level when its value is <= level,
+        for a maximum table when it is >= level. NaN levels never hit.
+        """
+        below = self.op is np.minimum
+        size = len(self.levels[0])
+        position = start.copy()
+        remaining = np.clip(np.minimum(horizon, size - start), 0, None)
+        valid = ~np.isnan(level)
+        for k in range(len(self.levels) - 1, -1, -1):
+            step = 1 << k
+            table = self.levels[k]
+            can_skip = remaining >= step
+            block = table[np.where(can_skip, position, 0)]
+            missed = can_skip & ((block > level) if below else (block < level))
+            position += step * missed
+            remaining -= step * missed
+        return np.where((remaining > 0) & valid, position, NO_HIT)
+
+
+def simulate(columns, bars, horizon=DEFAULT_HORIZON):
+    """Find the first level each signal hits and its R-multiple
+
+    Returns a dict of per-signal arrays: first_level (SL_HIT, TP number or
+    NO_HIT), r_multiple, exit_bar and has_data.
+    """
+    side = np.asarray(columns["side"], dtype=np.float64)
+    entry = np.asarray(columns["entry"], dtype=np.float64)
+    sl = np.asarray(columns["sl"], dtype=np.float64)[:, 0]
+    tps = np.asarray(columns["tps"], dtype=np.float64)
+    buy = side > 0
+
+    bar_times = np.asarray(bars["time"])
+    start = np.searchsorted(bar_times, np.asarray(columns["timestamp"]), side="right")
+    has_data = start < len(bar_times)
+    start = np.minimum(start, len(bar_times) - 1)
+
+    lows = RangeTable(bars["low"], np.minimum, horizon)
+    highs = RangeTable(bars["high"], np.maximum, horizon)
+
+    def first_hit(level, adverse):
+        """Buys are stopped by lows and take profit on highs; sells the reverse"""
+        low_hit = lows.first_hit(start, level, horizon)
+        high_hit = highs.first_hit(start, level, horizon)
+        if adverse:
+            return np.where(buy, low_hit, high_hit)
+        return np.where(buy, high_hit, low_hit)
+
+    # Unreached levels sort after every real bar index
+    never = np.iinfo(np.int64).max
+    sl_bar = first_hit(sl, adverse=True)
+    sl_bar = np.where(sl_bar == NO_HIT, never, sl_bar)
+    tp_bars = np.stack([first_hit(tps[:, j], adverse=False) for j in range(tps.shape[1])], axis=1)
+    tp_bars = np.where(tp_bars == NO_HIT, never, tp_bars)
+
+    risk = np.abs(entry - sl)
+    risk = np.where(risk > 0, risk, np.nan)
+    legs = ~np.isnan(tps)
+
+    # A leg wins when its TP trades strictly before the SL; a shared bar counts as a loss
+    won = legs & (tp_bars < sl_bar[:, None])
+    stopped = legs & ~won & (sl_bar[:, None] != never)
+    open_legs = legs & ~won & ~stopped
+
+    # Legs still open at the horizon are marked to market at that bar's close
+    last_bar = np.minimum(start + horizon - 1, len(bar_times) - 1)
+    mark = (np.asarray(bars["close"])[last_bar] - entry) * side / risk
+
+    leg_r = np.where(won, np.abs(tps - entry[:, None]) / risk[:, None], 0.0)
+    leg_r = np.where(stopped, -1.0, leg_r)
+    leg_r = np.where(open_legs, mark[:, None], leg_r)
+    r_multiple = np.where(legs, leg_r, 0.0).sum(axis=1) / np.maximum(legs.sum(axis=1), 1)
+
+    # First level touched: TP number when a TP precedes the SL, else the SL
+    first_tp = tp_bars.min(axis=1) if tps.shape[1] else np.full(len(entry), never)
+    first_level = np.where(
+        first_tp < sl_bar, np.argmin(tp_bars, axis=1) + 1,
+        np.where(sl_bar != never, SL_HIT, NO_HIT)
+    )
+    # The signal is flat once its last leg closes
+    leg_exit = np.where(stopped, sl_bar[:, None], last_bar[:, None])
+    leg_exit = np.where(won, tp_bars, leg_exit)
+    exit_bar = np.where(legs, leg_exit, NO_HIT).max(axis=1)
+
+    return {
+        "first_level": np.where(has_data, first_level, NO_HIT),
+        "r_multiple": np.where(has_data, r_multiple, np.nan),
+        "exit_bar": np.where(has_data, exit_bar, NO_HIT),
+        "has_data": has_data & ~np.isnan(risk)
+    }
+
+
+def max_drawdown(r_multiples):
+    """Largest peak-to-trough drop of cumulative R"""
+    if not len(r_multiples):
+        return 0.0
+    equity = np.concatenate(([0.0], np.cumsum(r_multiples)))
+    return float((np.maximum.accumulate(equity) - equity).max())
+
+
+def channel_report(columns, channels, results):
+    """Aggregate per-channel hit rates, R-multiples and drawdown"""
+    report = []
+    order = np.argsort(np.asarray(columns["timestamp"]), kind="stable")
+    codes = np.asarray(columns["channel"])[order]
+    first_level = results["first_level"][order]
+    r_multiple = results["r_multiple"][order]
+    has_data = results["has_data"][order]
+
+    for code, name in enumerate(channels):
+        mask = (codes == code) & has_data
+        traded = int(mask.sum())
+        r = r_multiple[mask]
+        levels = first_level[mask]
+        report.append({
+            "channel": name,
+            "signals": traded,
+            "hit_rate": float((levels > SL_HIT).mean()) if traded else 0.0,
+            "sl_rate": float((levels == SL_HIT).mean()) if traded else 0.0,
+            "avg_r": float(r.mean()) if traded else 0.0,
+            "total_r": float(r.sum()),
+            "max_drawdown_r": max_drawdown(r)
+        })
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("signals", help="Signal columns written by history_import.py")
+    parser.add_argument("bars", help="OHLC bars (.csv, .npy or .bin)")
+    parser.add_argument("--horizon", type=int, default=DEFAULT_HORIZON, help="Bars before open legs are closed")
+    parser.add_argument("--save-bars", help="Also write the bars as .npy for memory-mapped reloads")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    columns, channels = load_signals(args.signals)
+    bars = load_bars(args.bars)
+    if args.save_bars:
+        np.save(args.save_bars, np.asarray(bars, dtype=BAR_DTYPE))
+    loaded = time.perf_counter()
+
+    results = simulate(columns, bars, args.horizon)
+    report = channel_report(columns, channels, results)
+    elapsed = time.perf_counter() - loaded
+
+    print(f"📊 {len(columns['entry'])} signals against {len(bars)} bars "
+          f"(load {loaded - start:.2f}s, backtest {elapsed:.2f}s)")
+    print(f"{'channel':<30} {'signals':>8} {'hit rate':>9} {'SL rate':>8} {'avg R':>7} {'total R':>9} {'max DD':>8}")
+    for row in sorted(report, key=lambda row: row["total_r"], reverse=True):
+        print(f"{row['channel'][:30]:<30} {row['signals']:>8} {row['hit_rate']:>8.1%} {row['sl_rate']:>7.1%} "
+              f"{row['avg_r']:>7.2f} {row['total_r']:>9.1f} {row['max_drawdown_r']:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
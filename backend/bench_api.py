@@ -0,0 +1,125 @@
+"""Load test for the HTTP APIs (api_server.py /messages, main.py /orders)
+
+Keeps `--concurrency` keep-alive connections busy for `--duration` seconds
+and reports requests/sec and latency percentiles. Run it against a server
+before and after a change to compare; with --etag every client revalidates
+with If-None-Match the way a polling dashboard does.
+
+Usage: python bench_api.py [--url URL] [--concurrency N] [--duration S] [--etag]
+                           [--seed N]
+
+--seed posts N generated messages to the api_server first so /messages has
+something to serve.
+"""
+import argparse
+import asyncio
+import json
+import time
+from urllib.parse import urlsplit
+
+from bench_signal_parser import build_corpus
+from signal_parser import parse_trading_signal
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of values"""
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+async def request(reader, writer, method, target, host, headers=None, body=b""):
+    """Send one HTTP/1.1 request on a keep-alive connection, returning (status, headers, body)"""
+    lines = [f"{method} {target} HTTP/1.1", f"Host: {host}", "Connection: keep-alive"]
+    for name, value in (headers or {}).items():
+        lines.append(f"{name}: {value}")
+    if body:
+        lines.append("Content-Type: application/json")
+        lines.append(f"Content-Length: {len(body)}")
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + body)
+
+    status_line = await reader.readline()
+    status = int(status_line.split()[1])
+    response_headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode().partition(":")
+        response_headers[name.strip().lower()] = value.strip()
+    length = int(response_headers.get("content-length", 0))
+    return status, response_headers, await reader.readexactly(length) if length else b""
+
+
+async def seed_messages(url, count):
+    """Post generated messages to /messages/batch"""
+    parts = urlsplit(url)
+    reader, writer = await asyncio.open_connection(parts.hostname, parts.port or 80)
+    corpus = build_corpus(count)
+    for start in range(0, count, 500):
+        batch = []
+        for i, text in enumerate(corpus[start:start + 500], start):
+            signal = parse_trading_signal(text)
+            batch.append({
+                "channel": f"Channel {i % 4}",
+                "sender": "Bench",
+                "text": text,
+                "timestamp": f"2024-01-01T00:{i // 60 % 60:02d}:{i % 60:02d}",
+                "is_trading_signal": signal is not None,
+                "trading_signal": signal
+            })
+        await request(reader, writer, "POST", "/messages/batch", parts.netloc, body=json.dumps(batch).encode())
+    writer.close()
+
+
+async def client(url, deadline, use_etag, latencies, statuses):
+    """One keep-alive connection issuing requests until the deadline"""
+    parts = urlsplit(url)
+    target = parts.path + (f"?{parts.query}" if parts.query else "")
+    reader, writer = await asyncio.open_connection(parts.hostname, parts.port or 80)
+    etag = None
+    while time.perf_counter() < deadline:
+        headers = {"If-None-Match": etag} if use_etag and etag else None
+        start = time.perf_counter()
+        status, response_headers, _ = await request(reader, writer, "GET", target, parts.netloc, headers)
+        latencies.append(time.perf_counter() - start)
+        statuses[status] = statuses.get(status, 0) + 1
+        etag = response_headers.get("etag", etag)
+    writer.close()
+
+
+async def run(url, concurrency, duration, use_etag):
+    """Run the load test and return (requests, elapsed, latencies, statuses)"""
+    latencies = []
+    statuses = {}
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(client(url, deadline, use_etag, latencies, statuses) for _ in range(concurrency)))
+    return len(latencies), time.perf_counter() - start, latencies, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000/messages?limit=100")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--etag", action="store_true", help="Revalidate with If-None-Match")
+    parser.add_argument("--seed", type=int, default=0, help="Messages to post to api_server first")
+    args = parser.parse_args()
+
+    if args.seed:
+        asyncio.run(seed_messages(args.url, args.seed))
+
+    requests, elapsed, latencies, statuses = asyncio.run(
+        run(args.url, args.concurrency, args.duration, args.etag)
+    )
+    print(f"📊 {args.url} with {args.concurrency} connections{' (ETag revalidation)' if args.etag else ''}")
+    print(f"Requests: {requests} in {elapsed:.1f}s -> {requests / elapsed:.0f} req/s")
+    print(f"Latency p50 {percentile(latencies, 50) * 1000:.2f} ms, p99 {percentile(latencies, 99) * 1000:.2f} ms")
+    print(f"Status codes: {dict(sorted(statuses.items()))}")
+
+
+if __name__ == '__main__':
+    main()
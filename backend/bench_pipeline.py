@@ -0,0 +1,245 @@
+"""End-to-end latency benchmark for the bot's message handler
+
+Replays Telegram messages (recorded NDJSON or a generated corpus) into
+telegram_bot.handle_new_message with MT5 replaced by SimulatedMT5, and
+reports p50/p99 message-to-order and message-to-broadcast latency plus
+throughput as channel count and message rate scale.
+
+Usage: python bench_pipeline.py [--replay FILE] [--channels 1,4,16] [--rates 50,200,1000]
+                                [--messages N] [--broker-latency SECONDS]
+
+Replay files hold one JSON object per line with a "text" field; messages
+are spread round-robin over the simulated channels.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import time
+from collections import defaultdict, deque
+from datetime import datetime, timedelta, timezone
+
+# Run the bot against the simulator with throwaway state
+os.environ.setdefault("BROKER_BACKEND", "sim")
+os.environ.setdefault("CHECKPOINT_DB_PATH", ":memory:")
+os.environ.setdefault("ENTITY_CACHE_PATH", ":memory:")
+os.environ.setdefault("SIGNAL_BUS_DB_PATH", ":memory:")
+
+import telegram_bot  # noqa: E402
+from bench_signal_parser import build_corpus  # noqa: E402
+from broadcaster import Broadcaster  # noqa: E402
+from broker_backends import SimulatedMT5  # noqa: E402
+from checkpoint_store import CheckpointStore  # noqa: E402
+from entity_cache import EntityCache  # noqa: E402
+from feed_protocol import FIELDS, FeedLog  # noqa: E402
+from ingest_pipeline import KeyedSequencer, Pipeline, Stage  # noqa: E402
+from order_executor import OrderExecutor  # noqa: E402
+from signal_dedup import SignalDeduplicator  # noqa: E402
+from signal_lifecycle import LifecycleTracker, SLTPCoalescer  # noqa: E402
+from signal_bus import SignalBus  # noqa: E402
+from signal_parser import INSTRUMENTS  # noqa: E402
+from trading_platform import TradingPlatform  # noqa: E402
+
+
+class ReplayChat:
+    def __init__(self, chat_id, title):
+        self.id = chat_id
+        self.title = title
+
+
+class ReplayMessage:
+    def __init__(self, message_id, text, date):
+        self.id = message_id
+        self.text = text
+        self.date = date
+        self.edit_date = None
+        self.sender = None
+        self.sender_id = None
+        self.reply_to_msg_id = None
+
+
+class ReplayEvent:
+    """Minimal stand-in for a Telethon NewMessage event"""
+
+    def __init__(self, chat, message):
+        self.chat = chat
+        self.chat_id = -1000000000000 - chat.id
+        self.message = message
+
+    async def get_chat(self):
+        return self.chat
+
+
+class RecordingClient:
+    """Websocket client that timestamps every message it receives"""
+
+    def __init__(self):
+        self.received = {}
+        self.done = asyncio.Event()
+        self.expected = 0
+
+    async def send(self, payload):
+        now = time.perf_counter()
+        data = json.loads(payload)
+        for row in data.get("rows", []):
+            message = dict(zip(FIELDS, row))
+            self.received[(message["channel"], message["timestamp"])] = now
+        if len(self.received) >= self.expected:
+            self.done.set()
+
+    async def close(self, code=None, reason=None):
+        pass
+
+
+def load_replay(path):
+    """Load recorded messages from an NDJSON (or JSON array) file"""
+    with open(path, encoding="utf-8") as f:
+        content = f.read().strip()
+    if content.startswith("["):
+        return json.loads(content)
+    return [json.loads(line) for line in content.splitlines() if line.strip()]
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of values"""
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def reset_bot(broker_latency):
+    """Point telegram_bot's singletons at fresh simulated state"""
+    telegram_bot.mt5_supervisor.stop()
+    telegram_bot.trading_platform.symbol_cache.stop_refresh()
+    telegram_bot.trading_platform.account_cache.stop_refresh()
+    telegram_bot.order_executor.stop()
+
+    backend = SimulatedMT5(latency=broker_latency, seed=1)
+    trading_platform = TradingPlatform(symbols=INSTRUMENTS, backend=backend)
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        trading_platform.connect()
+
+    telegram_bot.trading_platform = trading_platform
+    telegram_bot.order_executor = OrderExecutor(trading_platform, max_queue_size=10000)
+    telegram_bot.order_executor.start()
+    telegram_bot.checkpoints = CheckpointStore(":memory:")
+    telegram_bot.entity_cache = EntityCache(":memory:")
+    telegram_bot.signal_dedup = SignalDeduplicator()
+    telegram_bot.lifecycle = LifecycleTracker()
+    telegram_bot.execute_turns = KeyedSequencer()
+    telegram_bot.sltp_coalescer = SLTPCoalescer(telegram_bot.order_executor, trading_platform)
+    telegram_bot.broadcaster = Broadcaster(max_queue_size=100000)
+    telegram_bot.feed = FeedLog()
+    telegram_bot.signal_bus = SignalBus(path=":memory:")
+    telegram_bot.signal_bus.add_listener(telegram_bot.broadcast_messages)
+    # asyncio primitives are bound to one event loop, so rebuild the pipeline
+    telegram_bot.ingest_pipeline = Pipeline([
+        Stage(stage.name, stage.handler, stage.workers, stage.queue.maxsize)
+        for stage in telegram_bot.ingest_pipeline.stages.values()
+    ])
+    return backend
+
+
+async def run_scenario(records, channels, rate, broker_latency):
+    """Replay `records` across `channels` channels at `rate` messages/second"""
+    backend = reset_bot(broker_latency)
+    recorder = RecordingClient()
+    recorder.expected = len(records)
+    telegram_bot.broadcaster.register(recorder)
+
+    chats = [ReplayChat(1000 + i, f"Replay channel {i}") for i in range(channels)]
+    base_date = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    injected = {}
+    injected_by_entry = defaultdict(deque)
+    tasks = []
+
+    await telegram_bot.ingest_pipeline.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        for i, record in enumerate(records):
+            # Messages round-robin over channels at a fixed overall rate
+            target = start + i / rate
+            delay = target - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            chat = chats[i % channels]
+            message = ReplayMessage(i + 1, record["text"], base_date + timedelta(seconds=i))
+            now = time.perf_counter()
+            injected[(chat.title, message.date.isoformat())] = now
+            signal = telegram_bot.parse_trading_signal(message.text)
+            if signal:
+                injected_by_entry[signal["entry"]].append(now)
+            tasks.append(asyncio.create_task(telegram_bot.handle_new_message(ReplayEvent(chat, message))))
+
+        await asyncio.gather(*tasks)
+        try:
+            await asyncio.wait_for(recorder.done.wait(), timeout=30)
+        except asyncio.TimeoutError:
+            pass
+    end = max(recorder.received.values(), default=time.perf_counter())
+
+    # Legs of one signal are sent back to back: the first leg is the order time
+    order_latencies = []
+    previous = None
+    for sent_at, request in backend.orders:
+        key = (request["price"], request["sl"])
+        if key != previous and injected_by_entry[request["price"]]:
+            order_latencies.append(sent_at - injected_by_entry[request["price"]].popleft())
+        previous = key
+
+    broadcast_latencies = [
+        received - injected[key] for key, received in recorder.received.items() if key in injected
+    ]
+
+    await telegram_bot.ingest_pipeline.stop()
+    await telegram_bot.broadcaster.unregister(recorder)
+    telegram_bot.order_executor.stop()
+    return {
+        "channels": channels,
+        "rate": rate,
+        "messages": len(records),
+        "throughput": len(records) / (end - start) if end > start else float("nan"),
+        "order_p50": percentile(order_latencies, 50) * 1000,
+        "order_p99": percentile(order_latencies, 99) * 1000,
+        "broadcast_p50": percentile(broadcast_latencies, 50) * 1000,
+        "broadcast_p99": percentile(broadcast_latencies, 99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--replay", help="Recorded messages (NDJSON or JSON array)")
+    parser.add_argument("--channels", default="1,4,16")
+    parser.add_argument("--rates", default="50,200,1000")
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--broker-latency", type=float, default=0.005)
+    args = parser.parse_args()
+
+    if args.replay:
+        records = load_replay(args.replay)[:args.messages]
+    else:
+        records = [{"text": text} for text in build_corpus(args.messages)]
+
+    # Keep the bot's per-message console output out of the results
+    telegram_bot.logger.setLevel(logging.WARNING)
+    logging.getLogger("health").setLevel(logging.WARNING)
+    logging.getLogger("trading_platform").setLevel(logging.WARNING)
+
+    print(f"📊 Replaying {len(records)} messages, simulated broker latency {args.broker_latency * 1000:.1f} ms")
+    print(f"{'channels':>8} {'rate/s':>8} {'msgs/s':>9} {'order p50':>10} {'order p99':>10} "
+          f"{'bcast p50':>10} {'bcast p99':>10}")
+    for channels in map(int, args.channels.split(",")):
+        for rate in map(float, args.rates.split(",")):
+            result = asyncio.run(run_scenario(records, channels, rate, args.broker_latency))
+            print(f"{result['channels']:>8} {result['rate']:>8.0f} {result['throughput']:>9.1f} "
+                  f"{result['order_p50']:>8.2f}ms {result['order_p99']:>8.2f}ms "
+                  f"{result['broadcast_p50']:>8.2f}ms {result['broadcast_p99']:>8.2f}ms")
+
+
+if __name__ == '__main__':
+    main()
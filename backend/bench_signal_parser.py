@@ -0,0 +1,272 @@
+"""Microbenchmark: signal_parser engine vs the original parse_trading_signal
+
+Also measures throughput as more signal formats are assigned to a channel:
+the keyword-indexed ParserRegistry against trying every format in turn.
+
+Usage: python bench_signal_parser.py [--messages N] [--repeat R] [--formats 1,4,16,64,128]
+"""
+import argparse
+import itertools
+import random
+import re
+import time
+
+from signal_parser import (GOLDHUNTER, ParserRegistry, SignalFormat, parse_lines, parse_signals,
+                           parse_trading_signal)
+
+# Currencies combined into instrument keywords for generated formats
+CURRENCIES = ("eur", "gbp", "usd", "jpy", "aud", "cad", "chf", "nzd", "sek", "nok", "zar", "mxn",
+              "sgd", "hkd", "pln", "huf", "czk", "dkk")
+
+def legacy_parse_trading_signal(message_text):
+    """Original line-by-line parser from telegram_bot, kept as the baseline"""
+    # Split message into lines and clean them
+    lines = [line.strip() for line in message_text.split('\n') if line.strip()]
+    
+    # Check if message follows the expected format
+    if len(lines) < 3:  # At least need instrument, entry, and one TP
+        return None
+
+    # Initialize signal data
+    signal = {
+        "type": None,  # buy or sell
+        "instrument": None,
+        "entry": None,
+        "sl": [],  # Changed to array to handle multiple SL values
+        "tps": []
+    }
+
+    # Parse first line for instrument, type, and possibly entry
+    first_line = lines[0].lower()
+    
+    # Check for instrument
+    if 'gold' in first_line or 'xauusd' in first_line:
+        signal["instrument"] = "XAUUSD" if 'xauusd' in first_line else "Gold"
+    
+    # Check for type and extract entry if present
+    if 'buy' in first_line:
+        signal["type"] = "buy"
+        # Try to extract entry from first line
+        try:
+            # Look for numbers after 'buy'
+            numbers = re.findall(r'\d+\.?\d*', first_line.split('buy')[1])
+            if numbers:
+                signal["entry"] = float(numbers[0])
+        except (ValueError, IndexError):
+            pass
+    elif 'sell' in first_line:
+        signal["type"] = "sell"
+        # Try to extract entry from first line
+        try:
+            # Look for numbers after 'sell'
+            numbers = re.findall(r'\d+\.?\d*', first_line.split('sell')[1])
+            if numbers:
+                signal["entry"] = float(numbers[0])
+        except (ValueError, IndexError):
+            pass
+
+    # Parse remaining lines
+    for line in lines[1:]:
+        line = line.lower()
+        # Extract entry price if not found in first line
+        if line.startswith('entry') and signal["entry"] is None:
+            try:
+                signal["entry"] = float(line.split('entry')[1].strip())
+            except (ValueError, IndexError):
+                pass
+        # Extract stop loss (can have multiple values)
+        elif line.startswith('sl'):
+            try:
+                sl_values = line.split('sl')[1].strip().split()
+                for sl_value in sl_values:
+                    signal["sl"].append(float(sl_value))
+            except (ValueError, IndexError):
+                pass
+        # Extract take profits
+        elif line.startswith('tp'):
+            try:
+                tp_value = float(line.split('tp')[1].strip())
+                signal["tps"].append(tp_value)
+            except (ValueError, IndexError):
+                pass
+
+    # If entry is still not found, try to find it in any line
+    if signal["entry"] is None:
+        for line in lines:
+            try:
+                # Look for a number that could be an entry price
+                numbers = re.findall(r'\d+\.?\d*', line)
+                if numbers:
+                    potential_entry = float(numbers[0])
+                    # If this is a reasonable price for XAUUSD/Gold
+                    if 1000 < potential_entry < 10000:
+                        signal["entry"] = potential_entry
+                        break
+            except ValueError:
+                pass
+
+    # Sort values appropriately
+    if signal["type"] == "buy":
+        signal["sl"].sort()  # Ascending for buy
+        signal["tps"].sort()  # Ascending for buy
+    else:  # sell
+        signal["sl"].sort(reverse=True)  # Descending for sell
+        signal["tps"].sort(reverse=True)  # Descending for sell
+
+    # Only return signal if we have all required components
+    if (signal["type"] and 
+        signal["instrument"] and 
+        signal["entry"] is not None and 
+        signal["sl"] and  # At least one SL value
+        signal["tps"]):
+        return signal
+    return None
+
+
+def build_corpus(size, seed=42):
+    """Build a corpus of signal and chatter messages like the channels post"""
+    rng = random.Random(seed)
+    chatter = [
+        "Good morning traders! Market opens in 30 minutes",
+        "TP1 HIT ✅ +40 pips\nSecure profits and move SL to entry",
+        "Weekly results:\n+320 pips\nThank you all for trusting the process 🙏",
+        "Join our VIP channel for more signals\nhttps://t.me/example",
+        "NFP today, be careful with lot sizes\nStay safe",
+        "Gold running nicely 🚀",
+        "🔥🔥🔥",
+    ]
+    corpus = []
+    for _ in range(size):
+        if rng.random() < 0.3:
+            side = rng.choice(["BUY", "SELL"])
+            instrument = rng.choice(["XAUUSD", "GOLD", "Gold"])
+            entry = round(rng.uniform(1800, 2700), 1)
+            step = 3.0 if side == "BUY" else -3.0
+            lines = []
+            if rng.random() < 0.5:
+                lines.append(f"{instrument} {side} NOW {entry}")
+            else:
+                lines.append(f"{instrument} {side} NOW")
+                lines.append(f"Entry {entry}")
+            lines.append("")
+            lines.append(f"SL {entry - step * 4:.1f}")
+            for i in range(1, rng.randint(2, 5)):
+                lines.append(f"TP {entry + step * i:.1f}")
+            lines.append("Use proper risk management ⚠️")
+            corpus.append("\n".join(lines))
+        else:
+            corpus.append(rng.choice(chatter))
+    return corpus
+
+
+def build_formats(count):
+    """GOLDHUNTER plus `count - 1` generated formats, two instruments each"""
+    pairs = ("".join(pair) for pair in itertools.permutations(CURRENCIES, 2))
+    formats = [GOLDHUNTER]
+    for i in range(1, count):
+        sides = (("long", "buy"), ("short", "sell")) if i % 2 else (("buy", "buy"), ("sell", "sell"))
+        instruments = tuple((pair, pair.upper()) for pair in itertools.islice(pairs, 2))
+        formats.append(SignalFormat(f"format{i}", instruments, sides, entry_range=(0, 1000000)))
+    return formats
+
+
+def retarget_signals(corpus, formats, seed=7):
+    """Spread the corpus's signals evenly across `formats` by rewriting their first line"""
+    rng = random.Random(seed)
+    retargeted = []
+    for text in corpus:
+        fmt = rng.choice(formats)
+        if fmt is GOLDHUNTER or parse_trading_signal(text) is None:
+            retargeted.append(text)
+            continue
+        # Signal first lines read "INSTRUMENT SIDE NOW [entry]"
+        first_line, _, rest = text.partition("\n")
+        side = "buy" if "BUY" in first_line else "sell"
+        keyword = next(keyword for keyword, signal_type in fmt.sides if signal_type == side)
+        tail = first_line.split("NOW", 1)[1]
+        retargeted.append(f"{fmt.instruments[0][1]} {keyword.upper()} NOW{tail}\n{rest}")
+    return retargeted
+
+
+def parse_every_format(formats, message_text):
+    """Baseline: run the message through each format's parser until one matches"""
+    if not message_text:
+        return None
+    lines = message_text.lower().split('\n')
+    index = 0
+    for first_line in lines:
+        index += 1
+        first_line = first_line.strip()
+        if first_line:
+            break
+    else:
+        return None
+    for fmt in formats:
+        signal = parse_lines(fmt, lines, index, first_line)
+        if signal is not None:
+            return signal
+    return None
+
+
+def bench_formats(corpus, counts, repeat):
+    """Messages/sec for a channel assigned 1..N formats, indexed vs every format"""
+    print(f"\n{'formats':>8} {'keywords':>9} {'every fmt/s':>12} {'indexed/s':>10} {'speedup':>8}")
+    for count in counts:
+        formats = build_formats(count)
+        registry = ParserRegistry(formats)
+        registry.assign("bench", [fmt.name for fmt in formats])
+        keywords = len({keyword for fmt in formats for keyword, _ in fmt.instruments + fmt.sides})
+        messages = retarget_signals(corpus, formats)
+
+        for text in messages:
+            assert registry.parse(text, "bench") == parse_every_format(formats, text), text
+
+        every = min_time(lambda: [parse_every_format(formats, text) for text in messages], repeat)
+        indexed = min_time(lambda: [registry.parse(text, "bench") for text in messages], repeat)
+        print(f"{count:>8} {keywords:>9} {len(messages) / every:>12,.0f} {len(messages) / indexed:>10,.0f} "
+              f"{every / indexed:>7.2f}x")
+
+
+def min_time(func, repeat):
+    """Best wall time of `repeat` runs"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench(label, func, repeat):
+    """Run func `repeat` times and return the best wall time"""
+    best = min_time(func, repeat)
+    print(f"{label:<28} {best * 1000:8.2f} ms")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--formats", default="1,4,16,64,128", help="Format counts to compare")
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.messages)
+
+    # Both parsers must agree on every message before timing them
+    for text in corpus:
+        assert parse_trading_signal(text) == legacy_parse_trading_signal(text), text
+    signals = sum(1 for text in corpus if parse_trading_signal(text))
+    print(f"📊 Corpus: {len(corpus)} messages, {signals} signals")
+
+    legacy = bench("legacy parse_trading_signal", lambda: [legacy_parse_trading_signal(t) for t in corpus], args.repeat)
+    single = bench("parse_trading_signal", lambda: [parse_trading_signal(t) for t in corpus], args.repeat)
+    batch = bench("parse_signals (batch)", lambda: parse_signals(corpus), args.repeat)
+
+    print(f"⚡ Speedup: {legacy / single:.2f}x per message, {legacy / batch:.2f}x batched")
+
+    bench_formats(corpus, [int(count) for count in args.formats.split(",")], args.repeat)
+
+
+if __name__ == '__main__':
+    main()
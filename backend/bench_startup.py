@@ -0,0 +1,239 @@
+"""Startup benchmark for the bot: import time and time-to-first-signal
+
+Measures how long `import telegram_bot` takes in a fresh interpreter,
+then runs telegram_bot.main() against a stand-in Telegram client and a
+SimulatedMT5 with slow login/connect, injects one signal as soon as the
+channels are being listened to, and reports when each startup step
+finished and when that signal was processed.
+
+The Telegram login, MT5 connect and server binds run concurrently, so
+time-to-ready should track the slowest of them rather than their sum.
+
+Usage: python bench_startup.py [--login-latency SECONDS] [--connect-latency SECONDS]
+                               [--broker-latency SECONDS] [--runs N]
+
+Binds the bot's websocket (8765) and metrics (BOT_METRICS_PORT) ports.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+# Run the bot against the simulator with throwaway state
+os.environ.setdefault("BROKER_BACKEND", "sim")
+os.environ.setdefault("CHECKPOINT_DB_PATH", ":memory:")
+os.environ.setdefault("ENTITY_CACHE_PATH", ":memory:")
+os.environ.setdefault("SIGNAL_BUS_DB_PATH", ":memory:")
+
+import telegram_bot  # noqa: E402
+from bench_pipeline import ReplayChat, ReplayEvent, ReplayMessage  # noqa: E402
+from broadcaster import Broadcaster  # noqa: E402
+from broker_backends import SimulatedMT5  # noqa: E402
+from checkpoint_store import CheckpointStore  # noqa: E402
+from entity_cache import EntityCache  # noqa: E402
+from feed_protocol import FeedLog  # noqa: E402
+from ingest_pipeline import KeyedSequencer, Pipeline, Stage  # noqa: E402
+from mt5_supervisor import MT5Supervisor  # noqa: E402
+from order_executor import OrderExecutor  # noqa: E402
+from signal_bus import SignalBus  # noqa: E402
+from signal_dedup import SignalDeduplicator  # noqa: E402
+from signal_lifecycle import LifecycleTracker, SLTPCoalescer  # noqa: E402
+from signal_parser import INSTRUMENTS  # noqa: E402
+from trading_platform import TradingPlatform  # noqa: E402
+
+IMPORT_PROBE = (
+    "import sys, time\n"
+    "started = time.perf_counter()\n"
+    "import telegram_bot\n"
+    "elapsed = time.perf_counter() - started\n"
+    "deferred = [name for name in ('telethon', 'fastapi', 'uvicorn', 'websockets', 'dotenv') "
+    "if name not in sys.modules]\n"
+    "print(elapsed, ','.join(deferred))\n"
+)
+
+SIGNAL_TEXT = "XAUUSD BUY NOW 2350.0\n\nSL 2338.0\nTP 2353.0\nTP 2356.0"
+
+# Stand-in channel, pre-resolved so main() uses the cached handle
+CHANNEL_ID = 1234567890
+CHANNEL_PEER_ID = -1000000000000 - CHANNEL_ID
+
+
+class SlowConnectMT5(SimulatedMT5):
+    """SimulatedMT5 whose initialize() takes as long as a real terminal start"""
+
+    def __init__(self, connect_latency, **kwargs):
+        super().__init__(**kwargs)
+        self.connect_latency = connect_latency
+
+    def initialize(self, path=None, **kwargs):
+        time.sleep(self.connect_latency)
+        return super().initialize(path, **kwargs)
+
+
+class StartupClient:
+    """Stand-in for TelegramClient: a slow login, no history, runs until stopped"""
+
+    def __init__(self, login_latency):
+        self.login_latency = login_latency
+        self.connected = False
+        self.handlers = []
+        self.disconnected = asyncio.Event()
+
+    async def start(self, phone=None):
+        await asyncio.sleep(self.login_latency)
+        self.connected = True
+        return self
+
+    def is_connected(self):
+        return self.connected
+
+    def add_event_handler(self, callback, event):
+        self.handlers.append((callback, event))
+
+    async def get_entity(self, name):
+        raise ValueError(f"No entity for {name}")
+
+    async def iter_messages(self, entity, limit=None, min_id=0):
+        return
+        yield
+
+    async def run_until_disconnected(self):
+        await self.disconnected.wait()
+
+    def disconnect(self):
+        self.connected = False
+        self.disconnected.set()
+
+
+def measure_import():
+    """Import telegram_bot in a fresh interpreter; return (seconds, deferred modules)"""
+    result = subprocess.run(
+        [sys.executable, "-c", IMPORT_PROBE],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, text=True, check=True
+    )
+    elapsed, deferred = result.stdout.strip().splitlines()[-1].split(" ")
+    return float(elapsed), [name for name in deferred.split(",") if name]
+
+
+def reset_bot(login_latency, connect_latency, broker_latency):
+    """Point telegram_bot's singletons at a slow-starting simulated broker"""
+    telegram_bot.mt5_supervisor.stop()
+    telegram_bot.trading_platform.symbol_cache.stop_refresh()
+    telegram_bot.trading_platform.account_cache.stop_refresh()
+    telegram_bot.order_executor.stop()
+
+    backend = SlowConnectMT5(connect_latency, latency=broker_latency, seed=1)
+    trading_platform = TradingPlatform(symbols=INSTRUMENTS, backend=backend)
+    telegram_bot.trading_platform = trading_platform
+    telegram_bot.order_executor = OrderExecutor(trading_platform)
+    telegram_bot.mt5_supervisor = MT5Supervisor(trading_platform, telegram_bot.order_executor)
+    telegram_bot.sltp_coalescer = SLTPCoalescer(telegram_bot.order_executor, trading_platform)
+    telegram_bot.checkpoints = CheckpointStore(":memory:")
+    telegram_bot.signal_dedup = SignalDeduplicator()
+    telegram_bot.lifecycle = LifecycleTracker()
+    telegram_bot.execute_turns = KeyedSequencer()
+    telegram_bot.broadcaster = Broadcaster()
+    telegram_bot.feed = FeedLog()
+    telegram_bot.signal_bus = SignalBus(path=":memory:")
+    telegram_bot.signal_bus.add_listener(telegram_bot.broadcast_messages)
+    telegram_bot.ingest_pipeline = Pipeline([
+        Stage(stage.name, stage.handler, stage.workers, stage.queue.maxsize)
+        for stage in telegram_bot.ingest_pipeline.stages.values()
+    ])
+
+    telegram_bot.entity_cache = EntityCache(":memory:")
+    for username in telegram_bot.CHANNELS:
+        telegram_bot.entity_cache.put(SimpleNamespace(
+            id=CHANNEL_ID, title=username, username=username, access_hash=1, broadcast=True
+        ), peer_id=CHANNEL_PEER_ID)
+    return StartupClient(login_latency)
+
+
+def fetch_readiness():
+    """GET /readyz from the bot's HTTP API"""
+    url = f"http://127.0.0.1:{telegram_bot.METRICS_PORT}/readyz"
+    try:
+        with urllib.request.urlopen(url, timeout=5) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+async def wait_for_step(readiness, step, timeout=60):
+    """Poll until a readiness step is recorded"""
+    deadline = time.monotonic() + timeout
+    while readiness.status()["steps"].get(step) is None:
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Startup step {step!r} not reached within {timeout}s")
+        await asyncio.sleep(0.001)
+
+
+async def run_startup(login_latency, connect_latency, broker_latency):
+    """Start the bot, feed it one signal once listening and time each step"""
+    client = reset_bot(login_latency, connect_latency, broker_latency)
+    readiness = telegram_bot.readiness
+    bot = asyncio.create_task(telegram_bot.main(client))
+    await wait_for_step(readiness, "channels")
+
+    chat = ReplayChat(CHANNEL_ID, telegram_bot.CHANNELS[0])
+    message = ReplayMessage(1, SIGNAL_TEXT, datetime.now(timezone.utc))
+    await telegram_bot.handle_new_message(ReplayEvent(chat, message))
+    await wait_for_step(readiness, "first_signal")
+    await wait_for_step(readiness, "mt5")
+
+    http_status, ready = await asyncio.get_running_loop().run_in_executor(None, fetch_readiness)
+    client.disconnect()
+    await bot
+
+    telegram_bot.mt5_supervisor.stop()
+    telegram_bot.trading_platform.symbol_cache.stop_refresh()
+    telegram_bot.trading_platform.account_cache.stop_refresh()
+    telegram_bot.order_executor.stop()
+    await telegram_bot.signal_bus.stop()
+    return http_status, ready
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--login-latency", type=float, default=1.0, help="Simulated Telegram login time")
+    parser.add_argument("--connect-latency", type=float, default=1.5, help="Simulated MT5 terminal start time")
+    parser.add_argument("--broker-latency", type=float, default=0.005, help="Simulated MT5 round-trip")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh-interpreter import measurements")
+    args = parser.parse_args()
+
+    imports = [measure_import() for _ in range(args.runs)]
+    import_times = sorted(elapsed for elapsed, _ in imports)
+    print(f"📊 import telegram_bot: median {import_times[len(import_times) // 2] * 1000:.0f} ms "
+          f"over {args.runs} runs (deferred: {', '.join(imports[0][1]) or 'none'})")
+
+    # Keep the bot's console output out of the results
+    logging.disable(logging.INFO)
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        http_status, ready = asyncio.run(
+            run_startup(args.login_latency, args.connect_latency, args.broker_latency)
+        )
+
+    steps = ready["steps"]
+    print(f"📊 Startup with Telegram login {args.login_latency:.2f}s, MT5 connect {args.connect_latency:.2f}s")
+    for step, elapsed in steps.items():
+        print(f"{step:>14} {elapsed * 1000:>9.1f} ms" if elapsed is not None else f"{step:>14} {'-':>9}")
+    # Logging in and connecting one after the other could not beat this, even with free imports
+    sequential = args.login_latency + args.connect_latency
+    print(f"{'sequential':>14} {sequential * 1000:>9.1f} ms (lower bound: login + connect one after another)")
+    print(f"📊 GET /readyz -> {http_status}, ready={ready['ready']}, checks={ready['checks']}")
+    if telegram_bot.readiness.status()["steps"].get("first_signal") is None:
+        sys.exit("❌ The injected signal was not processed")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,232 @@
+import asyncio
+import logging
+import time
+
+from feed_protocol import ALL, CHANNEL, JSON, delta, encode_frame
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Slow-consumer policies, applied when a client's send queue is full
+DROP_OLDEST = "drop_oldest"   # Coalesce: discard the oldest queued message
+DROP_NEWEST = "drop_newest"   # Discard the message being broadcast
+DISCONNECT = "disconnect"     # Evict the client
+
+
+class ClientConnection:
+    """A websocket client with its own bounded send queue and writer task"""
+
+    def __init__(self, websocket, max_queue_size, encoding=JSON):
+        self.websocket = websocket
+        self.encoding = encoding
+        self.queue = asyncio.Queue(maxsize=max_queue_size)
+        self.writer = None
+        self.dropped = 0
+        self.group = None
+
+
+class SubscriptionGroup:
+    """Clients sharing one subscription, and thus the same delta frames"""
+
+    def __init__(self, subscription, position):
+        self.subscription = subscription
+        self.clients = set()
+        # Feed position of the last delta sent; never ahead of a member's position
+        self.last_seq = position
+
+
+class Broadcaster:
+    """Fan messages out to websocket clients without one slow client holding up the rest
+
+    Clients are grouped by subscription and indexed by channel, so each
+    published row is only matched against groups that can want it. Each
+    group's frame is serialized once per encoding in use and the same
+    payload is queued for all of its clients. Per-client writer tasks do the
+    actual sends, so a slow or broken connection only affects its own queue.
+    """
+
+    def __init__(self, max_queue_size=100, policy=DROP_OLDEST):
+        if policy not in (DROP_OLDEST, DROP_NEWEST, DISCONNECT):
+            raise ValueError(f"Unknown slow-consumer policy: {policy}")
+        self.max_queue_size = max_queue_size
+        self.policy = policy
+        self.clients = {}
+        self.groups = {}
+        # Subscription index: channel -> group keys, plus groups for any channel
+        self._by_channel = {}
+        self._any_channel = set()
+
+        # Counters
+        self.messages_broadcast = 0
+        self.messages_sent = 0
+        self.drops = 0
+        self.evictions = 0
+        self.send_errors = 0
+        self.total_fanout_latency = 0.0
+        self.max_fanout_latency = 0.0
+
+    def __len__(self):
+        return len(self.clients)
+
+    def register(self, websocket, encoding=JSON, subscription=ALL, position=0):
+        """Start a writer task for a new client at feed position `position`"""
+        client = ClientConnection(websocket, self.max_queue_size, encoding)
+        client.writer = asyncio.create_task(self._write(client))
+        self.clients[websocket] = client
+        self._join(client, subscription, position)
+        return client
+
+    def subscribe(self, websocket, subscription, position):
+        """Move a client to another subscription at feed position `position`"""
+        client = self.clients.get(websocket)
+        if client is not None:
+            self._leave(client)
+            self._join(client, subscription, position)
+
+    async def unregister(self, websocket):
+        """Stop a client's writer task"""
+        client = self._remove(websocket)
+        if client is None:
+            return
+        if client.writer is not asyncio.current_task():
+            client.writer.cancel()
+            try:
+                await client.writer
+            except (asyncio.CancelledError, Exception):
+                pass
+
+    def publish(self, prev, seq, rows):
+        """Route feed rows in (prev, seq] to the groups whose subscription matches"""
+        if not self.clients:
+            return
+        self.messages_broadcast += 1
+
+        matched = {}
+        for row in rows:
+            keys = self._by_channel.get(row[CHANNEL])
+            for key in (self._any_channel | keys) if keys else self._any_channel:
+                if self.groups[key].subscription.matches(row):
+                    matched.setdefault(key, []).append(row)
+
+        queued_at = time.perf_counter()
+        for key, group_rows in matched.items():
+            group = self.groups[key]
+            frame = delta(group.last_seq, seq, group_rows)
+            group.last_seq = seq
+            payloads = {}
+            for client in list(group.clients):
+                payload = payloads.get(client.encoding)
+                if payload is None:
+                    payload = payloads[client.encoding] = encode_frame(frame, client.encoding)
+                self._enqueue(client, (payload, queued_at))
+
+    def send_to(self, websocket, frame):
+        """Queue a frame for a single client"""
+        client = self.clients.get(websocket)
+        if client is not None:
+            self._enqueue(client, (encode_frame(frame, client.encoding), time.perf_counter()))
+
+    def get_stats(self):
+        """Get fan-out latency and drop counters"""
+        sent = self.messages_sent
+        return {
+            "clients": len(self.clients),
+            "subscription_groups": len(self.groups),
+            "messages_broadcast": self.messages_broadcast,
+            "messages_sent": sent,
+            "drops": self.drops,
+            "evictions": self.evictions,
+            "send_errors": self.send_errors,
+            "max_queue_depth": max((c.queue.qsize() for c in self.clients.values()), default=0),
+            "avg_fanout_latency_ms": (self.total_fanout_latency / sent * 1000) if sent else 0.0,
+            "max_fanout_latency_ms": self.max_fanout_latency * 1000
+        }
+
+    def _enqueue(self, client, item):
+        """Queue an item for a client, applying the slow-consumer policy"""
+        try:
+            client.queue.put_nowait(item)
+            return
+        except asyncio.QueueFull:
+            pass
+
+        self.drops += 1
+        client.dropped += 1
+        if self.policy == DROP_OLDEST:
+            client.queue.get_nowait()
+            client.queue.put_nowait(item)
+        elif self.policy == DISCONNECT:
+            self._evict(client)
+
+    def _join(self, client, subscription, position):
+        """Add a client to the group for its subscription"""
+        key = subscription.key
+        group = self.groups.get(key)
+        if group is None:
+            group = self.groups[key] = SubscriptionGroup(subscription, position)
+            if subscription.channels is None:
+                self._any_channel.add(key)
+            else:
+                for channel in subscription.channels:
+                    self._by_channel.setdefault(channel, set()).add(key)
+        group.clients.add(client)
+        client.group = group
+
+    def _leave(self, client):
+        """Remove a client from its group, dropping the group when empty"""
+        group = client.group
+        client.group = None
+        if group is None:
+            return
+        group.clients.discard(client)
+        if group.clients:
+            return
+        key = group.subscription.key
+        del self.groups[key]
+        if group.subscription.channels is None:
+            self._any_channel.discard(key)
+        else:
+            for channel in group.subscription.channels:
+                keys = self._by_channel[channel]
+                keys.discard(key)
+                if not keys:
+                    del self._by_channel[channel]
+
+    def _remove(self, websocket):
+        """Forget a client, returning it if it was registered"""
+        client = self.clients.pop(websocket, None)
+        if client is not None:
+            self._leave(client)
+        return client
+
+    def _evict(self, client):
+        """Disconnect a client that cannot keep up"""
+        if self._remove(client.websocket) is None:
+            return
+        self.evictions += 1
+        logger.warning(f"Evicting slow websocket client after {client.dropped} dropped messages")
+        client.writer.cancel()
+        asyncio.create_task(client.websocket.close(code=1008, reason="Client too slow"))
+
+    async def _write(self, client):
+        """Writer task: send queued payloads to one client"""
+        websocket = client.websocket
+        while True:
+            payload, queued_at = await client.queue.get()
+            try:
+                await websocket.send(payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # A broken connection only ends this client's writer
+                self.send_errors += 1
+                logger.debug(f"Send to websocket client failed: {str(e)}")
+                self._remove(websocket)
+                return
+
+            latency = time.perf_counter() - queued_at
+            metrics.observe("broadcast_fanout", latency)
+            self.messages_sent += 1
+            self.total_fanout_latency += latency
+            if latency > self.max_fanout_latency:
+                self.max_fanout_latency = latency
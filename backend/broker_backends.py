@@ -0,0 +1,219 @@
+import itertools
+import os
+import random
+import threading
+import time
+from collections import namedtuple
+
+# Broker backends expose the MetaTrader5 module API (initialize, login,
+# symbol_info, order_send, ...) so TradingPlatform can run against the real
+# terminal or against SimulatedMT5 on machines without MetaTrader installed.
+
+SymbolInfo = namedtuple("SymbolInfo", [
+    "name", "digits", "point", "volume_min", "volume_max", "volume_step",
+    "trade_stops_level", "trade_contract_size", "trade_tick_value",
+    "trade_tick_size", "bid", "ask"
+])
+TerminalInfo = namedtuple("TerminalInfo", ["connected", "trade_allowed"])
+AccountInfo = namedtuple("AccountInfo", ["balance", "equity", "margin", "margin_free", "leverage"])
+OrderSendResult = namedtuple("OrderSendResult", [
+    "retcode", "deal", "order", "volume", "price", "comment", "request"
+])
+TradePosition = namedtuple("TradePosition", [
+    "ticket", "symbol", "type", "volume", "price_open", "sl", "tp", "time", "magic", "comment"
+])
+TradeOrder = namedtuple("TradeOrder", [
+    "ticket", "symbol", "type", "volume_current", "price_open", "sl", "tp", "time_setup", "magic", "comment"
+])
+Tick = namedtuple("Tick", ["time", "bid", "ask"])
+
+# Symbols known to the simulator: name -> (digits, price)
+DEFAULT_SIM_SYMBOLS = {
+    "XAUUSD": (2, 2300.0),
+    "Gold": (2, 2300.0),
+    "EURUSD": (5, 1.085),
+    "GBPUSD": (5, 1.245),
+}
+
+
+def load_mt5():
+    """Import the real MetaTrader5 package (Windows only)"""
+    import MetaTrader5
+    return MetaTrader5
+
+
+class SimulatedMT5:
+    """Offline stand-in for the MetaTrader5 module
+
+    Every terminal call sleeps for `latency` seconds (plus up to `jitter`),
+    orders are rejected with probability `reject_rate`, and fills move the
+    requested price by up to `slippage`. Sent orders are kept in `orders`
+    with their send time for latency measurements.
+    """
+
+    ORDER_TYPE_BUY = 0
+    ORDER_TYPE_SELL = 1
+    ORDER_TYPE_BUY_LIMIT = 2
+    ORDER_TYPE_SELL_LIMIT = 3
+    ORDER_TYPE_BUY_STOP = 4
+    ORDER_TYPE_SELL_STOP = 5
+    TRADE_ACTION_DEAL = 1
+    TRADE_ACTION_PENDING = 5
+    TRADE_ACTION_SLTP = 6
+    TRADE_ACTION_REMOVE = 8
+    ORDER_TIME_GTC = 0
+    ORDER_FILLING_IOC = 1
+    TRADE_RETCODE_REJECT = 10006
+    TRADE_RETCODE_DONE = 10009
+    TRADE_RETCODE_INVALID = 10013
+    TRADE_RETCODE_POSITION_CLOSED = 10036
+
+    def __init__(self, latency=0.0, jitter=0.0, reject_rate=0.0, slippage=0.0,
+                 symbols=None, balance=10000.0, leverage=100, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.reject_rate = reject_rate
+        self.slippage = slippage
+        self.symbols = dict(DEFAULT_SIM_SYMBOLS if symbols is None else symbols)
+        self.balance = balance
+        self.leverage = leverage
+        self.connected = False
+        self.orders = []
+        self.positions = {}
+        self.pending_orders = {}
+        self._random = random.Random(seed)
+        self._tickets = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _delay(self):
+        """Simulate a terminal round-trip"""
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+
+    def initialize(self, path=None, **kwargs):
+        self._delay()
+        self.connected = True
+        return True
+
+    def login(self, login=None, password=None, server=None, **kwargs):
+        self._delay()
+        return self.connected
+
+    def shutdown(self):
+        self.connected = False
+
+    def last_error(self):
+        return (1, "Success") if self.connected else (-10004, "No IPC connection")
+
+    def terminal_info(self):
+        return TerminalInfo(self.connected, True) if self.connected else None
+
+    def account_info(self):
+        self._delay()
+        if not self.connected:
+            return None
+        margin = sum(p.volume * p.price_open * 100 / self.leverage for p in self.positions.values())
+        return AccountInfo(self.balance, self.balance, margin, self.balance - margin, self.leverage)
+
+    def symbol_info(self, symbol):
+        self._delay()
+        if not self.connected or symbol not in self.symbols:
+            return None
+        digits, price = self.symbols[symbol]
+        point = 10 ** -digits
+        return SymbolInfo(symbol, digits, point, 0.01, 100.0, 0.01, 0, 100.0, 1.0, point,
+                          price, price + 2 * point)
+
+    def symbol_info_tick(self, symbol):
+        self._delay()
+        if not self.connected or symbol not in self.symbols:
+            return None
+        digits, price = self.symbols[symbol]
+        return Tick(int(time.time()), price, price + 2 * 10 ** -digits)
+
+    def orders_get(self, symbol=None, ticket=None):
+        if not self.connected:
+            return None
+        with self._lock:
+            orders = list(self.pending_orders.values())
+        if ticket is not None:
+            orders = [o for o in orders if o.ticket == ticket]
+        if symbol is not None:
+            orders = [o for o in orders if o.symbol == symbol]
+        return tuple(orders)
+
+    def positions_get(self, symbol=None, ticket=None):
+        if not self.connected:
+            return None
+        with self._lock:
+            positions = list(self.positions.values())
+        if ticket is not None:
+            positions = [p for p in positions if p.ticket == ticket]
+        if symbol is not None:
+            positions = [p for p in positions if p.symbol == symbol]
+        return tuple(positions)
+
+    def order_send(self, request):
+        sent_at = time.perf_counter()
+        self._delay()
+        with self._lock:
+            self.orders.append((sent_at, request))
+            if not self.connected or self._random.random() < self.reject_rate:
+                return OrderSendResult(self.TRADE_RETCODE_REJECT, 0, 0, 0.0, 0.0, "Rejected", request)
+
+            if request["action"] == self.TRADE_ACTION_SLTP:
+                position = self.positions.get(request["position"])
+                if position is None:
+                    return OrderSendResult(self.TRADE_RETCODE_POSITION_CLOSED, 0, 0, 0.0, 0.0,
+                                           "Position doesn't exist", request)
+                self.positions[position.ticket] = position._replace(sl=request["sl"], tp=request["tp"])
+                return OrderSendResult(self.TRADE_RETCODE_DONE, 0, position.ticket, position.volume,
+                                       position.price_open, "Request executed", request)
+
+            if request["action"] == self.TRADE_ACTION_REMOVE:
+                order = self.pending_orders.pop(request["order"], None)
+                if order is None:
+                    return OrderSendResult(self.TRADE_RETCODE_INVALID, 0, 0, 0.0, 0.0,
+                                           "Invalid request", request)
+                return OrderSendResult(self.TRADE_RETCODE_DONE, 0, order.ticket, order.volume_current,
+                                       order.price_open, "Request executed", request)
+
+            if request["action"] == self.TRADE_ACTION_PENDING:
+                ticket = next(self._tickets)
+                self.pending_orders[ticket] = TradeOrder(
+                    ticket, request["symbol"], request["type"], request["volume"], request["price"],
+                    request.get("sl", 0.0), request.get("tp", 0.0), int(time.time()),
+                    request.get("magic", 0), request.get("comment", "")
+                )
+                return OrderSendResult(self.TRADE_RETCODE_DONE, 0, ticket, request["volume"],
+                                       request["price"], "Request executed", request)
+
+            if request.get("position"):
+                # A deal against an existing position closes it
+                position = self.positions.pop(request["position"], None)
+                if position is None:
+                    return OrderSendResult(self.TRADE_RETCODE_POSITION_CLOSED, 0, 0, 0.0, 0.0,
+                                           "Position doesn't exist", request)
+                return OrderSendResult(self.TRADE_RETCODE_DONE, next(self._tickets), position.ticket,
+                                       position.volume, request["price"], "Request executed", request)
+
+            ticket = next(self._tickets)
+            price = request["price"] + self._random.uniform(-self.slippage, self.slippage)
+            self.positions[ticket] = TradePosition(
+                ticket, request["symbol"], request["type"], request["volume"], price,
+                request.get("sl", 0.0), request.get("tp", 0.0), int(time.time()),
+                request.get("magic", 0), request.get("comment", "")
+            )
+            return OrderSendResult(self.TRADE_RETCODE_DONE, ticket, ticket, request["volume"],
+                                   price, "Request executed", request)
+
+
+def get_backend(name=None, **kwargs):
+    """Get a broker backend by name ("mt5" or "sim"), defaulting to $BROKER_BACKEND"""
+    name = (name or os.getenv("BROKER_BACKEND", "mt5")).lower()
+    if name == "mt5":
+        return load_mt5()
+    if name == "sim":
+        return SimulatedMT5(**kwargs)
+    raise ValueError(f"Unknown broker backend: {name}")
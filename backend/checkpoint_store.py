@@ -0,0 +1,172 @@
+import json
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    channel_id INTEGER PRIMARY KEY,
+    last_message_id INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS processed_messages (
+    channel_id INTEGER NOT NULL,
+    message_id INTEGER NOT NULL,
+    edit_date TEXT NOT NULL,
+    signal TEXT,
+    executed INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (channel_id, message_id)
+);
+"""
+
+# Processed messages kept per channel; must exceed the backfill limit
+DEFAULT_KEEP_PER_CHANNEL = 5000
+
+# Sentinel returned by get_signal when a message has not been processed
+NOT_PROCESSED = object()
+
+
+def edit_key(edit_date) -> str:
+    """Normalize a message edit date (datetime or None) for storage"""
+    return edit_date.isoformat() if edit_date else ""
+
+
+class CheckpointStore:
+    """Last processed message id per channel plus a cache of parsed signals
+
+    Parsed results are keyed by (channel, message_id, edit_date), so a message
+    is only parsed and pushed again when it has been edited. Publishing and
+    executing are tracked apart: the backfill only publishes, so a signal it
+    saw can still be traded when its live event arrives.
+
+    Only the newest `keep_per_channel` processed messages are kept per channel.
+    """
+
+    def __init__(self, path="checkpoints.db", keep_per_channel=DEFAULT_KEEP_PER_CHANNEL):
+        self.path = path
+        self.keep_per_channel = keep_per_channel
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+        # Rows written per channel since it was last pruned
+        self._unpruned = {}
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
+    def get_checkpoint(self, channel_id) -> int:
+        """Get the last processed message id for a channel (0 if none)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT last_message_id FROM checkpoints WHERE channel_id = ?",
+                (channel_id,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def filter_unprocessed(self, channel_id, messages: List) -> List:
+        """Drop messages already processed with the same edit date"""
+        if not messages:
+            return []
+        ids = [message.id for message in messages]
+        placeholders = ",".join("?" * len(ids))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT message_id, edit_date FROM processed_messages "
+                f"WHERE channel_id = ? AND message_id IN ({placeholders})",
+                [channel_id, *ids]
+            ).fetchall()
+        seen = dict(rows)
+        return [message for message in messages
+                if seen.get(message.id) != edit_key(message.edit_date)]
+
+    def get_signal(self, channel_id, message_id, edit_date):
+        """Get the cached parse result, or NOT_PROCESSED"""
+        state = self.get_state(channel_id, message_id, edit_date)
+        return state if state is NOT_PROCESSED else state[0]
+
+    def get_state(self, channel_id, message_id, edit_date):
+        """Get (signal, executed) for a published message, or NOT_PROCESSED"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT signal, executed FROM processed_messages "
+                "WHERE channel_id = ? AND message_id = ? AND edit_date = ?",
+                (channel_id, message_id, edit_key(edit_date))
+            ).fetchone()
+        if row is None:
+            return NOT_PROCESSED
+        return (json.loads(row[0]) if row[0] else None), bool(row[1])
+
+    def mark_processed(self, channel_id, entries: Iterable[Tuple[int, object, Optional[Dict]]], advance=True):
+        """Record published (message_id, edit_date, signal) entries
+
+        With `advance`, the checkpoint also moves to the newest id. Callers
+        that may see newer messages before older ones (the backfill) pass
+        False and call advance() once every older message is recorded.
+        """
+        rows = [(channel_id, message_id, edit_key(edit_date),
+                 json.dumps(signal) if signal is not None else None)
+                for message_id, edit_date, signal in entries]
+        if not rows:
+            return
+        with self._lock, self._conn:
+            # A new edit has not been executed yet; a re-delivery keeps its state
+            self._conn.executemany(
+                "INSERT INTO processed_messages (channel_id, message_id, edit_date, signal, executed) "
+                "VALUES (?, ?, ?, ?, 0) ON CONFLICT(channel_id, message_id) DO UPDATE SET "
+                "executed = CASE WHEN edit_date = excluded.edit_date THEN executed ELSE 0 END, "
+                "edit_date = excluded.edit_date, signal = excluded.signal",
+                rows
+            )
+            if advance:
+                self._advance(channel_id, max(row[1] for row in rows))
+            self._unpruned[channel_id] = self._unpruned.get(channel_id, 0) + len(rows)
+            if self._unpruned[channel_id] >= self.keep_per_channel // 10:
+                self._prune(channel_id)
+
+    def mark_executed(self, channel_id, message_id, edit_date):
+        """Record that the live path handled a message (orders placed, or none needed)"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE processed_messages SET executed = 1 "
+                "WHERE channel_id = ? AND message_id = ? AND edit_date = ?",
+                (channel_id, message_id, edit_key(edit_date))
+            )
+
+    def advance(self, channel_id, message_id):
+        """Move a channel's checkpoint forward to `message_id`"""
+        with self._lock, self._conn:
+            self._advance(channel_id, message_id)
+
+    def _advance(self, channel_id, message_id):
+        """Move the checkpoint forward; caller holds the lock and transaction"""
+        self._conn.execute(
+            "INSERT INTO checkpoints (channel_id, last_message_id) VALUES (?, ?) "
+            "ON CONFLICT(channel_id) DO UPDATE SET "
+            "last_message_id = MAX(last_message_id, excluded.last_message_id)",
+            (channel_id, message_id)
+        )
+
+    def _prune(self, channel_id):
+        """Drop all but the newest processed messages; caller holds the lock and transaction"""
+        self._conn.execute(
+            "DELETE FROM processed_messages WHERE channel_id = ? AND message_id < ("
+            "SELECT message_id FROM processed_messages WHERE channel_id = ? "
+            "ORDER BY message_id DESC LIMIT 1 OFFSET ?)",
+            (channel_id, channel_id, self.keep_per_channel - 1)
+        )
+        self._unpruned[channel_id] = 0
+
+    def _migrate(self):
+        """Add the executed column to databases created before it existed"""
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(processed_messages)")}
+        if "executed" in columns:
+            return
+        with self._conn:
+            # Messages processed before the split were handled by the live path already
+            self._conn.execute(
+                "ALTER TABLE processed_messages ADD COLUMN executed INTEGER NOT NULL DEFAULT 1"
+            )
@@ -0,0 +1,188 @@
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entities (
+    peer_id INTEGER PRIMARY KEY,
+    id INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    display_name TEXT NOT NULL,
+    title TEXT,
+    username TEXT,
+    access_hash INTEGER,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entities_username ON entities (username);
+"""
+
+# Shown when a message has no resolvable sender
+DEFAULT_SENDER_NAME = "Channel Admin"
+
+
+def display_name(entity):
+    """Get a display name for a Telegram user, chat or channel"""
+    if not entity:
+        return DEFAULT_SENDER_NAME
+    if hasattr(entity, 'first_name'):
+        return f"{entity.first_name} {entity.last_name or ''}".strip()
+    if hasattr(entity, 'title'):
+        return entity.title
+    if hasattr(entity, 'username'):
+        return f"@{entity.username}"
+    return DEFAULT_SENDER_NAME
+
+
+class CachedEntity:
+    """Resolved chat/sender with a precomputed display name
+
+    Exposes the attributes the bot reads from Telethon entities (id, title,
+    username, access_hash) so it can stand in for them.
+    """
+
+    __slots__ = ("peer_id", "id", "kind", "display_name", "title", "username", "access_hash")
+
+    def __init__(self, peer_id, id, kind, display_name, title=None, username=None, access_hash=None):
+        self.peer_id = peer_id
+        self.id = id
+        self.kind = kind
+        self.display_name = display_name
+        self.title = title
+        self.username = username
+        self.access_hash = access_hash
+
+    def input_peer(self):
+        """Get an input peer usable in requests without resolving the entity"""
+        if self.kind == "channel" and self.access_hash is not None:
+            from telethon.tl.types import InputPeerChannel
+            return InputPeerChannel(self.id, self.access_hash)
+        return self.peer_id
+
+
+class EntityCache:
+    """LRU cache of Telegram entities keyed by peer id, persisted in SQLite
+
+    Per-message chat and sender lookups hit memory; channel handles
+    (id + access hash) survive restarts so startup can skip get_entity.
+    """
+
+    def __init__(self, path="entities.db", capacity=10000):
+        self.path = path
+        self.capacity = capacity
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+
+        self._load()
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
+    def get(self, peer_id):
+        """Get a cached entity by peer id, or None"""
+        if peer_id is None:
+            return None
+        entry = self._entries.get(peer_id)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(peer_id)
+        self.hits += 1
+        return entry
+
+    def get_by_username(self, username):
+        """Get a cached entity by username (case-insensitive), or None"""
+        username = username.lstrip('@').lower()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM entities WHERE username = ? ORDER BY updated_at DESC LIMIT 1",
+                (username,)
+            ).fetchone()
+        if row is None:
+            return None
+        entry = self._from_row(row)
+        self._remember(entry)
+        return entry
+
+    def put(self, entity, peer_id=None):
+        """Cache a Telethon entity and return its CachedEntity"""
+        if peer_id is None:
+            from telethon import utils
+            peer_id = utils.get_peer_id(entity)
+
+        if hasattr(entity, 'first_name'):
+            kind = "user"
+        elif hasattr(entity, 'broadcast') or hasattr(entity, 'megagroup'):
+            kind = "channel"
+        else:
+            kind = "chat"
+        username = getattr(entity, 'username', None)
+        entry = CachedEntity(
+            peer_id,
+            entity.id,
+            kind,
+            display_name(entity),
+            getattr(entity, 'title', None),
+            username.lower() if username else None,
+            getattr(entity, 'access_hash', None)
+        )
+
+        self._remember(entry)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entities VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (entry.peer_id, entry.id, entry.kind, entry.display_name, entry.title,
+                 entry.username, entry.access_hash, time.time())
+            )
+        return entry
+
+    def sender_name(self, message):
+        """Get the display name of a message's sender, caching it on first sight"""
+        entry = self.get(getattr(message, 'sender_id', None))
+        if entry is not None:
+            return entry.display_name
+        sender = message.sender
+        if not sender:
+            return DEFAULT_SENDER_NAME
+        if message.sender_id is not None:
+            return self.put(sender, message.sender_id).display_name
+        return display_name(sender)
+
+    def get_stats(self):
+        """Get cache size and hit/miss counters"""
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+    def _remember(self, entry):
+        """Insert into the in-memory LRU, evicting the least recently used"""
+        self._entries[entry.peer_id] = entry
+        self._entries.move_to_end(entry.peer_id)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def _load(self):
+        """Warm the LRU with the most recently updated entities"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM entities ORDER BY updated_at DESC LIMIT ?", (self.capacity,)
+            ).fetchall()
+        for row in reversed(rows):
+            self._remember(self._from_row(row))
+
+    @staticmethod
+    def _from_row(row):
+        """Convert a database row to a CachedEntity"""
+        peer_id, id, kind, name, title, username, access_hash, _ = row
+        return CachedEntity(peer_id, id, kind, name, title, username, access_hash)
@@ -0,0 +1,195 @@
+"""Versioned websocket feed protocol: snapshot on connect, then sequenced deltas
+
+Clients connect to ws://host:8765/?v=1[&resume=SEQ&epoch=EPOCH][&encoding=msgpack]
+plus optional subscription filters: channel=TITLE (repeatable), signals_only=1
+and instrument=XAUUSD (repeatable).
+
+Server frames (all carry "v" and "type"):
+    snapshot  {"epoch", "seq", "fields", "rows"}  recent matching messages, newest last
+    delta     {"prev", "seq", "rows"}             matching messages in (prev, seq]
+
+Rows are lists in `fields` order, so keys are not repeated per message.
+`seq` is the client's feed position. Deltas without matching rows are not
+sent, so a delta whose `prev` is ahead of the client's position means
+frames were dropped and the client should reconnect for a snapshot.
+
+A client that reconnects with the epoch and last seq it saw gets only the
+rows it missed, replayed from a ring buffer; when the gap is no longer
+buffered (or the server restarted, changing the epoch) it gets a snapshot.
+
+Client frames:
+    subscribe {"channels", "signals_only", "instruments"}  answered with a snapshot
+
+MessagePack encoding needs the optional `msgpack` package.
+"""
+import json
+import time
+from collections import deque
+from itertools import islice
+from urllib.parse import parse_qs, urlsplit
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+PROTOCOL_VERSION = 1
+
+# Frame encodings
+JSON = "json"
+MSGPACK = "msgpack"
+
+# Message fields in row order
+FIELDS = ("channel", "sender", "text", "timestamp", "trading_signal", "order_status", "orders", "follow_up")
+CHANNEL = FIELDS.index("channel")
+TRADING_SIGNAL = FIELDS.index("trading_signal")
+
+
+class ProtocolError(ValueError):
+    """A client asked for something this server cannot speak"""
+
+
+def encode_frame(frame, encoding=JSON):
+    """Serialize a frame: JSON text or MessagePack bytes"""
+    if encoding == MSGPACK:
+        return msgpack.packb(frame, use_bin_type=True)
+    return json.dumps(frame, separators=(",", ":"))
+
+
+def to_row(message_data):
+    """Convert a message dict to a row in FIELDS order"""
+    return [message_data.get(field) for field in FIELDS]
+
+
+def delta(prev, seq, rows):
+    """Delta frame for the rows published between two feed positions"""
+    return {"v": PROTOCOL_VERSION, "type": "delta", "prev": prev, "seq": seq, "rows": rows}
+
+
+class Subscription:
+    """Which messages a client wants: channels, signals only, instruments
+
+    None for channels or instruments means any. Setting instruments implies
+    signals only, since plain messages have no instrument.
+    """
+
+    __slots__ = ("channels", "signals_only", "instruments", "key")
+
+    def __init__(self, channels=None, signals_only=False, instruments=None):
+        self.channels = frozenset(channels) if channels else None
+        self.instruments = frozenset(instruments) if instruments else None
+        self.signals_only = bool(signals_only) or self.instruments is not None
+        # Equal subscriptions share a key, so their clients share payloads
+        self.key = (
+            tuple(sorted(self.channels)) if self.channels else None,
+            self.signals_only,
+            tuple(sorted(self.instruments)) if self.instruments else None
+        )
+
+    @classmethod
+    def from_request(cls, data):
+        """Build a subscription from a subscribe frame"""
+        channels = data.get("channels")
+        instruments = data.get("instruments")
+        for name, values in (("channels", channels), ("instruments", instruments)):
+            if values is not None and (not isinstance(values, list) or
+                                       not all(isinstance(value, str) for value in values)):
+                raise ProtocolError(f"{name} must be a list of strings")
+        return cls(channels, data.get("signals_only", False), instruments)
+
+    def matches(self, row):
+        """Check whether a feed row passes this subscription"""
+        if self.channels is not None and row[CHANNEL] not in self.channels:
+            return False
+        signal = row[TRADING_SIGNAL]
+        if signal is None:
+            return not self.signals_only
+        return self.instruments is None or signal["instrument"] in self.instruments
+
+
+# Subscription of clients that did not ask for a filter
+ALL = Subscription()
+
+
+def parse_connect_params(path):
+    """Get (version, encoding, epoch, resume seq, subscription) from the connection path"""
+    query = parse_qs(urlsplit(path or "").query)
+    params = {key: values[-1] for key, values in query.items()}
+    try:
+        version = int(params.get("v", PROTOCOL_VERSION))
+        epoch = int(params["epoch"]) if "epoch" in params else None
+        resume = int(params["resume"]) if "resume" in params else None
+    except ValueError:
+        raise ProtocolError("v, epoch and resume must be integers")
+    if version != PROTOCOL_VERSION:
+        raise ProtocolError(f"Unsupported feed protocol version {version}")
+
+    encoding = params.get("encoding", JSON)
+    if encoding not in (JSON, MSGPACK):
+        raise ProtocolError(f"Unknown encoding {encoding}")
+    # Fall back to JSON when msgpack is not installed
+    if encoding == MSGPACK and msgpack is None:
+        encoding = JSON
+
+    subscription = Subscription(
+        query.get("channel"),
+        params.get("signals_only", "0").lower() in ("1", "true"),
+        query.get("instrument")
+    )
+    return version, encoding, epoch, resume, subscription
+
+
+class FeedLog:
+    """Sequence numbers and a ring buffer of recent rows for resuming clients"""
+
+    def __init__(self, capacity=1000, snapshot_size=100):
+        self.capacity = capacity
+        self.snapshot_size = snapshot_size
+        # Changes on every restart so clients can tell stale sequence ids apart
+        self.epoch = int(time.time() * 1000)
+        self.seq = 0
+        self._rows = deque(maxlen=capacity)
+
+    def append(self, messages):
+        """Number new messages and return (previous seq, new seq, rows)"""
+        rows = [to_row(message) for message in messages]
+        prev = self.seq
+        self.seq += len(rows)
+        self._rows.extend(rows)
+        return prev, self.seq, rows
+
+    def snapshot(self, subscription=ALL):
+        """Frame with the most recent matching rows and the current sequence id"""
+        rows = []
+        for row in reversed(self._rows):
+            if len(rows) >= self.snapshot_size:
+                break
+            if subscription.matches(row):
+                rows.append(row)
+        rows.reverse()
+        return {
+            "v": PROTOCOL_VERSION,
+            "type": "snapshot",
+            "epoch": self.epoch,
+            "seq": self.seq,
+            "fields": FIELDS,
+            "rows": rows
+        }
+
+    def catch_up(self, epoch=None, resume=None, subscription=ALL):
+        """Frames that bring a (re)connecting client up to the current seq"""
+        oldest = self.seq - len(self._rows)
+        if epoch != self.epoch or resume is None or not oldest <= resume <= self.seq:
+            return [self.snapshot(subscription)]
+        if resume == self.seq:
+            return []
+        missed = [row for row in islice(self._rows, resume - oldest, None) if subscription.matches(row)]
+        return [delta(resume, self.seq, missed)]
+
+    def get_stats(self):
+        """Get the current sequence id and buffer fill"""
+        return {
+            "seq": self.seq,
+            "buffered": len(self._rows),
+            "capacity": self.capacity
+        }
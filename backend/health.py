@@ -0,0 +1,79 @@
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Readiness:
+    """Startup steps and live checks behind the /readyz endpoint
+
+    Steps are one-off milestones timed from start() (e.g. "telegram" once
+    logged in); the process is ready once every expected step is done and
+    every live check (e.g. "MT5 is connected") passes. Steps that are not
+    expected, such as the first processed signal, are only timed.
+    """
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self._expected = []
+        self._steps = {}
+        self._checks = {}
+
+    def start(self, *expected):
+        """Restart the clock and set the steps required for readiness"""
+        self.started_at = time.monotonic()
+        self._expected = list(expected)
+        self._steps = {}
+
+    def done(self, step):
+        """Record that a step finished (only its first completion counts)"""
+        if step in self._steps:
+            return
+        self._steps[step] = time.monotonic() - self.started_at
+        logger.info(f"⏱️ Startup: {step} after {self._steps[step]:.2f}s")
+
+    def add_check(self, name, check):
+        """Require `check()` to be truthy for readiness"""
+        self._checks[name] = check
+
+    def is_ready(self):
+        """True once every expected step is done and every check passes"""
+        return all(step in self._steps for step in self._expected) and \
+            all(self._run_check(check) for check in self._checks.values())
+
+    def status(self):
+        """Readiness with per-step timings and per-check results"""
+        checks = {name: self._run_check(check) for name, check in self._checks.items()}
+        steps = {step: self._steps.get(step) for step in self._expected}
+        steps.update(self._steps)
+        return {
+            "ready": all(step in self._steps for step in self._expected) and all(checks.values()),
+            "uptime_seconds": time.monotonic() - self.started_at,
+            "steps": steps,
+            "checks": checks
+        }
+
+    @staticmethod
+    def _run_check(check):
+        """Run a check, treating errors as failures"""
+        try:
+            return bool(check())
+        except Exception:
+            return False
+
+
+def add_health_endpoints(app, readiness):
+    """Add GET /healthz (liveness) and GET /readyz (readiness) to a FastAPI app"""
+    from fastapi.responses import JSONResponse
+
+    @app.get("/healthz")
+    async def get_liveness():
+        # Answering at all means the event loop is alive
+        return {"status": "ok", "uptime_seconds": time.monotonic() - readiness.started_at}
+
+    @app.get("/readyz")
+    async def get_readiness():
+        status = readiness.status()
+        return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+    return app
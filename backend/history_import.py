@@ -0,0 +1,231 @@
+"""Bulk import of exported channel history into columnar signal arrays
+
+Streams Telegram history exports through a multiprocessing parse pool in
+chunked batches, keeping parsing off the bot's event loop entirely. Parsed
+signals are written as one .npy file per column (memory-mappable, so
+analysis tools load them without copying) or as a Parquet file when the
+output path ends in .parquet and pyarrow is installed.
+
+Usage: python history_import.py EXPORT [EXPORT ...] -o OUTPUT
+                                [--workers N] [--chunk-size N] [--channel NAME]
+
+Inputs are Telegram Desktop JSON exports (result.json), JSON arrays, or
+NDJSON files with one {"id", "date", "text"[, "channel"]} object per line.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+import numpy as np
+
+from signal_parser import INSTRUMENTS, parse_signal
+
+# Messages per task sent to a parse worker
+DEFAULT_CHUNK_SIZE = 2000
+
+# Signal side encoding in the `side` column
+BUY = 1
+SELL = -1
+
+# Columns written for every signal, in file order
+COLUMNS = ("channel", "message_id", "timestamp", "side", "instrument", "entry", "sl", "tps")
+
+
+def message_text(text):
+    """Flatten a Telegram export text field (string or list of entity parts)"""
+    if isinstance(text, str):
+        return text
+    return "".join(part if isinstance(part, str) else part.get("text", "") for part in text or ())
+
+
+def _records(data, channel):
+    """Yield (channel, message_id, date, text) from decoded export data"""
+    if isinstance(data, dict):
+        channel = data.get("name") or channel
+        data = data.get("messages", [])
+    for record in data:
+        if record.get("type", "message") != "message":
+            continue
+        yield (
+            record.get("channel") or channel,
+            record.get("id", 0),
+            record.get("date_unixtime") or record.get("date"),
+            message_text(record.get("text"))
+        )
+
+
+def iter_history(path, channel=None):
+    """Stream messages from an export file
+
+    NDJSON is read line by line; .json files hold a single document and are
+    decoded in one go.
+    """
+    channel = channel or os.path.splitext(os.path.basename(path))[0]
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".json"):
+            yield from _records(json.load(f), channel)
+            return
+        for line in f:
+            if line.strip():
+                yield from _records([json.loads(line)], channel)
+
+
+def parse_timestamp(value):
+    """Convert an export date (unix time or ISO 8601) to epoch seconds"""
+    if value is None:
+        return 0
+    if isinstance(value, (int, float)) or value.isdigit():
+        return int(value)
+    date = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return int(date.timestamp())
+
+
+def parse_chunk(chunk):
+    """Worker task: parse a chunk of messages, returning signal rows only"""
+    rows = []
+    for channel, message_id, date, text in chunk:
+        signal = parse_signal(text)
+        if signal is None:
+            continue
+        rows.append((
+            channel,
+            message_id,
+            parse_timestamp(date),
+            BUY if signal.type == "buy" else SELL,
+            INSTRUMENTS.index(signal.instrument),
+            signal.entry,
+            signal.sl,
+            signal.tps
+        ))
+    return len(chunk), rows
+
+
+def chunked(iterable, size):
+    """Group an iterable into lists of `size` items"""
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def parse_history(messages, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Parse messages in a process pool, returning (messages scanned, signal rows)
+
+    At most two chunks per worker are in flight, so memory stays bounded
+    however long the export is. Rows keep the input order.
+    """
+    workers = workers or os.cpu_count() or 1
+    scanned = 0
+    rows = []
+    with multiprocessing.Pool(workers) as pool:
+        pending = deque()
+        for chunk in chunked(messages, chunk_size):
+            pending.append(pool.apply_async(parse_chunk, (chunk,)))
+            if len(pending) >= workers * 2:
+                count, chunk_rows = pending.popleft().get()
+                scanned += count
+                rows.extend(chunk_rows)
+        while pending:
+            count, chunk_rows = pending.popleft().get()
+            scanned += count
+            rows.extend(chunk_rows)
+    return scanned, rows
+
+
+def ladder_array(ladders):
+    """Pack variable-length level ladders into a NaN-padded 2-D array"""
+    width = max((len(ladder) for ladder in ladders), default=0)
+    array = np.full((len(ladders), width), np.nan)
+    for index, ladder in enumerate(ladders):
+        array[index, :len(ladder)] = ladder
+    return array
+
+
+def build_columns(rows):
+    """Convert signal rows to NumPy columns plus the channel name table"""
+    channels = sorted({row[0] for row in rows})
+    codes = {name: code for code, name in enumerate(channels)}
+    columns = {
+        "channel": np.fromiter((codes[row[0]] for row in rows), np.int32, len(rows)),
+        "message_id": np.fromiter((row[1] for row in rows), np.int64, len(rows)),
+        "timestamp": np.fromiter((row[2] for row in rows), np.int64, len(rows)),
+        "side": np.fromiter((row[3] for row in rows), np.int8, len(rows)),
+        "instrument": np.fromiter((row[4] for row in rows), np.int8, len(rows)),
+        "entry": np.fromiter((row[5] for row in rows), np.float64, len(rows)),
+        "sl": ladder_array([row[6] for row in rows]),
+        "tps": ladder_array([row[7] for row in rows])
+    }
+    return columns, channels
+
+
+def save_signals(path, columns, channels):
+    """Write columns as .npy files in a directory, or as Parquet"""
+    if path.endswith(".parquet"):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.table({
+            "channel": pa.array(np.array(channels, dtype=object)[columns["channel"]]),
+            **{name: columns[name] for name in COLUMNS[1:6]},
+            # NaN padding becomes variable-length lists again
+            "sl": [[v for v in row if v == v] for row in columns["sl"].tolist()],
+            "tps": [[v for v in row if v == v] for row in columns["tps"].tolist()]
+        })
+        pq.write_table(table, path)
+        return
+
+    os.makedirs(path, exist_ok=True)
+    for name in COLUMNS:
+        np.save(os.path.join(path, f"{name}.npy"), columns[name])
+    with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({"channels": channels, "instruments": list(INSTRUMENTS), "count": len(columns["entry"])}, f)
+
+
+def load_signals(path, mmap=True):
+    """Load imported signal columns, memory-mapped by default
+
+    Returns (columns, channels) in the format written by save_signals.
+    """
+    with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+        meta = json.load(f)
+    mode = "r" if mmap else None
+    columns = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mode) for name in COLUMNS}
+    return columns, meta["channels"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("inputs", nargs="+", help="Exported history files")
+    parser.add_argument("-o", "--output", required=True, help="Output directory (.npy columns) or .parquet file")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--channel", help="Channel name for exports that do not carry one")
+    args = parser.parse_args()
+
+    def messages():
+        for path in args.inputs:
+            yield from iter_history(path, args.channel)
+
+    start = time.perf_counter()
+    scanned, rows = parse_history(messages(), args.workers, args.chunk_size)
+    columns, channels = build_columns(rows)
+    save_signals(args.output, columns, channels)
+    elapsed = time.perf_counter() - start
+
+    print(f"📊 Scanned {scanned} messages from {len(args.inputs)} files in {elapsed:.2f}s "
+          f"({scanned / elapsed if elapsed else 0:.0f} msgs/s)")
+    print(f"🎯 {len(rows)} signals across {len(channels)} channels written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
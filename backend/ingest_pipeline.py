@@ -0,0 +1,181 @@
+import asyncio
+import logging
+import time
+from collections import deque
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class LaneQueue:
+    """Bounded asyncio queue with a priority lane and a normal lane
+
+    Consumers always drain the priority lane first. Each lane holds at most
+    `maxsize` items; producers wait when their lane is full, which pushes
+    backpressure up to the previous stage instead of growing memory.
+    """
+
+    def __init__(self, maxsize=100):
+        self.maxsize = maxsize
+        self._lanes = (deque(), deque())
+        # Created on first use: before Python 3.10 it binds to the loop current at creation
+        self._condition = None
+
+    async def put(self, item, priority=False):
+        """Add an item, waiting while its lane is full"""
+        lane = self._lanes[0] if priority else self._lanes[1]
+        condition = self._get_condition()
+        async with condition:
+            await condition.wait_for(lambda: len(lane) < self.maxsize)
+            lane.append(item)
+            condition.notify_all()
+
+    async def get(self):
+        """Remove the next item, priority lane first"""
+        condition = self._get_condition()
+        async with condition:
+            await condition.wait_for(lambda: self._lanes[0] or self._lanes[1])
+            lane = self._lanes[0] if self._lanes[0] else self._lanes[1]
+            item = lane.popleft()
+            condition.notify_all()
+            return item
+
+    def depths(self):
+        """Get (priority lane depth, normal lane depth)"""
+        return len(self._lanes[0]), len(self._lanes[1])
+
+    def _get_condition(self):
+        """The queue's condition, created inside the running loop"""
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+
+class Stage:
+    """A pipeline stage: a lane queue drained by a fixed number of workers
+
+    `handler(item)` is a coroutine returning None to finish the item, or a
+    (stage_name, item) tuple to pass it on.
+    """
+
+    def __init__(self, name, handler, workers=1, capacity=100):
+        self.name = name
+        self.handler = handler
+        self.workers = workers
+        self.queue = LaneQueue(capacity)
+        self.processed = 0
+        self.errors = 0
+
+
+class Pipeline:
+    """Staged message pipeline connected by bounded priority queues"""
+
+    def __init__(self, stages):
+        self.stages = {stage.name: stage for stage in stages}
+        self.entry = stages[0].name
+        self._tasks = []
+
+    async def start(self):
+        """Start the workers of every stage"""
+        if self._tasks:
+            return
+        for stage in self.stages.values():
+            for index in range(stage.workers):
+                self._tasks.append(asyncio.create_task(
+                    self._work(stage), name=f"pipeline-{stage.name}-{index}"
+                ))
+
+    async def stop(self):
+        """Cancel all workers (queued items are discarded)"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, item, priority=False):
+        """Feed an item into the first stage"""
+        await self.stages[self.entry].queue.put((item, priority, time.perf_counter()), priority)
+
+    def get_stats(self):
+        """Get queue depths and counters for each stage"""
+        stats = {}
+        for name, stage in self.stages.items():
+            priority_depth, normal_depth = stage.queue.depths()
+            stats[f"{name}_priority_depth"] = priority_depth
+            stats[f"{name}_normal_depth"] = normal_depth
+            stats[f"{name}_workers"] = stage.workers
+            stats[f"{name}_processed"] = stage.processed
+            stats[f"{name}_errors"] = stage.errors
+        return stats
+
+    async def _work(self, stage):
+        """Worker loop for one stage"""
+        while True:
+            item, priority, queued_at = await stage.queue.get()
+            metrics.observe(f"stage_{stage.name}_wait", time.perf_counter() - queued_at)
+            try:
+                result = await stage.handler(item)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                stage.errors += 1
+                logger.exception(f"❌ Pipeline stage {stage.name} failed: {str(e)}")
+                continue
+            stage.processed += 1
+
+            if result is not None:
+                next_stage, item = result
+                # Items keep their lane unless the handler re-prioritizes them
+                priority = getattr(item, "priority", priority)
+                await self.stages[next_stage].queue.put((item, priority, time.perf_counter()), priority)
+
+
+class Turn:
+    """One item's place in a KeyedSequencer: wait() for the items before it, then release()"""
+
+    __slots__ = ("key", "_previous", "_done", "_tails")
+
+    def __init__(self, key, previous, tails):
+        self.key = key
+        self._previous = previous
+        self._done = asyncio.get_running_loop().create_future()
+        self._tails = tails
+
+    async def wait(self):
+        """Wait until every earlier turn with the same key is released"""
+        if self._previous is not None:
+            # Shielded so a cancelled waiter never cancels the turn it waits on
+            await asyncio.shield(self._previous)
+
+    def release(self):
+        """Let the next turn with the same key run"""
+        if not self._done.done():
+            self._done.set_result(None)
+        if self._tails.get(self.key) is self._done:
+            del self._tails[self.key]
+
+
+class KeyedSequencer:
+    """Run items sharing a key one at a time, in the order their turns were taken
+
+    Turns are taken where items are still in order (e.g. a single-worker
+    stage) and awaited by a later stage with several workers, so items with
+    the same key never overlap there while other keys run concurrently.
+    """
+
+    def __init__(self):
+        self._tails = {}
+
+    def __len__(self):
+        return len(self._tails)
+
+    def reserve(self, key) -> Turn:
+        """Take the next turn for `key`"""
+        turn = Turn(key, self._tails.get(key), self._tails)
+        self._tails[key] = turn._done
+        return turn
+
+    def pending(self, key) -> bool:
+        """Whether a turn for `key` has been taken and not yet released"""
+        return key in self._tails
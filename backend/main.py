@@ -1,6 +1,12 @@
-from fastapi import FastAPI
+import asyncio
+from typing import List
+from fastapi import FastAPI, Query, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from mt5_control import get_open_orders, cancel_order
+import mt5_control
+from mt5_control import (cancel_order, cancel_orders, get_open_orders, get_order_book,
+                         wait_for_orders)
+from metrics import MetricsRegistry, add_metrics_endpoint
+from response_cache import ResponseCache
 
 app = FastAPI()
 
@@ -11,10 +17,76 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Serialized responses, keyed to the order book version
+cache = ResponseCache()
+
+# Request latency histograms and order book stats on GET /metrics
+registry = MetricsRegistry(prefix="orders_api")
+registry.register_stats("response_cache", cache.get_stats)
+registry.register_stats("order_book", mt5_control.order_book.get_stats)
+registry.register_stats("order_book_poller", mt5_control.order_book_poller.get_stats)
+registry.register_stats("cancel_batcher", mt5_control.cancel_batcher.get_stats)
+add_metrics_endpoint(app, registry)
+
+@app.on_event("startup")
+async def start_order_book():
+    await mt5_control.start()
+
+@app.on_event("shutdown")
+async def stop_order_book():
+    await mt5_control.stop()
+
 @app.get("/orders")
-def fetch_orders():
-    return get_open_orders()
+async def fetch_orders(request: Request):
+    return cache.respond(request, get_open_orders, mt5_control.order_book.version)
+
+@app.get("/orders/book")
+async def fetch_order_book(
+    request: Request,
+    version: int = -1,
+    timeout: float = Query(0, ge=0, le=60)
+):
+    """Get the order book; pass the last `version` and a `timeout` to long-poll for changes"""
+    if timeout and version >= 0:
+        book = await wait_for_orders(version, timeout)
+    else:
+        book = get_order_book()
+    return cache.respond(request, lambda: book, book["version"])
+
+@app.websocket("/orders/stream")
+async def stream_orders(websocket: WebSocket):
+    """Push the order book on connect and after every change"""
+    await websocket.accept()
+    subscriber = mt5_control.subscribe_orders()
+    # Also wait on the client, so a disconnect is noticed without a book change
+    receiver = asyncio.create_task(websocket.receive())
+    change = None
+    try:
+        await websocket.send_json(get_order_book())
+        while True:
+            change = asyncio.create_task(subscriber.get())
+            done, _ = await asyncio.wait({change, receiver}, return_when=asyncio.FIRST_COMPLETED)
+            if receiver in done:
+                if receiver.result()["type"] == "websocket.disconnect":
+                    break
+                # Nothing is expected from the client; keep listening
+                receiver = asyncio.create_task(websocket.receive())
+            if change in done:
+                await websocket.send_json(change.result())
+            else:
+                change.cancel()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        for task in (change, receiver):
+            if task is not None and not task.done():
+                task.cancel()
+        mt5_control.unsubscribe_orders(subscriber)
 
 @app.post("/cancel/{ticket}")
-def cancel_order_by_ticket(ticket: int):
-    return cancel_order(ticket)
+async def cancel_order_by_ticket(ticket: int):
+    return await cancel_order(ticket)
+
+@app.post("/cancel")
+async def cancel_orders_by_ticket(tickets: List[int]):
+    return await cancel_orders(tickets)
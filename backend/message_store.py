@@ -0,0 +1,178 @@
+import json
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    channel TEXT NOT NULL,
+    sender TEXT NOT NULL,
+    text TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    is_signal INTEGER NOT NULL DEFAULT 0,
+    signal TEXT,
+    instrument TEXT,
+    follow_up TEXT
+);
+CREATE TABLE IF NOT EXISTS bus_offsets (
+    bus_id TEXT PRIMARY KEY,
+    seq INTEGER NOT NULL
+);
+"""
+
+# Created after migrations, since older databases lack the instrument column
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_messages_channel ON messages (channel, id);
+CREATE INDEX IF NOT EXISTS idx_messages_timestamp ON messages (timestamp);
+CREATE INDEX IF NOT EXISTS idx_messages_is_signal ON messages (is_signal, id);
+CREATE INDEX IF NOT EXISTS idx_messages_instrument ON messages (instrument, id);
+"""
+
+INSERT_SQL = """
+INSERT INTO messages (channel, sender, text, timestamp, is_signal, signal, instrument, follow_up)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Upper bound on rows returned by a single query
+MAX_PAGE_SIZE = 1000
+
+
+class MessageStore:
+    """Append-only SQLite store for channel messages and parsed signals"""
+
+    def __init__(self, path="messages.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        # WAL lets readers run while the bot is appending
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+        self._conn.executescript(INDEXES)
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
+    def append(self, message: Dict) -> int:
+        """Store one message and return its id"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(INSERT_SQL, self._to_row(message))
+            return cursor.lastrowid
+
+    def append_many(self, messages: Iterable[Dict],
+                    bus_offset: Optional[Tuple[str, int]] = None) -> int:
+        """Store several messages in one transaction and return how many were added
+
+        `bus_offset` is the (bus_id, seq) of a signal bus batch. It is saved
+        in the same transaction, and a batch at or before the saved seq is
+        skipped, so a redelivered batch is never stored twice.
+        """
+        rows = [self._to_row(message) for message in messages]
+        with self._lock, self._conn:
+            if bus_offset is not None:
+                bus_id, seq = bus_offset
+                row = self._conn.execute("SELECT seq FROM bus_offsets WHERE bus_id = ?", (bus_id,)).fetchone()
+                if row is not None and row[0] >= seq:
+                    return 0
+                self._conn.execute("INSERT OR REPLACE INTO bus_offsets VALUES (?, ?)", (bus_id, seq))
+            self._conn.executemany(INSERT_SQL, rows)
+        return len(rows)
+
+    def get_bus_offset(self, bus_id: str) -> Optional[int]:
+        """Get the last signal bus seq stored for `bus_id`, or None"""
+        with self._lock:
+            row = self._conn.execute("SELECT seq FROM bus_offsets WHERE bus_id = ?", (bus_id,)).fetchone()
+        return row[0] if row else None
+
+    def query(self, cursor: Optional[int] = None, since: Optional[str] = None,
+              channels: Optional[Sequence[str]] = None, signals_only: bool = False,
+              instruments: Optional[Sequence[str]] = None,
+              limit: int = 100) -> Tuple[List[Dict], Optional[int]]:
+        """Get messages after `cursor` in insertion order
+
+        `channels` and `instruments` match any of the given values; filtering
+        by instrument only returns signals. Returns the page and the cursor
+        to pass for the next page, which is unchanged when there are no new rows.
+        """
+        clauses = []
+        params = []
+        if cursor is not None:
+            clauses.append("id > ?")
+            params.append(cursor)
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if channels:
+            clauses.append(f"channel IN ({', '.join('?' * len(channels))})")
+            params.extend(channels)
+        if signals_only:
+            clauses.append("is_signal = 1")
+        if instruments:
+            clauses.append(f"instrument IN ({', '.join('?' * len(instruments))})")
+            params.extend(instruments)
+
+        sql = "SELECT * FROM messages"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY id LIMIT ?"
+        params.append(max(1, min(limit, MAX_PAGE_SIZE)))
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+
+        messages = [self._from_row(row) for row in rows]
+        next_cursor = messages[-1]["id"] if messages else cursor
+        return messages, next_cursor
+
+    def count(self) -> int:
+        """Get the number of stored messages"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+
+    def _migrate(self):
+        """Add the instrument and follow_up columns to databases created before they existed"""
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(messages)")}
+        with self._conn:
+            if "instrument" not in columns:
+                self._conn.execute("ALTER TABLE messages ADD COLUMN instrument TEXT")
+                self._conn.execute(
+                    "UPDATE messages SET instrument = json_extract(signal, '$.instrument') "
+                    "WHERE signal IS NOT NULL"
+                )
+            if "follow_up" not in columns:
+                self._conn.execute("ALTER TABLE messages ADD COLUMN follow_up TEXT")
+
+    @staticmethod
+    def _to_row(message):
+        """Convert a message dict to an INSERT parameter tuple"""
+        signal = message.get("trading_signal")
+        follow_up = message.get("follow_up")
+        return (
+            message["channel"],
+            message["sender"],
+            message["text"],
+            message["timestamp"],
+            1 if message.get("is_trading_signal") else 0,
+            json.dumps(signal) if signal is not None else None,
+            signal.get("instrument") if signal is not None else None,
+            json.dumps(follow_up) if follow_up else None
+        )
+
+    @staticmethod
+    def _from_row(row):
+        """Convert a database row to a message dict"""
+        return {
+            "id": row["id"],
+            "channel": row["channel"],
+            "sender": row["sender"],
+            "text": row["text"],
+            "timestamp": row["timestamp"],
+            "is_trading_signal": bool(row["is_signal"]),
+            "trading_signal": json.loads(row["signal"]) if row["signal"] else None,
+            "follow_up": json.loads(row["follow_up"]) if row["follow_up"] else None
+        }
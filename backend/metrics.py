@@ -0,0 +1,220 @@
+import atexit
+import bisect
+import logging
+import logging.handlers
+import queue
+import socket
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds, from sub-millisecond parsing to slow broker calls
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Cumulative latency histogram in the Prometheus style"""
+
+    def __init__(self, name, help_text="", buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        """Record one observation (seconds)"""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self):
+        """Get (cumulative bucket counts, sum, count)"""
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+        cumulative = []
+        running = 0
+        for value in counts:
+            running += value
+            cumulative.append(running)
+        return cumulative, total, count
+
+
+class Span:
+    """Context manager that records its duration into a histogram"""
+
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+
+class MetricsRegistry:
+    """Histograms, counters and gauges rendered in Prometheus text format"""
+
+    def __init__(self, prefix="telegram_bot"):
+        self.prefix = prefix
+        self._histograms = {}
+        self._counters = {}
+        self._gauges = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name, help_text=""):
+        """Get or create a histogram"""
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(name, Histogram(name, help_text))
+        return histogram
+
+    def span(self, name):
+        """Time a block of code into the `name` histogram"""
+        return Span(self.histogram(name))
+
+    def observe(self, name, seconds):
+        """Record a duration measured elsewhere"""
+        self.histogram(name).observe(seconds)
+
+    def inc(self, name, amount=1):
+        """Increment a counter"""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def gauge(self, name, func):
+        """Register a callable sampled at render time"""
+        self._gauges[name] = func
+
+    def register_stats(self, name, get_stats):
+        """Export every numeric value of a get_stats() dict as a gauge"""
+        self._stats[name] = get_stats
+
+    def render(self):
+        """Render all metrics in the Prometheus text exposition format"""
+        lines = []
+        for name, histogram in sorted(self._histograms.items()):
+            metric = f"{self.prefix}_{name}_seconds"
+            cumulative, total, count = histogram.snapshot()
+            if histogram.help_text:
+                lines.append(f"# HELP {metric} {histogram.help_text}")
+            lines.append(f"# TYPE {metric} histogram")
+            for bound, value in zip(histogram.buckets, cumulative):
+                lines.append(f'{metric}_bucket{{le="{bound}"}} {value}')
+            lines.append(f'{metric}_bucket{{le="+Inf"}} {cumulative[-1]}')
+            lines.append(f"{metric}_sum {total}")
+            lines.append(f"{metric}_count {count}")
+
+        for name, value in sorted(self._counters.items()):
+            metric = f"{self.prefix}_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+
+        gauges = []
+        for name, func in self._gauges.items():
+            gauges.append((name, func()))
+        for name, get_stats in self._stats.items():
+            for key, value in get_stats().items():
+                if isinstance(value, (int, float)):
+                    gauges.append((f"{name}_{key}", value))
+        for name, value in sorted(gauges):
+            metric = f"{self.prefix}_{name}"
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {float(value)}")
+
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry
+metrics = MetricsRegistry()
+
+
+def add_metrics_endpoint(app, registry=metrics):
+    """Add request timing and a GET /metrics endpoint to a FastAPI app"""
+    from fastapi.responses import PlainTextResponse
+
+    @app.middleware("http")
+    async def time_request(request, call_next):
+        start = time.perf_counter()
+        response = await call_next(request)
+        # Label by endpoint function to keep path parameters out of metric names
+        endpoint = request.scope.get("endpoint")
+        name = getattr(endpoint, "__name__", "unmatched")
+        registry.observe(f"http_{name}", time.perf_counter() - start)
+        return response
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    async def get_metrics():
+        return registry.render()
+
+    return app
+
+
+async def serve_app(app, host="0.0.0.0", port=8766):
+    """Serve a FastAPI app inside an already running event loop
+
+    A port that cannot be bound is logged and the app is not served; the
+    host process keeps running (uvicorn itself would sys.exit()).
+    """
+    import uvicorn
+
+    class EmbeddedServer(uvicorn.Server):
+        # Leave Ctrl+C handling to the host process
+        def install_signal_handlers(self):
+            pass
+
+    # Embedded apps have no startup/shutdown hooks, and the lifespan task would
+    # only log a CancelledError when the host loop stops
+    config = uvicorn.Config(app, host=host, port=port, log_level="warning", lifespan="off")
+    try:
+        sock = socket.create_server((host, port), reuse_port=False)
+    except OSError as e:
+        logger.warning(f"⚠️ Cannot serve HTTP on {host}:{port}: {str(e)}")
+        return
+    try:
+        await EmbeddedServer(config).serve(sockets=[sock])
+    except (OSError, SystemExit) as e:
+        logger.warning(f"⚠️ HTTP server on {host}:{port} stopped: {e!r}")
+    finally:
+        sock.close()
+
+
+def setup_queue_logging(level=logging.INFO):
+    """Route logging through a queue so callers never block on console writes
+
+    Existing root handlers (or a plain stream handler) move behind a
+    QueueListener thread; the root logger only gets a QueueHandler.
+    """
+    root = logging.getLogger()
+    if any(isinstance(handler, logging.handlers.QueueHandler) for handler in root.handlers):
+        return None
+
+    handlers = root.handlers[:] or [logging.StreamHandler()]
+    for handler in handlers:
+        if handler.formatter is None:
+            handler.setFormatter(logging.Formatter('%(message)s'))
+        root.removeHandler(handler)
+
+    log_queue = queue.SimpleQueue()
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(level)
+
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
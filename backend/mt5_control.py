@@ -1,46 +1,113 @@
-from typing import Dict, List, Optional
-from datetime import datetime
-
-# Mock data for demonstration
-MOCK_ORDERS = [
-    {
-        "ticket": 12345,
-        "symbol": "EURUSD",
-        "type": "BUY",
-        "volume": 0.1,
-        "price": 1.0850,
-        "time": datetime.now().isoformat()
-    },
-    {
-        "ticket": 12346,
-        "symbol": "GBPUSD",
-        "type": "SELL",
-        "volume": 0.2,
-        "price": 1.2450,
-        "time": datetime.now().isoformat()
-    }
-]
+import logging
+import os
+from typing import Dict, List
+
+from dotenv import load_dotenv
+
+from mt5_supervisor import MT5Supervisor
+from order_book import CancelBatcher, OrderBook, OrderBookPoller
+from order_executor import OrderExecutor
+from trading_platform import TradingPlatform
+
+logger = logging.getLogger(__name__)
+
+# Load environment variables
+load_dotenv()
+
+# Seconds between order book polls
+ORDER_BOOK_POLL_INTERVAL = float(os.getenv('ORDER_BOOK_POLL_INTERVAL', '1.0'))
+
+# Set BROKER_BACKEND=sim to run against the simulated terminal
+trading_platform = TradingPlatform(
+    login=os.getenv('MT5_LOGIN'),
+    password=os.getenv('MT5_PASSWORD'),
+    server=os.getenv('MT5_SERVER')
+)
+
+# Every terminal call runs on one worker thread
+order_executor = OrderExecutor(trading_platform)
+mt5_supervisor = MT5Supervisor(trading_platform, order_executor)
+
+# Positions and pending orders, refreshed in the background
+order_book = OrderBook()
+order_book_poller = OrderBookPoller(order_book, order_executor, trading_platform, ORDER_BOOK_POLL_INTERVAL)
+cancel_batcher = CancelBatcher(order_executor, trading_platform, order_book_poller)
+
+
+async def start():
+    """Connect to MT5 and start polling the order book"""
+    order_executor.start()
+    if not await order_executor.run(trading_platform.connect):
+        logger.warning("⚠️ The MT5 supervisor will keep retrying in the background")
+    mt5_supervisor.start()
+    order_book_poller.start()
+
+
+async def stop():
+    """Stop polling and disconnect from MT5"""
+    await order_book_poller.stop()
+    mt5_supervisor.stop()
+    await order_executor.run(trading_platform.disconnect)
+    order_executor.stop()
+
 
 def get_open_orders() -> List[Dict]:
     """
-    Get all open orders
+    Get all open positions and pending orders
     Returns:
-        List[Dict]: List of open orders
+        List[Dict]: Orders from the last poll of the terminal
     """
-    # In a real implementation, this would connect to your trading platform
-    return MOCK_ORDERS
+    return order_book.orders
+
 
-def cancel_order(ticket: int) -> Dict:
+def get_order_book() -> Dict:
     """
-    Cancel an order by ticket number
+    Get the order book with its version
+    Returns:
+        Dict: {"version", "updated_at", "orders"}
+    """
+    return order_book.snapshot()
+
+
+async def wait_for_orders(version: int, timeout: float) -> Dict:
+    """
+    Long-poll the order book
+    Args:
+        version (int): Version the client already has
+        timeout (float): Seconds to wait for a newer version
+    Returns:
+        Dict: The newer book, or the current one after the timeout
+    """
+    return await order_book.wait_for_change(version, timeout)
+
+
+async def cancel_order(ticket: int) -> Dict:
+    """
+    Cancel a pending order, or close a position, by ticket number
     Args:
         ticket (int): Order ticket number
     Returns:
         Dict: Result of the cancellation
     """
-    # In a real implementation, this would connect to your trading platform
-    return {
-        "success": True,
-        "message": f"Order {ticket} cancelled successfully",
-        "ticket": ticket
-    }
+    return await cancel_batcher.cancel(ticket)
+
+
+async def cancel_orders(tickets: List[int]) -> List[Dict]:
+    """
+    Cancel several orders in one batch
+    Args:
+        tickets (List[int]): Order ticket numbers
+    Returns:
+        List[Dict]: Result of each cancellation
+    """
+    return await cancel_batcher.cancel_many(tickets)
+
+
+def subscribe_orders():
+    """Get a queue that receives the order book after every change"""
+    return order_book.subscribe()
+
+
+def unsubscribe_orders(subscriber) -> None:
+    """Stop receiving order book changes"""
+    order_book.unsubscribe(subscriber)
@@ -0,0 +1,233 @@
+import asyncio
+import itertools
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from trading_platform import TradingPlatform
+
+logger = logging.getLogger(__name__)
+
+
+def reconnect(trading_platform, max_attempts=10, initial_backoff=1.0, max_backoff=60.0,
+              sleep=time.sleep):
+    """Reconnect to MT5 with exponential backoff, returning True on success"""
+    backoff = initial_backoff
+    for attempt in range(1, max_attempts + 1):
+        logger.info(f"🔄 Reconnecting to MT5 (attempt {attempt}/{max_attempts})...")
+        trading_platform.disconnect()
+        if trading_platform.connect():
+            return True
+        if attempt < max_attempts:
+            sleep(backoff)
+            backoff = min(backoff * 2, max_backoff)
+    logger.error(f"❌ Could not reconnect to MT5 after {max_attempts} attempts")
+    return False
+
+
+class MT5Supervisor:
+    """Health-check an MT5 session and reconnect it when it drops
+
+    Checks run as jobs on the OrderExecutor's worker thread, because MT5 is
+    not thread-safe. While a reconnect is in progress the worker is busy, so
+    orders submitted meanwhile wait in the executor's bounded queue and are
+    sent once the session is back.
+    """
+
+    def __init__(self, trading_platform, executor, check_interval=10, max_attempts=10,
+                 initial_backoff=1.0, max_backoff=60.0):
+        self.trading_platform = trading_platform
+        self.executor = executor
+        self.check_interval = check_interval
+        self.max_attempts = max_attempts
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._pending_check = None
+
+        # Counters
+        self.checks = 0
+        self.failed_checks = 0
+        self.reconnects = 0
+
+    def start(self):
+        """Start the health-check loop"""
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="mt5-supervisor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the health-check loop"""
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+
+    def check(self):
+        """Check the session and reconnect if needed (runs on the MT5 worker thread)"""
+        self.checks += 1
+        if self.trading_platform.connected and self.trading_platform.is_healthy():
+            return True
+
+        self.failed_checks += 1
+        logger.warning("⚠️ MT5 session lost, reconnecting...")
+        # Shut the dead session down before initializing a new one
+        self.trading_platform.disconnect()
+        if reconnect(self.trading_platform, self.max_attempts,
+                     self.initial_backoff, self.max_backoff, sleep=self._stop_event.wait):
+            self.reconnects += 1
+            return True
+        return False
+
+    def get_stats(self):
+        """Get health-check and reconnect counters"""
+        return {
+            "connected": self.trading_platform.connected,
+            "checks": self.checks,
+            "failed_checks": self.failed_checks,
+            "reconnects": self.reconnects
+        }
+
+    def _run(self):
+        """Schedule a check every `check_interval` seconds"""
+        while not self._stop_event.wait(self.check_interval):
+            # Never stack checks behind a slow one
+            if self._pending_check is not None and not self._pending_check.done():
+                continue
+            try:
+                self._pending_check = self.executor.submit(self.check)
+            except queue.Full:
+                logger.warning("Order queue full, skipping MT5 health check")
+
+
+def _account_worker(name, config, requests, results, check_interval, max_attempts,
+                    initial_backoff, max_backoff):
+    """Worker process owning one MT5 terminal/account"""
+    trading_platform = TradingPlatform(**config)
+    if not trading_platform.connect():
+        reconnect(trading_platform, max_attempts, initial_backoff, max_backoff)
+
+    while True:
+        try:
+            job = requests.get(timeout=check_interval)
+        except queue.Empty:
+            # Idle: use the time for a health check
+            if not (trading_platform.connected and trading_platform.is_healthy()):
+                logger.warning(f"⚠️ MT5 session for {name} lost, reconnecting...")
+                trading_platform.disconnect()
+                reconnect(trading_platform, max_attempts, initial_backoff, max_backoff)
+            continue
+
+        if job is None:
+            break
+
+        job_id, method, args = job
+        if not trading_platform.connected:
+            reconnect(trading_platform, max_attempts, initial_backoff, max_backoff)
+        try:
+            results.put((job_id, True, getattr(trading_platform, method)(*args)))
+        except Exception as e:
+            results.put((job_id, False, e))
+
+    trading_platform.disconnect()
+
+
+class AccountWorkerPool:
+    """Run several MT5 accounts/terminals, each in its own worker process
+
+    `accounts` maps an account name to TradingPlatform keyword arguments
+    (login, password, server, path, symbols). A slow terminal only delays
+    its own process, so accounts never throttle each other.
+    """
+
+    def __init__(self, accounts, check_interval=10, max_attempts=10,
+                 initial_backoff=1.0, max_backoff=60.0):
+        self.accounts = dict(accounts)
+        self.check_interval = check_interval
+        self.max_attempts = max_attempts
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self._processes = {}
+        self._requests = {}
+        self._results = None
+        self._futures = {}
+        self._job_ids = itertools.count()
+        self._lock = threading.Lock()
+        self._reader = None
+
+    def start(self):
+        """Start one worker process per account"""
+        if self._processes:
+            return
+        self._results = multiprocessing.Queue()
+        for name, config in self.accounts.items():
+            requests = multiprocessing.Queue()
+            process = multiprocessing.Process(
+                target=_account_worker,
+                args=(name, config, requests, self._results, self.check_interval,
+                      self.max_attempts, self.initial_backoff, self.max_backoff),
+                name=f"mt5-account-{name}",
+                daemon=True
+            )
+            process.start()
+            self._requests[name] = requests
+            self._processes[name] = process
+        self._reader = threading.Thread(target=self._read_results, name="mt5-account-results", daemon=True)
+        self._reader.start()
+
+    def stop(self, timeout=10):
+        """Stop every worker process"""
+        for requests in self._requests.values():
+            requests.put(None)
+        for process in self._processes.values():
+            process.join(timeout)
+        if self._results is not None:
+            self._results.put(None)
+            self._reader.join(timeout)
+        self._processes.clear()
+        self._requests.clear()
+
+    def submit(self, account, method, *args) -> Future:
+        """Call a TradingPlatform method in an account's worker process"""
+        future = Future()
+        job_id = next(self._job_ids)
+        with self._lock:
+            self._futures[job_id] = future
+        self._requests[account].put((job_id, method, args))
+        return future
+
+    async def run(self, account, method, *args):
+        """Call a TradingPlatform method on an account and await the result"""
+        return await asyncio.wrap_future(self.submit(account, method, *args))
+
+    async def place_signal_orders(self, signal, accounts=None):
+        """Place a signal's TP ladder on several accounts in parallel"""
+        accounts = list(accounts or self.accounts)
+        reports = await asyncio.gather(
+            *(self.run(account, "place_signal_orders", signal) for account in accounts),
+            return_exceptions=True
+        )
+        return dict(zip(accounts, reports))
+
+    def _read_results(self):
+        """Resolve futures as worker processes report results"""
+        while True:
+            item = self._results.get()
+            if item is None:
+                break
+            job_id, ok, value = item
+            with self._lock:
+                future = self._futures.pop(job_id, None)
+            if future is None:
+                continue
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
@@ -0,0 +1,240 @@
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class OrderBook:
+    """In-memory view of open positions and pending orders
+
+    Updated by a poller; readers get a prebuilt snapshot, so serving the book
+    never touches the terminal. Every change bumps `version` and wakes
+    long-pollers and stream subscribers.
+    """
+
+    def __init__(self):
+        self.version = 0
+        self.updated_at = None
+        # None until the first poll, so even an empty book gets version 1
+        self._entries = None
+        self._orders = []
+        self._snapshot = {"version": 0, "updated_at": None, "orders": []}
+        # Created by the first waiter: before Python 3.10 an Event binds to the
+        # loop current at creation, and the book is built at import
+        self._changed = None
+        self._subscribers = set()
+
+    @property
+    def orders(self):
+        """Current positions and orders, as a list"""
+        return self._orders
+
+    def snapshot(self):
+        """Current book with its version"""
+        return self._snapshot
+
+    def update(self, orders):
+        """Replace the book with a fresh poll, returning True if anything changed"""
+        self.updated_at = time.time()
+        entries = {order["ticket"]: order for order in orders}
+        if entries == self._entries:
+            return False
+
+        self._entries = entries
+        self._orders = list(orders)
+        self.version += 1
+        self._snapshot = {"version": self.version, "updated_at": self.updated_at, "orders": self._orders}
+
+        # Wake everyone waiting on this version; the next waiter arms a new event
+        if self._changed is not None:
+            self._changed.set()
+            self._changed = None
+        for subscriber in list(self._subscribers):
+            # Subscribers only need the latest book, so replace what they have not read
+            if subscriber.full():
+                subscriber.get_nowait()
+            subscriber.put_nowait(self._snapshot)
+        return True
+
+    async def wait_for_change(self, version, timeout):
+        """Return the snapshot once the book is newer than `version`, or after `timeout`"""
+        if self.version == version:
+            if self._changed is None:
+                self._changed = asyncio.Event()
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self._snapshot
+
+    def subscribe(self):
+        """Get a queue that receives the snapshot after every change"""
+        subscriber = asyncio.Queue(maxsize=1)
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        """Stop pushing changes to a queue"""
+        self._subscribers.discard(subscriber)
+
+    def get_stats(self):
+        """Get the book size, version and age"""
+        return {
+            "orders": len(self._orders),
+            "version": self.version,
+            "subscribers": len(self._subscribers),
+            "age_seconds": time.time() - self.updated_at if self.updated_at else -1
+        }
+
+
+class OrderBookPoller:
+    """Refresh an OrderBook from the terminal on the MT5 worker thread
+
+    Polls every `interval` seconds, or right away after `poke()` (e.g. when
+    a cancel batch has just changed the book).
+    """
+
+    def __init__(self, book, executor, trading_platform, interval=1.0):
+        self.book = book
+        self.executor = executor
+        self.trading_platform = trading_platform
+        self.interval = interval
+        # Created by start(), inside the running loop
+        self._wake = None
+        self._task = None
+
+        # Counters
+        self.polls = 0
+        self.failed_polls = 0
+
+    def start(self):
+        """Start the polling task"""
+        if self._task is None:
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the polling task"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def poke(self):
+        """Poll again without waiting for the interval"""
+        if self._wake is not None:
+            self._wake.set()
+
+    async def poll(self):
+        """Fetch the book once, returning True if it changed"""
+        self.polls += 1
+        try:
+            orders = await self.executor.run(self.trading_platform.get_order_book)
+        except Exception as e:
+            orders = None
+            logger.warning(f"Order book poll failed: {str(e)}")
+        if orders is None:
+            self.failed_polls += 1
+            return False
+        return self.book.update(orders)
+
+    def get_stats(self):
+        """Get poll counters"""
+        return {
+            "polls": self.polls,
+            "failed_polls": self.failed_polls
+        }
+
+    async def _run(self):
+        """Polling loop"""
+        while True:
+            await self.poll()
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+
+class CancelBatcher:
+    """Coalesce cancel requests into batched calls on the MT5 worker thread
+
+    Requests arriving within `window` seconds of each other (up to
+    `max_batch`) share one TradingPlatform.cancel_orders call.
+    """
+
+    def __init__(self, executor, trading_platform, poller=None, window=0.02, max_batch=50):
+        self.executor = executor
+        self.trading_platform = trading_platform
+        self.poller = poller
+        self.window = window
+        self.max_batch = max_batch
+        self._pending = []
+        self._flush_task = None
+
+        # Counters
+        self.batches = 0
+        self.cancels = 0
+
+    async def cancel(self, ticket):
+        """Cancel one ticket as part of the next batch"""
+        return (await self.cancel_many([ticket]))[0]
+
+    async def cancel_many(self, tickets):
+        """Cancel several tickets as part of the next batch"""
+        loop = asyncio.get_running_loop()
+        futures = []
+        for ticket in tickets:
+            future = loop.create_future()
+            self._pending.append((ticket, future))
+            futures.append(future)
+
+        if len(self._pending) >= self.max_batch:
+            self._flush_now()
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+        return await asyncio.gather(*futures)
+
+    def get_stats(self):
+        """Get batch counters"""
+        return {
+            "batches": self.batches,
+            "cancels": self.cancels,
+            "avg_batch_size": self.cancels / self.batches if self.batches else 0.0
+        }
+
+    async def _flush_later(self):
+        """Wait for more requests, then send the batch"""
+        await asyncio.sleep(self.window)
+        self._flush_task = None
+        await self._send(self._take())
+
+    def _flush_now(self):
+        """Send the pending batch immediately"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        asyncio.create_task(self._send(self._take()))
+
+    def _take(self):
+        """Remove and return the pending requests"""
+        batch, self._pending = self._pending, []
+        return batch
+
+    async def _send(self, batch):
+        """Run one cancel_orders call and resolve each request's future"""
+        if not batch:
+            return
+        self.batches += 1
+        self.cancels += len(batch)
+        tickets = [ticket for ticket, _ in batch]
+        try:
+            results = await self.executor.run(self.trading_platform.cancel_orders, tickets)
+        except Exception as e:
+            results = [{"ticket": ticket, "success": False, "message": str(e)} for ticket in tickets]
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+        if self.poller is not None:
+            self.poller.poke()
@@ -0,0 +1,149 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Sentinel that tells the worker thread to exit
+_STOP = object()
+
+
+class OrderExecutor:
+    """Run TradingPlatform calls on a dedicated worker thread
+
+    MT5 is not thread-safe, so every broker call goes through one thread that
+    drains a bounded queue. Callers get futures back and the asyncio loop is
+    never blocked by a broker round-trip.
+
+    Only calls submitted with `order=True` (order placement) count towards
+    the order latency histograms and statistics; health checks, polls and
+    refreshes share the thread but not the numbers.
+    """
+
+    def __init__(self, trading_platform, max_queue_size=100):
+        self.trading_platform = trading_platform
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._thread = None
+        self._lock = threading.Lock()
+
+        # Order latency statistics, updated by the worker thread only
+        self.orders_processed = 0
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+        self.total_latency = 0.0
+
+    def start(self):
+        """Start the worker thread"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="mt5-order-worker", daemon=True
+                )
+                self._thread.start()
+
+    def stop(self, timeout=None):
+        """Stop the worker thread after draining queued calls"""
+        with self._lock:
+            if self._thread is None:
+                return
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def submit(self, func, *args, order=False, **kwargs) -> Future:
+        """Queue `func(*args, **kwargs)` for the worker thread
+
+        `order` marks an order placement, recorded in the latency metrics.
+        Raises queue.Full if the order queue is at capacity.
+        """
+        self.start()
+        future = Future()
+        self._queue.put_nowait((future, func, args, kwargs, time.perf_counter(), order))
+        return future
+
+    def submit_order(self, signal) -> Future:
+        """Queue TradingPlatform.place_order for a signal"""
+        return self.submit(self.trading_platform.place_order, signal, order=True)
+
+    async def run(self, func, *args, order=False, **kwargs):
+        """Run `func` on the worker thread and await its result"""
+        return await asyncio.wrap_future(self.submit(func, *args, order=order, **kwargs))
+
+    async def place_order(self, signal):
+        """Place an order without blocking the event loop"""
+        try:
+            future = self.submit_order(signal)
+        except queue.Full:
+            logger.warning(f"❌ Order queue full ({self.queue_depth} pending), dropping signal")
+            return False
+        return await asyncio.wrap_future(future)
+
+    async def place_signal_orders(self, signal, total_volume=None):
+        """Place the full TP ladder for a signal as one batch on the worker thread"""
+        try:
+            future = self.submit(self.trading_platform.place_signal_orders, signal, total_volume, order=True)
+        except queue.Full:
+            logger.warning(f"❌ Order queue full ({self.queue_depth} pending), dropping signal")
+            return {"success": False, "legs": [], "wall_time_ms": 0.0}
+        return await asyncio.wrap_future(future)
+
+    @property
+    def queue_depth(self):
+        """Number of calls waiting for the worker thread"""
+        return self._queue.qsize()
+
+    def get_stats(self):
+        """Get queue depth and per-order latency statistics"""
+        processed = self.orders_processed
+        return {
+            "queue_depth": self.queue_depth,
+            "orders_processed": processed,
+            "last_latency_ms": self.last_latency * 1000,
+            "avg_latency_ms": (self.total_latency / processed * 1000) if processed else 0.0,
+            "max_latency_ms": self.max_latency * 1000
+        }
+
+    def _run(self):
+        """Worker loop: execute queued calls one at a time"""
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+
+            future, func, args, kwargs, queued_at, order = item
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            started_at = time.perf_counter()
+            error = None
+            try:
+                result = func(*args, **kwargs)
+            except BaseException as e:
+                error = e
+            finished_at = time.perf_counter()
+            if order:
+                self._record(queued_at, started_at, finished_at)
+            logger.debug(f"MT5 call {func.__name__} took {(finished_at - queued_at) * 1000:.1f} ms")
+
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def _record(self, queued_at, started_at, finished_at):
+        """Worker thread: add an order placement to the latency metrics"""
+        metrics.observe("order_submit", started_at - queued_at)
+        metrics.observe("broker_ack", finished_at - started_at)
+
+        # Latency covers queue wait plus the broker call itself
+        latency = finished_at - queued_at
+        self.orders_processed += 1
+        self.last_latency = latency
+        self.total_latency += latency
+        if latency > self.max_latency:
+            self.max_latency = latency
@@ -0,0 +1,182 @@
+import logging
+import math
+
+logger = logging.getLogger(__name__)
+
+# Share of equity risked per signal, and caps across open signals (percent)
+DEFAULT_RISK_PCT = 1.0
+DEFAULT_MAX_TOTAL_RISK_PCT = 5.0
+DEFAULT_MAX_SYMBOL_RISK_PCT = 3.0
+DEFAULT_MAX_OPEN_SIGNALS = 10
+
+
+def lot_risk(entry, sl, symbol_info):
+    """Loss in account currency of one lot moving from `entry` to `sl`"""
+    tick_size = getattr(symbol_info, 'trade_tick_size', 0) or getattr(symbol_info, 'point', 0)
+    tick_value = getattr(symbol_info, 'trade_tick_value', 0)
+    if not tick_size or not tick_value:
+        return 0.0
+    return abs(entry - sl) / tick_size * tick_value
+
+
+def floor_volume(volume, volume_step):
+    """Round a volume down to a multiple of `volume_step`"""
+    # The epsilon keeps 0.3 / 0.1 from flooring to 2 steps
+    return round(math.floor(volume / volume_step + 1e-9) * volume_step, 8)
+
+
+class ExposureBook:
+    """Risk of the signals currently open, in account currency
+
+    Running totals per symbol and overall make each limit check and each
+    open/close O(1) regardless of how many signals are open; only sync(),
+    run from the background account poll, walks the open signals.
+
+    Like OrderExecutor's counters, it is only touched from the MT5 worker
+    thread, so it needs no lock.
+    """
+
+    def __init__(self, max_total_risk_pct=DEFAULT_MAX_TOTAL_RISK_PCT,
+                 max_symbol_risk_pct=DEFAULT_MAX_SYMBOL_RISK_PCT, max_open_signals=DEFAULT_MAX_OPEN_SIGNALS):
+        self.max_total_risk_pct = max_total_risk_pct
+        self.max_symbol_risk_pct = max_symbol_risk_pct
+        self.max_open_signals = max_open_signals
+        self.total_risk = 0.0
+        self._symbol_risk = {}
+        # signal id -> (symbol, {ticket: risk})
+        self._signals = {}
+        self._next_id = 1
+
+    def headroom(self, symbol, equity):
+        """Risk a new signal on `symbol` may add without breaching a limit"""
+        if len(self._signals) >= self.max_open_signals:
+            return 0.0
+        total = equity * self.max_total_risk_pct / 100 - self.total_risk
+        per_symbol = equity * self.max_symbol_risk_pct / 100 - self._symbol_risk.get(symbol, 0.0)
+        return max(0.0, min(total, per_symbol))
+
+    def open(self, symbol, ticket_risks):
+        """Record a placed signal's legs as {ticket: risk} and return its id"""
+        signal_id = self._next_id
+        self._next_id += 1
+        self._signals[signal_id] = (symbol, dict(ticket_risks))
+        self._add(symbol, sum(ticket_risks.values()))
+        return signal_id
+
+    def close(self, signal_id):
+        """Drop a signal's remaining risk"""
+        entry = self._signals.pop(signal_id, None)
+        if entry is not None:
+            symbol, tickets = entry
+            self._add(symbol, -sum(tickets.values()))
+
+    def sync(self, open_tickets):
+        """Release the risk of legs whose tickets are no longer open"""
+        for signal_id, (symbol, tickets) in list(self._signals.items()):
+            closed = [ticket for ticket in tickets if ticket not in open_tickets]
+            if not closed:
+                continue
+            released = sum(tickets.pop(ticket) for ticket in closed)
+            if not tickets:
+                del self._signals[signal_id]
+            self._add(symbol, -released)
+
+    def get_stats(self):
+        """Get open signal count and risk totals"""
+        return {
+            "open_signals": len(self._signals),
+            "total_risk": self.total_risk,
+            "symbols": len(self._symbol_risk)
+        }
+
+    def _add(self, symbol, risk):
+        """Adjust the running totals"""
+        self.total_risk += risk
+        remaining = self._symbol_risk.get(symbol, 0.0) + risk
+        if remaining > 1e-9:
+            self._symbol_risk[symbol] = remaining
+        else:
+            self._symbol_risk.pop(symbol, None)
+        if not self._signals:
+            # Nothing open: drop accumulated float error
+            self.total_risk = 0.0
+
+
+class PositionSizer:
+    """Lot size from SL distance, tick value and a share of equity
+
+    Sizing reads the cached account state and symbol info, so it adds no
+    broker round-trips to the order path. The volume is capped so the
+    signal fits within the ExposureBook's limits.
+    """
+
+    def __init__(self, risk_pct=DEFAULT_RISK_PCT, max_total_risk_pct=DEFAULT_MAX_TOTAL_RISK_PCT,
+                 max_symbol_risk_pct=DEFAULT_MAX_SYMBOL_RISK_PCT, max_open_signals=DEFAULT_MAX_OPEN_SIGNALS):
+        self.risk_pct = risk_pct
+        self.exposure = ExposureBook(max_total_risk_pct, max_symbol_risk_pct, max_open_signals)
+
+        # Counters
+        self.sized = 0
+        self.capped = 0
+        self.rejected = 0
+
+    def size(self, signal, symbol_info, account):
+        """Total volume for a signal, as {"volume", "risk", "risk_per_lot", "reason"}
+
+        A volume of 0 means the signal should not be traded; "reason" says why.
+        """
+        sizing = {"volume": 0.0, "risk": 0.0, "risk_per_lot": 0.0, "reason": None}
+        if not account or not account.get("equity"):
+            return self._reject(sizing, "no account state")
+
+        risk_per_lot = lot_risk(signal['entry'], signal['sl'][0], symbol_info)
+        if risk_per_lot <= 0:
+            return self._reject(sizing, "cannot price the stop loss distance")
+        sizing["risk_per_lot"] = risk_per_lot
+
+        equity = account["equity"]
+        budget = equity * self.risk_pct / 100
+        headroom = self.exposure.headroom(signal['instrument'], equity)
+        if headroom < budget:
+            budget = headroom
+            self.capped += 1
+
+        volume_step = getattr(symbol_info, 'volume_step', 0) or 0.01
+        volume_min = getattr(symbol_info, 'volume_min', 0) or volume_step
+        volume_max = getattr(symbol_info, 'volume_max', 0) or float('inf')
+        volume = min(floor_volume(budget / risk_per_lot, volume_step), volume_max)
+        if volume < volume_min:
+            return self._reject(sizing, "risk budget is below the minimum volume"
+                                if headroom > 0 else "exposure limit reached")
+
+        self.sized += 1
+        sizing["volume"] = volume
+        sizing["risk"] = volume * risk_per_lot
+        return sizing
+
+    def record(self, signal, sizing, legs):
+        """Add the placed legs ({"ticket", "volume", "success"}) to the exposure book"""
+        ticket_risks = {
+            leg["ticket"]: leg["volume"] * sizing["risk_per_lot"]
+            for leg in legs if leg["success"]
+        }
+        if ticket_risks:
+            return self.exposure.open(signal['instrument'], ticket_risks)
+        return None
+
+    def get_stats(self):
+        """Get sizing counters and exposure"""
+        return {
+            "risk_pct": self.risk_pct,
+            "sized": self.sized,
+            "capped": self.capped,
+            "rejected": self.rejected,
+            **self.exposure.get_stats()
+        }
+
+    def _reject(self, sizing, reason):
+        """Mark a sizing result as not tradable"""
+        self.rejected += 1
+        sizing["reason"] = reason
+        logger.info(f"⚠️ Not sizing signal: {reason}")
+        return sizing
@@ -0,0 +1,82 @@
+import json
+import time
+from collections import OrderedDict
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps(data):
+    """Serialize to JSON bytes, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(",", ":")).encode()
+
+
+class ResponseCache:
+    """Serialized JSON responses keyed by URL, with ETag revalidation
+
+    Entries are tagged with a data version: the cache's own counter, bumped
+    by invalidate() on every write, or one supplied by the caller (e.g. the
+    order book version). A request whose If-None-Match matches the current
+    version gets a 304 without building or serializing anything.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.version = 0
+        # Keeps ETags from a previous process from matching new data
+        self.epoch = int(time.time())
+        self._entries = OrderedDict()
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def invalidate(self):
+        """Drop every cached response after a write"""
+        self.version += 1
+        self._entries.clear()
+
+    def etag(self, version=None):
+        """ETag for a data version (default: the cache's own)"""
+        return f'"{self.epoch}-{self.version if version is None else version}"'
+
+    def respond(self, request, build, version=None):
+        """Return a cached response for `request`, calling `build()` on a miss"""
+        from fastapi.responses import Response
+
+        etag = self.etag(version)
+        if etag in request.headers.get("if-none-match", ""):
+            self.not_modified += 1
+            return Response(status_code=304, headers={"ETag": etag})
+
+        key = str(request.url)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == etag:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            body = entry[1]
+        else:
+            self.misses += 1
+            body = dumps(build())
+            self._entries[key] = (etag, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        return Response(content=body, media_type="application/json",
+                        headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+    def get_stats(self):
+        """Get cache size and hit counters"""
+        return {
+            "entries": len(self._entries),
+            "version": self.version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified
+        }
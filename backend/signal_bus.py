@@ -0,0 +1,360 @@
+"""Local message bus: the bot publishes parsed messages once, consumers subscribe
+
+The publisher appends each batch to a SQLite log and streams it to
+subscribers over a Unix domain socket (TCP on localhost where Unix sockets
+are unavailable, e.g. Windows). No external broker is involved.
+
+Wire protocol, one JSON object per line:
+    server -> client  {"op": "hello", "bus_id"}                 on connect
+    client -> server  {"op": "subscribe", "name", "after"}      after: last seq processed
+    server -> client  {"op": "batch", "messages": [{"seq", "data"}, ...]}
+    client -> server  {"op": "ack", "seq"}
+
+Delivery is at-least-once: a subscriber resumes after the seq it passes in
+"after" (or, without one, after its last ack), so batches that were not
+acked are sent again. Consumers that must not apply a batch twice store the
+last seq together with their writes, keyed by bus_id (which changes when
+the log is recreated).
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import uuid
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bus_log (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS bus_offsets (
+    name TEXT PRIMARY KEY,
+    seq INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS bus_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Unix socket where supported, otherwise a localhost TCP port
+DEFAULT_ADDRESS = "unix:signal_bus.sock" if hasattr(socket, "AF_UNIX") and os.name != "nt" else "tcp:127.0.0.1:8767"
+
+# Messages per batch frame, and unacked messages allowed in flight per subscriber
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_MAX_INFLIGHT = 5000
+
+# Log entries kept even when a subscriber has not acked them
+DEFAULT_RETENTION = 100000
+
+# Longest frame a connection will read (asyncio's default is 64 KiB)
+MAX_FRAME_SIZE = 2**24
+
+
+def parse_address(address):
+    """Split "unix:PATH" or "tcp:HOST:PORT" into (kind, target)"""
+    kind, _, target = address.partition(":")
+    if kind == "unix":
+        return kind, target
+    if kind == "tcp":
+        host, _, port = target.rpartition(":")
+        return kind, (host or "127.0.0.1", int(port))
+    raise ValueError(f"Unknown signal bus address: {address}")
+
+
+async def open_connection(address):
+    """Connect to a bus address"""
+    kind, target = parse_address(address)
+    if kind == "unix":
+        return await asyncio.open_unix_connection(target, limit=MAX_FRAME_SIZE)
+    return await asyncio.open_connection(*target, limit=MAX_FRAME_SIZE)
+
+
+async def send_frame(writer, frame):
+    """Write one JSON line"""
+    writer.write(json.dumps(frame, separators=(",", ":")).encode() + b"\n")
+    await writer.drain()
+
+
+class BusLog:
+    """Append-only SQLite log of published messages plus subscriber offsets"""
+
+    def __init__(self, path="signal_bus.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO bus_meta VALUES ('bus_id', ?)", (uuid.uuid4().hex,)
+            )
+        self.bus_id = self._conn.execute("SELECT value FROM bus_meta WHERE key = 'bus_id'").fetchone()[0]
+        self.last_seq = self._conn.execute("SELECT COALESCE(MAX(seq), 0) FROM bus_log").fetchone()[0]
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
+    def append(self, payloads):
+        """Store serialized messages in one transaction and return the last seq"""
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT INTO bus_log (data) VALUES (?)", ((p,) for p in payloads))
+            self.last_seq = self._conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+        return self.last_seq
+
+    def read(self, after, limit):
+        """Get up to `limit` (seq, data) rows after `after`"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT seq, data FROM bus_log WHERE seq > ? ORDER BY seq LIMIT ?", (after, limit)
+            ).fetchall()
+
+    def get_offset(self, name):
+        """Get the last seq acked by a subscriber (0 if never)"""
+        with self._lock:
+            row = self._conn.execute("SELECT seq FROM bus_offsets WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else 0
+
+    def set_offset(self, name, seq):
+        """Record a subscriber's ack"""
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO bus_offsets VALUES (?, ?)", (name, seq))
+
+    def trim(self, retention=DEFAULT_RETENTION):
+        """Delete entries every subscriber has acked, keeping at most `retention`
+
+        Before any subscriber has acked, the last `retention` entries are kept
+        so a first-time subscriber still finds history.
+        """
+        with self._lock, self._conn:
+            acked = self._conn.execute("SELECT MIN(seq) FROM bus_offsets").fetchone()[0]
+            floor = self.last_seq - retention
+            if acked is not None:
+                floor = max(acked, floor)
+            self._conn.execute("DELETE FROM bus_log WHERE seq <= ?", (floor,))
+
+
+class SignalBus:
+    """Publisher side: log, in-process listeners and the subscriber server"""
+
+    def __init__(self, address=DEFAULT_ADDRESS, path="signal_bus.db", batch_size=DEFAULT_BATCH_SIZE,
+                 max_inflight=DEFAULT_MAX_INFLIGHT, retention=DEFAULT_RETENTION):
+        self.address = address
+        self.log = BusLog(path)
+        self.batch_size = batch_size
+        self.max_inflight = max_inflight
+        self.retention = retention
+        self._listeners = []
+        self._server = None
+        self._subscribers = set()
+        self._connections = set()
+        self._published = 0
+
+        # Counters
+        self.messages_published = 0
+        self.batches_sent = 0
+
+    def add_listener(self, callback):
+        """Call `await callback(messages)` in-process for every published batch"""
+        self._listeners.append(callback)
+
+    async def start(self):
+        """Accept subscribers on the bus address"""
+        kind, target = parse_address(self.address)
+        if kind == "unix":
+            if os.path.exists(target):
+                os.unlink(target)
+            self._server = await asyncio.start_unix_server(self._handle, target, limit=MAX_FRAME_SIZE)
+        else:
+            self._server = await asyncio.start_server(self._handle, *target, limit=MAX_FRAME_SIZE)
+        logger.info(f"✅ Signal bus listening on {self.address}")
+
+    async def stop(self):
+        """Stop accepting subscribers and drop the connected ones"""
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._connections):
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def publish(self, messages):
+        """Log a batch of messages, hand it to listeners and wake subscribers"""
+        if not messages:
+            return
+        self.log.append([json.dumps(message, separators=(",", ":")) for message in messages])
+        self.messages_published += len(messages)
+        for subscriber in self._subscribers:
+            subscriber.set()
+        for callback in self._listeners:
+            await callback(messages)
+
+        # Trim now and then rather than on every publish
+        self._published += 1
+        if self._published % 1000 == 0:
+            self.log.trim(self.retention)
+
+    def get_stats(self):
+        """Get log position and delivery counters"""
+        return {
+            "last_seq": self.log.last_seq,
+            "subscribers": len(self._subscribers),
+            "messages_published": self.messages_published,
+            "batches_sent": self.batches_sent
+        }
+
+    async def _handle(self, reader, writer):
+        """Serve one subscriber connection"""
+        wake = asyncio.Event()
+        acked = None
+        sender = None
+        self._connections.add(writer)
+        try:
+            await send_frame(writer, {"op": "hello", "bus_id": self.log.bus_id})
+            request = json.loads(await reader.readline() or b"null")
+            if not isinstance(request, dict) or request.get("op") != "subscribe":
+                return
+            name = str(request.get("name", "anonymous"))
+            after = request.get("after")
+            cursor = int(after) if after is not None else self.log.get_offset(name)
+            acked = [cursor]
+            logger.info(f"📡 Signal bus subscriber {name} connected after seq {cursor}")
+
+            self._subscribers.add(wake)
+            sender = asyncio.create_task(self._send_batches(writer, wake, cursor, acked))
+            async for line in reader:
+                frame = json.loads(line)
+                if not isinstance(frame, dict) or frame.get("op") != "ack":
+                    continue
+                seq = frame.get("seq")
+                if not isinstance(seq, int):
+                    logger.warning(f"Signal bus subscriber {name} sent a bad ack: {line[:100]!r}")
+                    continue
+                acked[0] = max(acked[0], seq)
+                self.log.set_offset(name, acked[0])
+                wake.set()
+        except (ConnectionError, json.JSONDecodeError, ValueError) as e:
+            logger.warning(f"Signal bus subscriber dropped: {str(e)}")
+        finally:
+            self._connections.discard(writer)
+            self._subscribers.discard(wake)
+            if sender is not None:
+                sender.cancel()
+                await asyncio.gather(sender, return_exceptions=True)
+            writer.close()
+
+    async def _send_batches(self, writer, wake, cursor, acked):
+        """Stream log entries after `cursor`, keeping at most max_inflight unacked"""
+        while True:
+            wake.clear()
+            if cursor - acked[0] < self.max_inflight:
+                rows = self.log.read(cursor, self.batch_size)
+                if rows:
+                    body = ",".join(f'{{"seq":{seq},"data":{data}}}' for seq, data in rows)
+                    writer.write(b'{"op":"batch","messages":[' + body.encode() + b"]}\n")
+                    await writer.drain()
+                    cursor = rows[-1][0]
+                    self.batches_sent += 1
+                    continue
+            await wake.wait()
+
+
+class BusSubscriber:
+    """Consumer side: receive batches, process them, ack, reconnect on failure
+
+    `handler(messages, bus_id, last_seq)` is awaited for every batch.
+    `get_offset(bus_id)`, if given, returns the last seq the consumer has
+    durably processed, so redelivery after a crash starts from there.
+    A batch the handler fails on is not acked; it is redelivered after a
+    reconnect, backing off up to `max_reconnect_delay` while it keeps failing.
+    """
+
+    def __init__(self, name, handler, address=DEFAULT_ADDRESS, get_offset=None, reconnect_delay=2.0,
+                 max_reconnect_delay=60.0):
+        self.name = name
+        self.handler = handler
+        self.address = address
+        self.get_offset = get_offset
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self._task = None
+
+        # Counters
+        self.batches = 0
+        self.messages = 0
+        self.reconnects = 0
+        self.errors = 0
+
+    def start(self):
+        """Start consuming in a background task"""
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        """Stop consuming"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def run(self):
+        """Consume until cancelled, reconnecting whenever the bus goes away"""
+        delay = self.reconnect_delay
+        while True:
+            batches = self.batches
+            try:
+                await self._consume()
+                delay = self.reconnect_delay
+            except (OSError, ConnectionError, asyncio.IncompleteReadError, json.JSONDecodeError) as e:
+                logger.debug(f"Signal bus unavailable: {str(e)}")
+                delay = self.reconnect_delay
+            except Exception as e:
+                # e.g. the handler failed to store a batch; never stop consuming
+                self.errors += 1
+                logger.exception(f"❌ Signal bus consumer {self.name} failed: {str(e)}")
+                # Back off while the same batch keeps failing
+                if self.batches == batches:
+                    delay = min(delay * 2, self.max_reconnect_delay)
+                else:
+                    delay = self.reconnect_delay
+            self.reconnects += 1
+            await asyncio.sleep(delay)
+
+    def get_stats(self):
+        """Get consumption counters"""
+        return {
+            "batches": self.batches,
+            "messages": self.messages,
+            "reconnects": self.reconnects,
+            "errors": self.errors
+        }
+
+    async def _consume(self):
+        """One connection: subscribe, then process and ack batches"""
+        reader, writer = await open_connection(self.address)
+        try:
+            hello = json.loads(await reader.readline())
+            bus_id = hello["bus_id"]
+            after = self.get_offset(bus_id) if self.get_offset else None
+            await send_frame(writer, {"op": "subscribe", "name": self.name, "after": after})
+            logger.info(f"✅ Subscribed to signal bus {self.address} as {self.name}")
+
+            async for line in reader:
+                frame = json.loads(line)
+                if frame.get("op") != "batch" or not frame["messages"]:
+                    continue
+                last_seq = frame["messages"][-1]["seq"]
+                await self.handler([entry["data"] for entry in frame["messages"]], bus_id, last_seq)
+                self.batches += 1
+                self.messages += len(frame["messages"])
+                await send_frame(writer, {"op": "ack", "seq": last_seq})
+        finally:
+            writer.close()
@@ -0,0 +1,134 @@
+import time
+from collections import OrderedDict
+
+# Decisions returned by SignalDeduplicator.check
+NEW = "new"              # First time this signal is seen: place the order
+DUPLICATE = "duplicate"  # Repost or unchanged re-delivery: do nothing
+MODIFIED = "modified"    # Same message edited with new levels: modify the order
+UNKNOWN_EDIT = "unknown_edit"  # Edit of a message not in the index: never open an order
+
+# Price precision used when comparing signals
+FINGERPRINT_DIGITS = 2
+
+
+def signal_fingerprint(signal):
+    """Normalize a signal dict into a hashable fingerprint"""
+    def levels(values):
+        return tuple(round(float(value), FINGERPRINT_DIGITS) for value in values)
+
+    return (
+        signal["type"].lower(),
+        signal["instrument"].upper(),
+        round(float(signal["entry"]), FINGERPRINT_DIGITS),
+        levels(signal["sl"]),
+        levels(signal["tps"])
+    )
+
+
+class SignalRecord:
+    """A signal seen within the dedup window and the order it produced"""
+
+    __slots__ = ("fingerprint", "message_key", "seen_at", "tickets")
+
+    def __init__(self, fingerprint, message_key, seen_at):
+        self.fingerprint = fingerprint
+        self.message_key = message_key
+        self.seen_at = seen_at
+        self.tickets = []
+
+
+class SignalDeduplicator:
+    """Bounded, time-windowed index of recent signals
+
+    Signals are indexed both by fingerprint and by (channel_id, message_id),
+    so reposts are suppressed and edits are recognized in O(1). Entries
+    expire after `window` seconds and the oldest are evicted beyond
+    `max_entries`.
+    """
+
+    def __init__(self, window=3600, max_entries=10000):
+        self.window = window
+        self.max_entries = max_entries
+        self._by_fingerprint = OrderedDict()
+        self._by_message = {}
+
+        # Counters
+        self.duplicates = 0
+        self.modifications = 0
+        self.unknown_edits = 0
+
+    def __len__(self):
+        return len(self._by_fingerprint)
+
+    def check(self, channel_id, message_id, signal, now=None, edited=False):
+        """Classify a signal as NEW, DUPLICATE, MODIFIED or UNKNOWN_EDIT
+
+        Returns the decision and the SignalRecord, whose `tickets` hold the
+        orders placed for the original signal. An `edited` message that is
+        not indexed (backfilled, expired or seen before a restart) is
+        UNKNOWN_EDIT with no record, since it may be long stale.
+        """
+        if now is None:
+            now = time.monotonic()
+        self._expire(now)
+
+        fingerprint = signal_fingerprint(signal)
+        message_key = (channel_id, message_id)
+
+        record = self._by_message.get(message_key)
+        if record is not None:
+            if record.fingerprint == fingerprint:
+                self.duplicates += 1
+                return DUPLICATE, record
+
+            # The message was edited: re-index it under the new levels
+            if self._by_fingerprint.get(record.fingerprint) is record:
+                del self._by_fingerprint[record.fingerprint]
+            record.fingerprint = fingerprint
+            record.seen_at = now
+            existing = self._by_fingerprint.pop(fingerprint, None)
+            if existing is not None and self._by_message.get(existing.message_key) is existing:
+                del self._by_message[existing.message_key]
+            self._by_fingerprint[fingerprint] = record
+            self.modifications += 1
+            return MODIFIED, record
+
+        if edited:
+            self.unknown_edits += 1
+            return UNKNOWN_EDIT, None
+
+        record = self._by_fingerprint.get(fingerprint)
+        if record is not None:
+            self.duplicates += 1
+            return DUPLICATE, record
+
+        record = SignalRecord(fingerprint, message_key, now)
+        self._by_fingerprint[fingerprint] = record
+        self._by_message[message_key] = record
+        while len(self._by_fingerprint) > self.max_entries:
+            self._evict_oldest()
+        return NEW, record
+
+    def get_stats(self):
+        """Get index size and suppression counters"""
+        return {
+            "size": len(self._by_fingerprint),
+            "duplicates": self.duplicates,
+            "modifications": self.modifications,
+            "unknown_edits": self.unknown_edits
+        }
+
+    def _expire(self, now):
+        """Drop entries older than the window (oldest first)"""
+        cutoff = now - self.window
+        while self._by_fingerprint:
+            record = next(iter(self._by_fingerprint.values()))
+            if record.seen_at >= cutoff:
+                break
+            self._evict_oldest()
+
+    def _evict_oldest(self):
+        """Remove the oldest entry from both indexes"""
+        _, record = self._by_fingerprint.popitem(last=False)
+        if self._by_message.get(record.message_key) is record:
+            del self._by_message[record.message_key]
@@ -0,0 +1,289 @@
+import asyncio
+import logging
+import re
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Follow-up instructions, matched against the lowercased reply text
+TP_HIT_RE = re.compile(r'\btp\s*(\d)?\s*(?:hit|reached|done|smashed)')
+SL_ENTRY_RE = re.compile(r'\bsl\s+(?:to\s+)?(?:entry|be|breakeven|break\s*even)\b|\bbreak\s*even\b')
+SL_PRICE_RE = re.compile(r'\b(?:move|set|new)\s+sl\s+(?:to\s+|at\s+)?(\d+\.?\d*)')
+CLOSE_RE = re.compile(r'^\s*close\s*$|\bclose\s+(?:all|now|everything|(?:the\s+)?(?:trades?|positions?))\b',
+                      re.MULTILINE)
+
+# Actions returned by parse_follow_up
+TP_HIT = "tp_hit"
+SL_TO_ENTRY = "sl_to_entry"
+MOVE_SL = "move_sl"
+CLOSE = "close"
+
+
+def parse_follow_up(message_text):
+    """Parse instructions in a reply to a signal, e.g. "TP1 hit, move SL to entry"
+
+    Returns a list of (action, value) tuples: (TP_HIT, level or None),
+    (SL_TO_ENTRY, None), (MOVE_SL, price) or (CLOSE, None).
+    """
+    if not message_text:
+        return []
+    text = message_text.lower()
+
+    if CLOSE_RE.search(text):
+        return [(CLOSE, None)]
+
+    actions = []
+    for match in TP_HIT_RE.finditer(text):
+        actions.append((TP_HIT, int(match.group(1)) if match.group(1) else None))
+    match = SL_PRICE_RE.search(text)
+    if match:
+        actions.append((MOVE_SL, float(match.group(1))))
+    elif SL_ENTRY_RE.search(text):
+        actions.append((SL_TO_ENTRY, None))
+    return actions
+
+
+class PositionLeg:
+    """One TP leg of a placed signal and the levels last sent for it
+
+    `tp_number` is the leg's TP level in the signal (1 for TP1), which
+    stays right when other legs were rejected.
+    """
+
+    __slots__ = ("ticket", "tp_number", "sl", "tp", "open")
+
+    def __init__(self, ticket, tp_number, sl, tp):
+        self.ticket = ticket
+        self.tp_number = tp_number
+        self.sl = sl
+        self.tp = tp
+        self.open = True
+
+
+class TrackedSignal:
+    """A placed signal, its legs and the messages of its thread"""
+
+    __slots__ = ("channel_id", "signal", "legs", "message_ids", "tp_hits")
+
+    def __init__(self, channel_id, signal, legs):
+        self.channel_id = channel_id
+        self.signal = signal
+        self.legs = legs
+        self.message_ids = []
+        self.tp_hits = 0
+
+    @property
+    def open_legs(self):
+        """Legs not yet closed by a TP hit or a close instruction"""
+        return [leg for leg in self.legs if leg.open]
+
+
+class LifecycleTracker:
+    """Index from Telegram message threads to the positions a signal opened
+
+    The signal message and every follow-up that replied into its thread
+    map to the same TrackedSignal, so a reply to any of them resolves in
+    O(1). Follow-up instructions become SL/TP updates for the open legs.
+    The oldest signals are evicted beyond `max_entries`.
+    """
+
+    def __init__(self, max_entries=10000, breakeven_after_tp=1):
+        self.max_entries = max_entries
+        # Move SL to entry once this TP is hit (None: only when told to)
+        self.breakeven_after_tp = breakeven_after_tp
+        self._signals = OrderedDict()
+        self._by_message = {}
+
+        # Counters
+        self.follow_ups = 0
+        self.updates = 0
+        self.closes = 0
+
+    def __len__(self):
+        return len(self._signals)
+
+    def track(self, channel_id, message_id, signal, legs):
+        """Start tracking the placed legs ({"ticket", "tp", "success"}, one per TP in order) of a signal"""
+        tracked = TrackedSignal(channel_id, signal, [
+            PositionLeg(leg["ticket"], tp_number, signal['sl'][0], leg["tp"])
+            for tp_number, leg in enumerate(legs, 1) if leg["success"]
+        ])
+        if not tracked.legs:
+            return None
+        self._signals[id(tracked)] = tracked
+        self.link(channel_id, message_id, tracked)
+        while len(self._signals) > self.max_entries:
+            self.forget(next(iter(self._signals.values())))
+        return tracked
+
+    def link(self, channel_id, message_id, tracked):
+        """Index another message of the signal's thread"""
+        tracked.message_ids.append(message_id)
+        self._by_message[(channel_id, message_id)] = tracked
+
+    def find(self, channel_id, message_id):
+        """Get the signal a message belongs to, or None"""
+        return self._by_message.get((channel_id, message_id))
+
+    def forget(self, tracked):
+        """Stop tracking a signal"""
+        self._signals.pop(id(tracked), None)
+        for message_id in tracked.message_ids:
+            if self._by_message.get((tracked.channel_id, message_id)) is tracked:
+                del self._by_message[(tracked.channel_id, message_id)]
+
+    def match_follow_up(self, channel_id, message):
+        """Get (tracked, actions) for a reply to a tracked signal's thread, or None"""
+        reply_to = getattr(message, 'reply_to_msg_id', None)
+        if reply_to is None:
+            return None
+        tracked = self._by_message.get((channel_id, reply_to))
+        if tracked is None:
+            return None
+        actions = parse_follow_up(message.text)
+        return (tracked, actions) if actions else None
+
+    def apply(self, tracked, actions):
+        """Turn follow-up actions into SL/TP updates and tickets to close
+
+        Returns ([(ticket, symbol, sl, tp), ...], [ticket, ...]) for the
+        legs whose levels change, updating the tracked levels to match.
+        """
+        self.follow_ups += 1
+        if any(action == CLOSE for action, _ in actions):
+            tickets = [leg.ticket for leg in tracked.open_legs]
+            for leg in tracked.legs:
+                leg.open = False
+            self.closes += 1
+            return [], tickets
+
+        sl = None
+        for action, value in actions:
+            if action == TP_HIT:
+                level = value if value is not None else tracked.tp_hits + 1
+                tracked.tp_hits = max(tracked.tp_hits, level)
+                # The broker closes legs at their TP; only the rest still need updates
+                for leg in tracked.legs:
+                    if leg.tp_number <= tracked.tp_hits:
+                        leg.open = False
+                if self.breakeven_after_tp is not None and tracked.tp_hits >= self.breakeven_after_tp:
+                    sl = sl if sl is not None else tracked.signal['entry']
+            elif action == SL_TO_ENTRY:
+                sl = tracked.signal['entry']
+            elif action == MOVE_SL:
+                sl = value
+
+        updates = []
+        if sl is not None:
+            for leg in tracked.open_legs:
+                if leg.sl != sl:
+                    leg.sl = sl
+                    updates.append((leg.ticket, tracked.signal['instrument'], sl, leg.tp))
+        self.updates += len(updates)
+        return updates, []
+
+    def update_levels(self, tracked, signal):
+        """Take an edited signal's levels, returning the SL/TP updates for its legs"""
+        tracked.signal = signal
+        tps = signal['tps']
+        updates = []
+        for leg in tracked.legs:
+            leg.sl = signal['sl'][0]
+            leg.tp = tps[min(leg.tp_number, len(tps)) - 1]
+            if leg.open:
+                updates.append((leg.ticket, signal['instrument'], leg.sl, leg.tp))
+        self.updates += len(updates)
+        return updates
+
+    def get_stats(self):
+        """Get index size and follow-up counters"""
+        return {
+            "signals": len(self._signals),
+            "messages": len(self._by_message),
+            "follow_ups": self.follow_ups,
+            "updates": self.updates,
+            "closes": self.closes
+        }
+
+
+class SLTPCoalescer:
+    """Coalesce SL/TP modifications into one TRADE_ACTION_SLTP per position
+
+    Requests arriving within `window` seconds are merged per ticket, the
+    latest levels winning, and sent as one batch on the MT5 worker thread.
+    Everyone who asked for a ticket gets the result of its single call.
+    """
+
+    def __init__(self, executor, trading_platform, window=0.1):
+        self.executor = executor
+        self.trading_platform = trading_platform
+        self.window = window
+        # ticket -> [symbol, sl, tp, futures]
+        self._pending = OrderedDict()
+        self._flush_task = None
+
+        # Counters
+        self.requests = 0
+        self.modifications = 0
+        self.coalesced = 0
+        self.batches = 0
+
+    async def modify(self, ticket, symbol, sl, tp):
+        """Set a position's SL/TP as part of the next batch"""
+        return (await self.modify_many([(ticket, symbol, sl, tp)]))[0]
+
+    async def modify_many(self, updates):
+        """Set several positions' SL/TP ([(ticket, symbol, sl, tp)]) as part of the next batch"""
+        loop = asyncio.get_running_loop()
+        futures = []
+        for ticket, symbol, sl, tp in updates:
+            future = loop.create_future()
+            entry = self._pending.get(ticket)
+            if entry is None:
+                self._pending[ticket] = [symbol, sl, tp, [future]]
+            else:
+                entry[:3] = symbol, sl, tp
+                entry[3].append(future)
+                self.coalesced += 1
+            futures.append(future)
+        self.requests += len(updates)
+
+        if self._pending and self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+        return await asyncio.gather(*futures)
+
+    def get_stats(self):
+        """Get request and batch counters"""
+        return {
+            "requests": self.requests,
+            "modifications": self.modifications,
+            "coalesced": self.coalesced,
+            "batches": self.batches
+        }
+
+    async def _flush_later(self):
+        """Wait for the window to close, then send the batch"""
+        await asyncio.sleep(self.window)
+        self._flush_task = None
+        batch, self._pending = self._pending, OrderedDict()
+        if not batch:
+            return
+        self.batches += 1
+        self.modifications += len(batch)
+        updates = [(ticket, symbol, sl, tp) for ticket, (symbol, sl, tp, _) in batch.items()]
+        try:
+            results = await self.executor.run(self._send, updates)
+        except Exception as e:
+            logger.warning(f"SL/TP batch failed: {str(e)}")
+            results = [False] * len(updates)
+        for (symbol, sl, tp, futures), result in zip(batch.values(), results):
+            for future in futures:
+                if not future.done():
+                    future.set_result(result)
+
+    def _send(self, updates):
+        """Worker thread: one TRADE_ACTION_SLTP per position"""
+        return [
+            self.trading_platform.modify_position(ticket, symbol, sl, tp)
+            for ticket, symbol, sl, tp in updates
+        ]
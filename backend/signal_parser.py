@@ -0,0 +1,337 @@
+import re
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+# Precompiled grammar shared by every parse call
+NUMBER_RE = re.compile(r'\d+\.?\d*')
+
+# Instruments the parser can emit
+INSTRUMENTS = ("XAUUSD", "Gold")
+
+# Keyword count from which one regex scan beats a substring check per keyword
+REGEX_INDEX_MIN_KEYWORDS = 32
+
+# Plausible XAUUSD/Gold price range for the fallback entry heuristic
+FALLBACK_ENTRY_MIN = 1000
+FALLBACK_ENTRY_MAX = 10000
+
+
+class TradingSignal(NamedTuple):
+    """Parsed trading signal"""
+    type: str
+    instrument: str
+    entry: float
+    sl: Tuple[float, ...]
+    tps: Tuple[float, ...]
+
+    def to_dict(self):
+        """Return the signal in the dict format used by the bot and frontend"""
+        return {
+            "type": self.type,
+            "instrument": self.instrument,
+            "entry": self.entry,
+            "sl": list(self.sl),
+            "tps": list(self.tps)
+        }
+
+
+class SignalFormat(NamedTuple):
+    """A channel's signal layout
+
+    The first non-empty line names the instrument and side; `instruments`
+    and `sides` map lowercase keywords to what the parser emits, checked in
+    order. `parser(fmt, lines, index, first_line)` reads the rest and
+    defaults to parse_lines.
+    """
+    name: str
+    instruments: Tuple[Tuple[str, str], ...]
+    sides: Tuple[Tuple[str, str], ...] = (("buy", "buy"), ("sell", "sell"))
+    entry_range: Tuple[float, float] = (FALLBACK_ENTRY_MIN, FALLBACK_ENTRY_MAX)
+    parser: Optional[Callable] = None
+
+
+def parse_lines(fmt: SignalFormat, lines: List[str], index: int, first_line: str) -> Optional[TradingSignal]:
+    """Parse the "INSTRUMENT SIDE [entry]" / "SL x" / "TP y" layout
+
+    `lines` is the lowercased message, `first_line` its first non-empty line
+    (stripped) and `index` the position of the line after it.
+    """
+    for keyword, instrument in fmt.instruments:
+        if keyword in first_line:
+            break
+    else:
+        return None
+
+    for side_keyword, signal_type in fmt.sides:
+        if side_keyword in first_line:
+            break
+    else:
+        return None
+
+    # Entry may follow the signal type on the first line
+    entry = None
+    match = NUMBER_RE.search(first_line.split(side_keyword, 2)[1])
+    if match:
+        entry = float(match.group())
+
+    sl = []
+    tps = []
+
+    # Each value runs up to the next occurrence of its keyword on the line
+    for line in lines[index:]:
+        line = line.strip()
+        prefix = line[:2]
+        if prefix == 'tp':
+            try:
+                tps.append(float(line[2:].split('tp', 1)[0].strip()))
+            except ValueError:
+                pass
+        elif prefix == 'sl':
+            # Stop loss can have multiple values
+            try:
+                for sl_value in line[2:].split('sl', 1)[0].split():
+                    sl.append(float(sl_value))
+            except ValueError:
+                pass
+        elif prefix == 'en' and entry is None and line.startswith('entry'):
+            try:
+                entry = float(line[5:].split('entry', 1)[0].strip())
+            except ValueError:
+                pass
+
+    # Only return signal if we have all required components
+    if not sl or not tps:
+        return None
+
+    # If entry is still not found, take the first plausible price of any line
+    if entry is None:
+        low, high = fmt.entry_range
+        for line in lines:
+            match = NUMBER_RE.search(line)
+            if match:
+                try:
+                    value = float(match.group())
+                except ValueError:
+                    continue
+                if low < value < high:
+                    entry = value
+                    break
+        if entry is None:
+            return None
+
+    # Ascending for buy, descending for sell
+    descending = signal_type == 'sell'
+    sl.sort(reverse=descending)
+    tps.sort(reverse=descending)
+
+    return TradingSignal(signal_type, instrument, entry, tuple(sl), tuple(tps))
+
+
+# The goldhunterpaulnow layout, used for channels without an assigned format
+GOLDHUNTER = SignalFormat("goldhunter", (("xauusd", "XAUUSD"), ("gold", "Gold")))
+
+
+def trie_pattern(keywords: Iterable[str]) -> str:
+    """Regex matching any of `keywords`, shaped as a trie so it never backtracks across them"""
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # Prefer the longer keyword, fall back to the one ending here
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+class KeywordIndex:
+    """Find every keyword in a text with one scan, OR-ing their bitmasks
+
+    Aho-Corasick style: the keywords are merged into one trie, tried at
+    every position, and each keyword's mask includes those of its prefixes,
+    so overlapping and nested keywords are all reported. The trie is
+    compiled to a single regex, so the scan runs in C. A handful of
+    keywords is cheaper to check with plain substring tests, so small
+    indexes do that instead.
+    """
+
+    def __init__(self, keywords: Dict[str, int]):
+        self._items = tuple(keywords.items())
+        self._findall = None
+        if len(keywords) >= REGEX_INDEX_MIN_KEYWORDS:
+            # A match at a position is the longest keyword there; fold in the shorter ones
+            self._masks = {
+                keyword: _or(mask for prefix, mask in keywords.items() if keyword.startswith(prefix))
+                for keyword in keywords
+            }
+            self._findall = re.compile(f"(?=({trie_pattern(keywords)}))").findall
+
+    def scan(self, text: str) -> int:
+        """OR of the masks of every keyword found in `text`"""
+        mask = 0
+        if self._findall is None:
+            for keyword, keyword_mask in self._items:
+                if keyword in text:
+                    mask |= keyword_mask
+            return mask
+        masks = self._masks
+        for keyword in self._findall(text):
+            mask |= masks[keyword]
+        return mask
+
+
+def _or(masks):
+    """Bitwise OR of an iterable of ints"""
+    result = 0
+    for mask in masks:
+        result |= mask
+    return result
+
+
+class ParserRegistry:
+    """Signal formats by channel, with a shared keyword index over their headers
+
+    Each channel (by peer id) is assigned the formats its admins post in;
+    channels without an assignment use the default formats. Before any
+    parser runs, one scan of the first line finds which formats have both an
+    instrument and a side keyword there, so chatter is rejected without
+    running any format, and a signal only reaches the formats it could match.
+    A channel with a single parse_lines format skips the scan, since
+    parse_lines checks the same keywords itself.
+    """
+
+    def __init__(self, formats: Iterable[SignalFormat] = (), default: Iterable[str] = ()):
+        self._formats = []
+        self._by_name = {}
+        # Assigned format names per channel, and the (mask, formats) plan built from them
+        self._assigned = {}
+        self._channels = {}
+        self._default = ()
+        for fmt in formats:
+            self.register(fmt)
+        self.set_default(default)
+
+    @property
+    def formats(self) -> List[SignalFormat]:
+        """Registered formats, in registration order"""
+        return list(self._formats)
+
+    def register(self, fmt: SignalFormat):
+        """Add a format (or replace one with the same name) and rebuild the index"""
+        if fmt.name in self._by_name:
+            self._formats[self._by_name[fmt.name]] = fmt
+        else:
+            self._by_name[fmt.name] = len(self._formats)
+            self._formats.append(fmt)
+        self._build_index()
+        # Plans hold the format objects, so a replaced format must reach them
+        self._channels = {channel_id: self._plan(names) for channel_id, names in self._assigned.items()}
+        self._default_plan = self._plan(self._default)
+
+    def assign(self, channel_id, names: Iterable[str]):
+        """Parse messages from `channel_id` with the named formats, tried in order"""
+        names = tuple(names)
+        plan = self._plan(names)
+        self._assigned[channel_id] = names
+        self._channels[channel_id] = plan
+
+    def set_default(self, names: Iterable[str]):
+        """Formats for channels without an assignment, tried in order"""
+        names = tuple(names)
+        self._default_plan = self._plan(names)
+        self._default = names
+
+    def candidates(self, first_line: str, channel_id=None) -> int:
+        """Bitmask of the channel's formats whose header keywords are in `first_line`"""
+        mask = self._index.scan(first_line)
+        return mask & (mask >> self._side_shift) & self._channels.get(channel_id, self._default_plan)[0]
+
+    def parse(self, message_text, channel_id=None) -> Optional[TradingSignal]:
+        """Parse a message with the channel's formats"""
+        if not message_text:
+            return None
+
+        # Lowercase once for the whole message instead of once per line
+        lines = message_text.lower().split('\n')
+
+        # First non-empty line holds instrument, type and possibly entry
+        index = 0
+        for first_line in lines:
+            index += 1
+            first_line = first_line.strip()
+            if first_line:
+                break
+        else:
+            return None
+
+        channel_mask, formats = self._channels.get(channel_id, self._default_plan)
+        if len(formats) == 1 and formats[0][1].parser is None:
+            # parse_lines rejects chatter on its own header check
+            return parse_lines(formats[0][1], lines, index, first_line)
+
+        # Reject non-signal messages before any format parses the body
+        mask = self._index.scan(first_line)
+        candidates = mask & (mask >> self._side_shift) & channel_mask
+        if not candidates:
+            return None
+        for bit, fmt in formats:
+            if candidates & bit:
+                signal = (fmt.parser or parse_lines)(fmt, lines, index, first_line)
+                if signal is not None:
+                    return signal
+        return None
+
+    def is_candidate(self, message_text, channel_id=None) -> bool:
+        """Cheap first-line check for messages that may be trading signals"""
+        if not message_text:
+            return False
+        first_line = message_text.lstrip()[:200].split('\n', 1)[0].lower()
+        return self.candidates(first_line, channel_id) != 0
+
+    def _plan(self, names):
+        """(bitmask, ((bit, format), ...)) for the named formats, in the given order"""
+        bits = tuple(1 << self._by_name[name] for name in dict.fromkeys(names))
+        return _or(bits), tuple((bit, self._formats[bit.bit_length() - 1]) for bit in bits)
+
+    def _build_index(self):
+        """Index instrument keywords in the low bits and side keywords above them"""
+        self._side_shift = len(self._formats)
+        keywords = {}
+        for bit, fmt in enumerate(self._formats):
+            for keyword, _ in fmt.instruments:
+                keywords[keyword] = keywords.get(keyword, 0) | 1 << bit
+            for keyword, _ in fmt.sides:
+                keywords[keyword] = keywords.get(keyword, 0) | 1 << (bit + self._side_shift)
+        self._index = KeywordIndex(keywords)
+
+
+# Formats known to the bot; channels get theirs with registry.assign()
+registry = ParserRegistry([GOLDHUNTER], default=[GOLDHUNTER.name])
+
+
+def parse_signal(message_text, channel_id=None) -> Optional[TradingSignal]:
+    """Parse a trading signal from message text in a single pass"""
+    return registry.parse(message_text, channel_id)
+
+
+def is_signal_candidate(message_text, channel_id=None):
+    """Cheap first-line check for messages that may be trading signals"""
+    return registry.is_candidate(message_text, channel_id)
+
+
+def parse_signals(message_texts: Iterable[str], channel_id=None) -> List[Optional[TradingSignal]]:
+    """Parse a batch of message texts, returning None for non-signals"""
+    parse = registry.parse
+    return [parse(text, channel_id) for text in message_texts]
+
+
+def parse_trading_signal(message_text, channel_id=None):
+    """Parse trading signals from message text (dict format)"""
+    signal = registry.parse(message_text, channel_id)
+    return signal.to_dict() if signal else None
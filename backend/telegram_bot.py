@@ -1,13 +1,26 @@
-from telethon import TelegramClient, events
 import asyncio
+import importlib
 import logging
-from dotenv import load_dotenv
 import os
 from datetime import datetime
-import websockets
 import json
-import re
+import time
 from trading_platform import TradingPlatform
+from order_executor import OrderExecutor
+from mt5_supervisor import MT5Supervisor
+from position_sizing import PositionSizer
+from broadcaster import Broadcaster
+from checkpoint_store import NOT_PROCESSED, CheckpointStore
+from entity_cache import EntityCache
+from feed_protocol import FeedLog, ProtocolError, Subscription, parse_connect_params
+from signal_dedup import DUPLICATE, MODIFIED, UNKNOWN_EDIT, SignalDeduplicator
+from signal_lifecycle import LifecycleTracker, SLTPCoalescer, parse_follow_up
+from signal_parser import INSTRUMENTS, is_signal_candidate, parse_signals, parse_trading_signal
+from signal_parser import registry as parser_registry
+from ingest_pipeline import KeyedSequencer, Pipeline, Stage
+from signal_bus import DEFAULT_ADDRESS, SignalBus
+from health import Readiness, add_health_endpoints
+from metrics import add_metrics_endpoint, metrics, serve_app, setup_queue_logging
 
 # Configure logging
 logging.basicConfig(
@@ -16,11 +29,13 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Load environment variables
-load_dotenv()
+# Load environment variables when run as the bot, not when imported by tools
+if __name__ == '__main__':
+    from dotenv import load_dotenv
+    load_dotenv()
 
 # Telegram API credentials
-API_ID = int(os.getenv('TELEGRAM_API_ID'))
+API_ID = os.getenv('TELEGRAM_API_ID')
 API_HASH = os.getenv('TELEGRAM_API_HASH')
 PHONE = os.getenv('TELEGRAM_PHONE')
 
@@ -29,380 +44,657 @@ MT5_LOGIN = os.getenv('MT5_LOGIN')
 MT5_PASSWORD = os.getenv('MT5_PASSWORD')
 MT5_SERVER = os.getenv('MT5_SERVER')
 
+# Risk per signal and exposure caps, as percent of equity; sizing is opt-in
+# (0, the default, keeps the fixed lot size)
+RISK_PER_TRADE_PCT = float(os.getenv('RISK_PER_TRADE_PCT', '0'))
+MAX_TOTAL_RISK_PCT = float(os.getenv('MAX_TOTAL_RISK_PCT', '5.0'))
+MAX_SYMBOL_RISK_PCT = float(os.getenv('MAX_SYMBOL_RISK_PCT', '3.0'))
+MAX_OPEN_SIGNALS = int(os.getenv('MAX_OPEN_SIGNALS', '10'))
+
+# HTTP port for the bot's /metrics endpoint
+METRICS_PORT = int(os.getenv('BOT_METRICS_PORT', '8766'))
+
+# Websocket feed: resumable history per client and permessage-deflate ("none" disables it)
+FEED_BUFFER_SIZE = 1000
+FEED_SNAPSHOT_SIZE = 100
+FEED_COMPRESSION = os.getenv('FEED_COMPRESSION', 'deflate')
+
+# Ingest pipeline sizing: queue capacity per lane and workers per stage
+PIPELINE_CAPACITY = 100
+PIPELINE_RESOLVE_WORKERS = 4
+PIPELINE_EXECUTE_WORKERS = 2
+
 # Channel usernames
 CHANNELS = [
     'goldhunterpaulnow',  # GOLDHUNTER🦁| PAUL FX 🇳🇱
     # 'Traderjamessss'      # TRADER JAMES
 ]
 
+# Signal formats (signal_parser.SignalFormat names) per channel username;
+# channels not listed use the default goldhunter format
+CHANNEL_FORMATS = {
+    'goldhunterpaulnow': ['goldhunter'],
+}
+
+# History backfill settings
+BACKFILL_LIMIT = 300       # Messages fetched per channel on startup
+BACKFILL_CONCURRENCY = 4   # Channels fetched at the same time
+BACKFILL_BATCH_SIZE = 50   # Messages per parse batch and websocket frame
+
 # Initialize trading platform
 trading_platform = TradingPlatform(
     login=MT5_LOGIN,
     password=MT5_PASSWORD,
-    server=MT5_SERVER
+    server=MT5_SERVER,
+    symbols=INSTRUMENTS,
+    sizer=PositionSizer(
+        risk_pct=RISK_PER_TRADE_PCT,
+        max_total_risk_pct=MAX_TOTAL_RISK_PCT,
+        max_symbol_risk_pct=MAX_SYMBOL_RISK_PCT,
+        max_open_signals=MAX_OPEN_SIGNALS
+    ) if RISK_PER_TRADE_PCT > 0 else None
 )
 
-# Connect to MT5
-if not trading_platform.connect():
-    print("❌ Failed to connect to MT5. Please check your credentials.")
-    exit(1)
+# Run broker calls on a dedicated worker thread, off the event loop
+order_executor = OrderExecutor(trading_platform)
+
+# Health-check the MT5 session and reconnect with backoff when it drops
+mt5_supervisor = MT5Supervisor(trading_platform, order_executor)
+
+# Startup milestones and live checks, served on /readyz
+readiness = Readiness()
+
+# Export component stats alongside the stage histograms
+metrics.register_stats("order_executor", order_executor.get_stats)
+metrics.register_stats("symbol_cache", trading_platform.symbol_cache.get_stats)
+metrics.register_stats("account_cache", trading_platform.account_cache.get_stats)
+if trading_platform.sizer is not None:
+    metrics.register_stats("position_sizer", trading_platform.sizer.get_stats)
+metrics.register_stats("mt5_supervisor", mt5_supervisor.get_stats)
+
+# SQLite-backed stores, opened by open_stores() so importing creates no files:
+# last processed message per channel, so restarts only fetch new traffic
+checkpoints = None
+# Resolved chats and senders, so messages and restarts skip entity lookups
+entity_cache = None
+# Parsed messages are published once; the websocket feed, api_server and
+# any other consumer subscribe to the bus
+signal_bus = None
+
+# Channels whose startup backfill finished, so live messages may move their checkpoint
+backfilled_channels = set()
 
-# WebSocket connections
-connected_clients = set()
+# Recent signals, so reposts and edits never open a second order
+signal_dedup = SignalDeduplicator()
+metrics.register_stats("signal_dedup", signal_dedup.get_stats)
 
-async def register(websocket):
-    connected_clients.add(websocket)
-    print(f"📱 New client connected (Total: {len(connected_clients)})")
+# Placed signals by message thread, so replies can move their SL or close them
+lifecycle = LifecycleTracker()
+metrics.register_stats("lifecycle", lifecycle.get_stats)
+
+# Execute turns per (chat, message) thread: edits and replies wait for the
+# orders of the signal they refer to, even with several execute workers
+execute_turns = KeyedSequencer()
+
+# SL/TP changes are merged per position and sent in batches on the worker thread
+sltp_coalescer = SLTPCoalescer(order_executor, trading_platform)
+metrics.register_stats("sltp_coalescer", sltp_coalescer.get_stats)
+
+# WebSocket connections, each with its own bounded send queue
+broadcaster = Broadcaster()
+metrics.register_stats("broadcaster", broadcaster.get_stats)
+
+# Sequence numbers and recent rows for the snapshot/delta feed protocol
+feed = FeedLog(FEED_BUFFER_SIZE, FEED_SNAPSHOT_SIZE)
+metrics.register_stats("feed", feed.get_stats)
+
+async def register(websocket, encoding, subscription):
+    broadcaster.register(websocket, encoding, subscription, feed.seq)
+    logger.info(f"📱 New client connected (Total: {len(broadcaster)})")
 
 async def unregister(websocket):
-    connected_clients.remove(websocket)
-    print(f"📱 Client disconnected (Total: {len(connected_clients)})")
-
-async def broadcast_message(message_data):
-    """Broadcast message to all connected clients"""
-    if connected_clients:
-        message = json.dumps(message_data)
-        await asyncio.gather(
-            *[client.send(message) for client in connected_clients]
+    await broadcaster.unregister(websocket)
+    logger.info(f"📱 Client disconnected (Total: {len(broadcaster)})")
+
+async def broadcast_messages(messages):
+    """Number messages and send them to the clients subscribed to them"""
+    broadcaster.publish(*feed.append(messages))
+
+def open_stores():
+    """Open the SQLite-backed stores, keeping any already set (e.g. by a benchmark)"""
+    global checkpoints, entity_cache, signal_bus
+    if checkpoints is None:
+        checkpoints = CheckpointStore(os.getenv('CHECKPOINT_DB_PATH', 'checkpoints.db'))
+    if entity_cache is None:
+        entity_cache = EntityCache(os.getenv('ENTITY_CACHE_PATH', 'entities.db'))
+        metrics.register_stats("entity_cache", entity_cache.get_stats)
+    if signal_bus is None:
+        signal_bus = SignalBus(
+            os.getenv('SIGNAL_BUS_ADDRESS', DEFAULT_ADDRESS),
+            os.getenv('SIGNAL_BUS_DB_PATH', 'signal_bus.db')
         )
+        signal_bus.add_listener(broadcast_messages)
+        metrics.register_stats("signal_bus", signal_bus.get_stats)
 
 def print_message(chat_title, sender_name, message_text, message_date):
     """Print message in a formatted way"""
-    print("\n" + "="*50)
-    print(f"📢 Channel: {chat_title}")
-    print(f"⏰ Time: {message_date.strftime('%Y-%m-%d %H:%M:%S')}")
-    print(f"👤 From: {sender_name}")
-    print("-"*50)
-    print(f"💬 Message: {message_text}")
-    print("="*50 + "\n")
-
-async def get_last_messages(client, channel, limit=300):
-    """Fetch last messages from a channel and check for trading signals"""
+    logger.info("\n" + "="*50)
+    logger.info(f"📢 Channel: {chat_title}")
+    logger.info(f"⏰ Time: {message_date.strftime('%Y-%m-%d %H:%M:%S')}")
+    logger.info(f"👤 From: {sender_name}")
+    logger.info("-"*50)
+    logger.info(f"💬 Message: {message_text}")
+    logger.info("="*50 + "\n")
+
+async def process_message_batch(channel, messages, counts):
+    """Parse a batch of history messages and broadcast them as one frame"""
+    # Skip messages already parsed and pushed with the same edit date
+    messages = checkpoints.filter_unprocessed(channel.id, messages)
+    if not messages:
+        return
+    
+    with metrics.span("parse_batch"):
+        trading_signals = parse_signals((message.text for message in messages), channel.peer_id)
+    
+    batch = []
+    for message, parsed_signal in zip(messages, trading_signals):
+        sender_name = entity_cache.sender_name(message)
+        trading_signal = parsed_signal.to_dict() if parsed_signal else None
+        
+        if trading_signal:
+            counts[trading_signal['type']] += 1
+            
+            logger.info("\n" + "="*50)
+            logger.info("🎯 FOUND TRADING SIGNAL!")
+            logger.info(f"📅 Date: {message.date.strftime('%Y-%m-%d %H:%M:%S')}")
+            logger.info(f"👤 From: {sender_name}")
+            logger.info(f"📊 Type: {trading_signal['type'].upper()}")
+            logger.info(f"💰 Instrument: {trading_signal['instrument']}")
+            logger.info(f"🎯 Entry: {trading_signal['entry']}")
+            logger.info(f"🛑 SL: {', '.join(map(str, trading_signal['sl']))}")
+            logger.info(f"🎯 TPs: {', '.join(map(str, trading_signal['tps']))}")
+            logger.info("="*50 + "\n")
+            logger.info("Original Message:")
+            logger.info(message.text)
+            logger.info("="*50 + "\n")
+        
+        batch.append({
+            "channel": channel.title,
+            "sender": sender_name,
+            "text": message.text,
+            "timestamp": message.date.isoformat(),
+            "is_trading_signal": trading_signal is not None,
+            "trading_signal": trading_signal
+        })
+    
+    await signal_bus.publish(batch)
+    
+    # History arrives newest first, so the checkpoint moves once the whole backfill is done
+    checkpoints.mark_processed(channel.id, (
+        (message.id, message.edit_date, message_data["trading_signal"])
+        for message, message_data in zip(messages, batch)
+    ), advance=False)
+
+async def get_last_messages(client, channel, limit=BACKFILL_LIMIT, batch_size=BACKFILL_BATCH_SIZE):
+    """Stream last messages from a channel and check for trading signals"""
     try:
-        print(f"\n📡 Fetching last {limit} messages from {channel.title}...")
-        print(f"🔍 Channel ID: {channel.id}")
-        print(f"🔍 Channel username: {channel.username}")
-        print(f"🔍 Channel access hash: {channel.access_hash}")
+        logger.info(f"\n📡 Fetching last {limit} messages from {channel.title}...")
+        logger.info(f"🔍 Channel ID: {channel.id}")
+        logger.info(f"🔍 Channel username: {channel.username}")
+        logger.info(f"🔍 Channel access hash: {channel.access_hash}")
         
-        messages = await client.get_messages(channel, limit=limit)
-        print(f"✅ Found {len(messages)} messages")
+        # Resume after the last message processed by a previous run
+        min_id = checkpoints.get_checkpoint(channel.id)
+        if min_id:
+            logger.info(f"⏩ Resuming after message {min_id}")
         
         # Counters for different types of signals
-        buy_signals_count = 0
-        sell_signals_count = 0
-        total_signals_count = 0
+        counts = {"buy": 0, "sell": 0}
+        total_messages = 0
         
-        print("\n🔍 Starting to scan messages for trading signals...")
+        logger.info("\n🔍 Starting to scan messages for trading signals...")
         
-        for message in messages:
-            # Get sender information safely
-            sender_name = "Channel Admin"
-            if message.sender:
-                if hasattr(message.sender, 'first_name'):
-                    sender_name = f"{message.sender.first_name} {message.sender.last_name or ''}".strip()
-                elif hasattr(message.sender, 'title'):
-                    sender_name = message.sender.title
-                elif hasattr(message.sender, 'username'):
-                    sender_name = f"@{message.sender.username}"
-            
-            if message.text:  # Only process messages with text content
-                # Parse trading signal
-                trading_signal = parse_trading_signal(message.text)
-                
-                if trading_signal:
-                    total_signals_count += 1
-                    if trading_signal['type'] == 'buy':
-                        buy_signals_count += 1
-                    else:
-                        sell_signals_count += 1
-                    
-                    print("\n" + "="*50)
-                    print("🎯 FOUND TRADING SIGNAL!")
-                    print(f"📅 Date: {message.date.strftime('%Y-%m-%d %H:%M:%S')}")
-                    print(f"👤 From: {sender_name}")
-                    print(f"📊 Type: {trading_signal['type'].upper()}")
-                    print(f"💰 Instrument: {trading_signal['instrument']}")
-                    print(f"🎯 Entry: {trading_signal['entry']}")
-                    print(f"🛑 SL: {', '.join(map(str, trading_signal['sl']))}")
-                    print(f"🎯 TPs: {', '.join(map(str, trading_signal['tps']))}")
-                    print("="*50 + "\n")
-                    print("Original Message:")
-                    print(message.text)
-                    print("="*50 + "\n")
-                
-                message_data = {
-                    "channel": channel.title,
-                    "sender": sender_name,
-                    "text": message.text,
-                    "timestamp": message.date.isoformat(),
-                    "is_trading_signal": trading_signal is not None,
-                    "trading_signal": trading_signal
-                }
-                await broadcast_message(message_data)
-            else:
-                print("⚠️ Message has no text content (might be media only)")
+        # Parse and broadcast messages in batches as they arrive
+        pending = []
+        newest_id = 0
+        async for message in client.iter_messages(channel.input_peer(), limit=limit, min_id=min_id):
+            total_messages += 1
+            newest_id = max(newest_id, message.id)
+            if not message.text:
+                logger.info("⚠️ Message has no text content (might be media only)")
+                continue
+            pending.append(message)
+            if len(pending) >= batch_size:
+                await process_message_batch(channel, pending, counts)
+                pending = []
+        if pending:
+            await process_message_batch(channel, pending, counts)
+        
+        # Everything up to the newest message is recorded; live messages may move it on
+        if newest_id:
+            checkpoints.advance(channel.id, newest_id)
+        backfilled_channels.add(channel.id)
         
-        print("\n📊 Signal Analysis Summary:")
-        print(f"Total Messages Scanned: {len(messages)}")
-        print(f"Total Trading Signals Found: {total_signals_count}")
-        print(f"BUY Signals: {buy_signals_count}")
-        print(f"SELL Signals: {sell_signals_count}")
-        print("="*50 + "\n")
+        logger.info(f"\n📊 Signal Analysis Summary ({channel.title}):")
+        logger.info(f"Total Messages Scanned: {total_messages}")
+        logger.info(f"Total Trading Signals Found: {counts['buy'] + counts['sell']}")
+        logger.info(f"BUY Signals: {counts['buy']}")
+        logger.info(f"SELL Signals: {counts['sell']}")
+        logger.info("="*50 + "\n")
         
     except Exception as e:
-        print(f"❌ Error getting messages from {channel.title}: {str(e)}")
-        print("⚠️ Please check if you have access to this channel")
+        logger.info(f"❌ Error getting messages from {channel.title}: {str(e)}")
+        logger.info("⚠️ Please check if you have access to this channel")
+
+async def backfill_channels(client, channels, concurrency=BACKFILL_CONCURRENCY):
+    """Fetch history for several channels concurrently"""
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def backfill(channel):
+        async with semaphore:
+            await get_last_messages(client, channel)
+    
+    await asyncio.gather(*(backfill(channel) for channel in channels))
 
 async def websocket_handler(websocket, path):
-    await register(websocket)
+    from websockets.exceptions import ConnectionClosed
+    
+    try:
+        _, encoding, epoch, resume, subscription = parse_connect_params(path)
+    except ProtocolError as e:
+        logger.info(f"⚠️ Rejected websocket client: {str(e)}")
+        await websocket.close(code=1002, reason=str(e))
+        return
+    
+    await register(websocket, encoding, subscription)
     try:
-        # Send a welcome message
-        await websocket.send(json.dumps({
-            "type": "system",
-            "message": "Connected to Telegram bot server"
-        }))
+        # Snapshot or missed deltas, queued before any new broadcast
+        for frame in feed.catch_up(epoch, resume, subscription):
+            broadcaster.send_to(websocket, frame)
         
-        # Keep the connection alive
+        # Handle subscription changes until the client disconnects
         async for message in websocket:
             try:
-                # Handle incoming messages if needed
                 data = json.loads(message)
-                print(f"📥 Received from client: {data}")
             except json.JSONDecodeError:
-                print("⚠️ Received invalid JSON from client")
-    except websockets.exceptions.ConnectionClosed:
-        print("⚠️ Client connection closed unexpectedly")
+                logger.info("⚠️ Received invalid JSON from client")
+                continue
+            if not isinstance(data, dict) or data.get("type") != "subscribe":
+                logger.info(f"📥 Received from client: {data}")
+                continue
+            try:
+                subscription = Subscription.from_request(data)
+            except ProtocolError as e:
+                logger.info(f"⚠️ Invalid subscription from client: {str(e)}")
+                continue
+            # Switch and send the matching snapshot before any new broadcast
+            broadcaster.subscribe(websocket, subscription, feed.seq)
+            broadcaster.send_to(websocket, feed.snapshot(subscription))
+    except ConnectionClosed:
+        logger.info("⚠️ Client connection closed unexpectedly")
     finally:
         await unregister(websocket)
 
-def parse_trading_signal(message_text):
-    """Parse trading signals from message text"""
-    # Split message into lines and clean them
-    lines = [line.strip() for line in message_text.split('\n') if line.strip()]
-    
-    # Check if message follows the expected format
-    if len(lines) < 3:  # At least need instrument, entry, and one TP
-        return None
-
-    # Initialize signal data
-    signal = {
-        "type": None,  # buy or sell
-        "instrument": None,
-        "entry": None,
-        "sl": [],  # Changed to array to handle multiple SL values
-        "tps": []
-    }
+def signal_level_updates(tickets, signal):
+    """SL/TP updates applying an edited signal's levels to the positions of its TP ladder"""
+    tps = signal['tps']
+    return [
+        (ticket, signal['instrument'], signal['sl'][0], tps[min(i, len(tps) - 1)])
+        for i, ticket in enumerate(tickets)
+    ]
 
-    # Parse first line for instrument, type, and possibly entry
-    first_line = lines[0].lower()
+class MessageContext:
+    """State carried by one Telegram message through the ingest pipeline"""
     
-    # Check for instrument
-    if 'gold' in first_line or 'xauusd' in first_line:
-        signal["instrument"] = "XAUUSD" if 'xauusd' in first_line else "Gold"
+    __slots__ = ("event", "message", "chat", "sender_name", "trading_signal", "follow_up",
+                 "message_data", "published", "turn", "priority", "received_at")
     
-    # Check for type and extract entry if present
-    if 'buy' in first_line:
-        signal["type"] = "buy"
-        # Try to extract entry from first line
-        try:
-            # Look for numbers after 'buy'
-            numbers = re.findall(r'\d+\.?\d*', first_line.split('buy')[1])
-            if numbers:
-                signal["entry"] = float(numbers[0])
-        except (ValueError, IndexError):
-            pass
-    elif 'sell' in first_line:
-        signal["type"] = "sell"
-        # Try to extract entry from first line
-        try:
-            # Look for numbers after 'sell'
-            numbers = re.findall(r'\d+\.?\d*', first_line.split('sell')[1])
-            if numbers:
-                signal["entry"] = float(numbers[0])
-        except (ValueError, IndexError):
-            pass
-
-    # Parse remaining lines
-    for line in lines[1:]:
-        line = line.lower()
-        # Extract entry price if not found in first line
-        if line.startswith('entry') and signal["entry"] is None:
-            try:
-                signal["entry"] = float(line.split('entry')[1].strip())
-            except (ValueError, IndexError):
-                pass
-        # Extract stop loss (can have multiple values)
-        elif line.startswith('sl'):
-            try:
-                sl_values = line.split('sl')[1].strip().split()
-                for sl_value in sl_values:
-                    signal["sl"].append(float(sl_value))
-            except (ValueError, IndexError):
-                pass
-        # Extract take profits
-        elif line.startswith('tp'):
-            try:
-                tp_value = float(line.split('tp')[1].strip())
-                signal["tps"].append(tp_value)
-            except (ValueError, IndexError):
-                pass
-
-    # If entry is still not found, try to find it in any line
-    if signal["entry"] is None:
-        for line in lines:
-            try:
-                # Look for a number that could be an entry price
-                numbers = re.findall(r'\d+\.?\d*', line)
-                if numbers:
-                    potential_entry = float(numbers[0])
-                    # If this is a reasonable price for XAUUSD/Gold
-                    if 1000 < potential_entry < 10000:
-                        signal["entry"] = potential_entry
-                        break
-            except ValueError:
-                pass
-
-    # Sort values appropriately
-    if signal["type"] == "buy":
-        signal["sl"].sort()  # Ascending for buy
-        signal["tps"].sort()  # Ascending for buy
-    else:  # sell
-        signal["sl"].sort(reverse=True)  # Descending for sell
-        signal["tps"].sort(reverse=True)  # Descending for sell
-
-    # Only return signal if we have all required components
-    if (signal["type"] and 
-        signal["instrument"] and 
-        signal["entry"] is not None and 
-        signal["sl"] and  # At least one SL value
-        signal["tps"]):
-        return signal
-    return None
+    def __init__(self, event, priority):
+        self.event = event
+        self.message = event.message
+        self.chat = None
+        self.sender_name = None
+        self.trading_signal = None
+        self.follow_up = None
+        self.message_data = None
+        self.published = False
+        self.turn = None
+        self.priority = priority
+        self.received_at = time.perf_counter()
 
-async def handle_new_message(event):
-    # Get the chat where the message was sent
-    chat = await event.get_chat()
-    print(f"\n📩 New message from channel: {chat.title}")
+async def resolve_message(ctx):
+    """Pipeline stage: resolve chat and sender, skip already processed messages"""
+    with metrics.span("telegram_receive"):
+        # Get the chat where the message was sent, from the cache when possible
+        event = ctx.event
+        ctx.chat = entity_cache.get(event.chat_id)
+        if ctx.chat is None:
+            ctx.chat = entity_cache.put(await event.get_chat(), event.chat_id)
+        
+        # Skip messages already handled; the startup backfill only publishes,
+        # so a signal it saw is still executed here, without publishing it again
+        message = ctx.message
+        state = checkpoints.get_state(ctx.chat.id, message.id, message.edit_date)
+        if state is not NOT_PROCESSED:
+            if state[1]:
+                return None
+            ctx.published = True
+        
+        # Get the sender of the message
+        ctx.sender_name = entity_cache.sender_name(message)
     
-    # Get the sender of the message
-    sender_name = "Channel Admin"
-    if event.message.sender:
-        if hasattr(event.message.sender, 'first_name'):
-            sender_name = f"{event.message.sender.first_name} {event.message.sender.last_name or ''}".strip()
-        elif hasattr(event.message.sender, 'title'):
-            sender_name = event.message.sender.title
-        elif hasattr(event.message.sender, 'username'):
-            sender_name = f"@{event.message.sender.username}"
+    logger.info(f"\n📩 New message from channel: {ctx.chat.title}")
+    return "parse", ctx
+
+async def parse_message(ctx):
+    """Pipeline stage: parse the signal and route signals to the executor"""
+    message = ctx.message
     
     # Parse trading signal if present
-    trading_signal = parse_trading_signal(event.message.text)
+    with metrics.span("parse"):
+        trading_signal = parse_trading_signal(message.text, ctx.chat.peer_id)
+    # Until the channel's backfill is done, older messages may still be missing
+    checkpoints.mark_processed(ctx.chat.id, [(message.id, message.edit_date, trading_signal)],
+                               advance=ctx.chat.id in backfilled_channels)
     
     # Create message data for frontend
-    message_data = {
-        "channel": chat.title,
-        "sender": sender_name,
-        "text": event.message.text,
-        "timestamp": event.message.date.isoformat(),
+    ctx.trading_signal = trading_signal
+    ctx.message_data = {
+        "channel": ctx.chat.title,
+        "sender": ctx.sender_name,
+        "text": message.text,
+        "timestamp": message.date.isoformat(),
         "is_trading_signal": trading_signal is not None,
         "trading_signal": trading_signal
     }
     
-    # If it's a trading signal, try to place the order
+    # Signals take the priority lane from here on
+    ctx.priority = trading_signal is not None
     if trading_signal:
-        print("\n🎯 Attempting to place order based on signal...")
-        order_placed = trading_platform.place_order(trading_signal)
-        if order_placed:
-            message_data["order_status"] = "success"
+        metrics.inc("signals_parsed")
+        # Taken here, in arrival order, so an edit runs after the original's orders
+        ctx.turn = execute_turns.reserve((ctx.chat.id, message.id))
+        return "execute", ctx
+    
+    # Replies in a placed signal's thread may move its SL or close it; a reply
+    # to a signal whose orders are still being placed waits for them
+    ctx.follow_up = lifecycle.match_follow_up(ctx.chat.id, message)
+    reply_to = getattr(message, 'reply_to_msg_id', None)
+    thread = (ctx.chat.id, reply_to)
+    if ctx.follow_up is not None or (
+            reply_to is not None and execute_turns.pending(thread) and parse_follow_up(message.text)):
+        ctx.priority = True
+        ctx.turn = execute_turns.reserve(thread)
+        return "execute", ctx
+    return "publish", ctx
+
+async def execute_follow_up(ctx):
+    """Apply a reply's instructions (TP hit, SL to entry, close) to its signal's positions"""
+    tracked, actions = ctx.follow_up
+    message_data = ctx.message_data
+    lifecycle.link(ctx.chat.id, ctx.message.id, tracked)
+    updates, closes = lifecycle.apply(tracked, actions)
+    message_data["follow_up"] = [action for action, _ in actions]
+    
+    if closes:
+        logger.info(f"\n🛑 Follow-up: closing {len(closes)} positions...")
+        results = await order_executor.run(trading_platform.cancel_orders, closes)
+        message_data["order_status"] = "closed" if all(r["success"] for r in results) else "failed"
+    elif updates:
+        logger.info(f"\n✏️ Follow-up: moving SL of {len(updates)} positions to {updates[0][2]}...")
+        results = await sltp_coalescer.modify_many(updates)
+        message_data["order_status"] = "modified" if all(results) else "failed"
+    else:
+        message_data["order_status"] = "unchanged"
+    
+    if not tracked.open_legs:
+        lifecycle.forget(tracked)
+
+async def execute_signal(ctx):
+    """Pipeline stage: place, skip or modify orders for a parsed signal or follow-up"""
+    await ctx.turn.wait()
+    try:
+        if ctx.trading_signal is None:
+            # The signal replied to may have been placed while this waited
+            ctx.follow_up = lifecycle.match_follow_up(ctx.chat.id, ctx.message)
+            if ctx.follow_up is not None:
+                await execute_follow_up(ctx)
         else:
-            message_data["order_status"] = "failed"
+            await execute_trading_signal(ctx)
+    finally:
+        ctx.turn.release()
+    return "publish", ctx
+
+async def execute_trading_signal(ctx):
+    """Place orders for a new signal, or apply an edit's levels to its positions"""
+    
+    trading_signal = ctx.trading_signal
+    message_data = ctx.message_data
     
+    # Edits only ever modify positions: an old post edited to add "TP1 ✅"
+    # must not open a trade at its stale entry
+    edited = ctx.message.edit_date is not None
+    decision, record = signal_dedup.check(ctx.chat.id, ctx.message.id, trading_signal, edited=edited)
+    if decision == DUPLICATE:
+        logger.info("\n♻️ Duplicate signal, order already handled")
+        message_data["order_status"] = "duplicate"
+    elif decision in (MODIFIED, UNKNOWN_EDIT):
+        tracked = lifecycle.find(ctx.chat.id, ctx.message.id)
+        if tracked is not None:
+            updates = lifecycle.update_levels(tracked, trading_signal)
+        elif record is not None and record.tickets:
+            updates = signal_level_updates(record.tickets, trading_signal)
+        else:
+            updates = []
+        if updates:
+            logger.info(f"\n✏️ Signal edited, modifying {len(updates)} positions...")
+            results = await sltp_coalescer.modify_many(updates)
+            message_data["order_status"] = "modified" if all(results) else "failed"
+        else:
+            logger.info("\n✏️ Signal edited, but no open position is known for it")
+            message_data["order_status"] = "skipped"
+    else:
+        logger.info("\n🎯 Attempting to place orders for every TP of the signal...")
+        report = await order_executor.place_signal_orders(trading_signal)
+        record.tickets = [leg["ticket"] for leg in report["legs"] if leg["success"]]
+        lifecycle.track(ctx.chat.id, ctx.message.id, trading_signal, report["legs"])
+        message_data["order_status"] = "success" if report["success"] else "failed"
+        message_data["orders"] = report["legs"]
+
+async def publish_message(ctx):
+    """Pipeline stage: log the message and publish it on the signal bus"""
     # Print the message in a formatted way
     print_message(
-        chat_title=chat.title,
-        sender_name=sender_name,
-        message_text=event.message.text,
-        message_date=event.message.date
+        chat_title=ctx.chat.title,
+        sender_name=ctx.sender_name,
+        message_text=ctx.message.text,
+        message_date=ctx.message.date
+    )
+    
+    # Publish to the bus, which feeds websocket clients and the API server
+    if not ctx.published:
+        with metrics.span("broadcast"):
+            await signal_bus.publish([ctx.message_data])
+    checkpoints.mark_executed(ctx.chat.id, ctx.message.id, ctx.message.edit_date)
+    metrics.observe("message_total", time.perf_counter() - ctx.received_at)
+    if ctx.trading_signal:
+        readiness.done("first_signal")
+    return None
+
+# Telegram -> resolve -> parse -> execute (signals only) -> publish
+ingest_pipeline = Pipeline([
+    Stage("resolve", resolve_message, workers=PIPELINE_RESOLVE_WORKERS, capacity=PIPELINE_CAPACITY),
+    Stage("parse", parse_message, workers=1, capacity=PIPELINE_CAPACITY),
+    Stage("execute", execute_signal, workers=PIPELINE_EXECUTE_WORKERS, capacity=PIPELINE_CAPACITY),
+    Stage("publish", publish_message, workers=1, capacity=PIPELINE_CAPACITY),
+])
+metrics.register_stats("pipeline", ingest_pipeline.get_stats)
+
+async def handle_new_message(event):
+    """Telegram callback: feed the message into the ingest pipeline"""
+    metrics.inc("messages_received")
+    # Likely signals skip ahead of chatter; waits here when the pipeline is full
+    priority = is_signal_candidate(event.message.text, event.chat_id)
+    await ingest_pipeline.submit(MessageContext(event, priority), priority)
+
+async def resolve_channel(client, channel_username):
+    """Look up a channel entity over the network"""
+    # Try to get the channel by its username
+    try:
+        return await client.get_entity(channel_username)
+    except ValueError:
+        pass
+    # If that fails, try with the @ symbol
+    try:
+        return await client.get_entity(f"@{channel_username}")
+    except ValueError:
+        pass
+    # If that fails, try to get the channel by invite link
+    try:
+        # First try without @
+        return await client.get_entity(f"https://t.me/{channel_username}")
+    except ValueError:
+        # Then try with @
+        return await client.get_entity(f"https://t.me/@{channel_username}")
+
+def build_bot_api():
+    """HTTP API for the bot process: metrics, liveness and readiness"""
+    from fastapi import FastAPI
+    
+    app = FastAPI()
+    add_metrics_endpoint(app)
+    add_health_endpoints(app, readiness)
+    return app
+
+async def import_in_background(*names):
+    """Import heavy modules on a worker thread so the event loop keeps running"""
+    # run_in_executor rather than asyncio.to_thread, which needs Python 3.9
+    await asyncio.get_running_loop().run_in_executor(
+        None, lambda: [importlib.import_module(name) for name in names]
+    )
+
+async def start_servers():
+    """Bind the websocket feed, the signal bus and the HTTP API"""
+    await import_in_background("websockets", "fastapi", "uvicorn")
+    import websockets
+    
+    logger.info("\n🌐 Starting WebSocket server...")
+    websocket_server = await websockets.serve(
+        websocket_handler,
+        "0.0.0.0",
+        8765,
+        ping_interval=30,  # Send ping every 30 seconds
+        ping_timeout=10,   # Wait 10 seconds for pong
+        close_timeout=10,  # Wait 10 seconds before closing
+        max_size=2**20,   # 1MB max message size
+        compression=None if FEED_COMPRESSION == 'none' else FEED_COMPRESSION
     )
+    logger.info("✅ WebSocket server started on ws://0.0.0.0:8765")
     
-    # Broadcast to all connected clients
-    await broadcast_message(message_data)
+    # Let the API server and other consumers subscribe to parsed messages
+    await signal_bus.start()
+    
+    # Serve stage latency histograms and health checks
+    metrics_server = asyncio.create_task(serve_app(build_bot_api(), "0.0.0.0", METRICS_PORT))
+    logger.info(f"✅ Metrics and health checks on http://0.0.0.0:{METRICS_PORT} (/metrics, /healthz, /readyz)")
+    readiness.done("servers")
+    return websocket_server, metrics_server
+
+async def connect_mt5():
+    """Connect to MT5 on the worker thread, then start the jobs that keep the session warm"""
+    order_executor.start()
+    if await order_executor.run(trading_platform.connect):
+        readiness.done("mt5")
+    else:
+        logger.info("❌ Failed to connect to MT5. Please check your credentials.")
+        logger.info("⚠️ The MT5 supervisor will keep retrying in the background")
+    
+    mt5_supervisor.start()
+    
+    # Keep symbol metadata and balance/equity warm, refreshing them on the MT5 worker thread
+    trading_platform.symbol_cache.start_refresh(run=order_executor.submit)
+    trading_platform.account_cache.start_refresh(run=order_executor.submit)
+
+async def login_telegram(client=None):
+    """Create the Telegram client unless one is given, log in and return it"""
+    await import_in_background("telethon")
+    if client is None:
+        from telethon import TelegramClient
+        client = TelegramClient('session_name', int(API_ID), API_HASH)
+    readiness.add_check("telegram_connected", client.is_connected)
+    
+    logger.info("🔑 Connecting to Telegram...")
+    await client.start(phone=PHONE)
+    logger.info("✅ Successfully connected to Telegram!")
+    readiness.done("telegram")
+    return client
 
-async def main():
-    print("\n🚀 Starting Telegram Bot...")
+async def main(client=None):
+    # Console writes happen on a listener thread, not the event loop
+    setup_queue_logging()
+    logger.info("\n🚀 Starting Telegram Bot...")
+    open_stores()
     
-    # Create the client
-    client = TelegramClient('session_name', API_ID, API_HASH)
+    # Ready once listening to channels, with the MT5 and Telegram sessions up
+    readiness.start("servers", "telegram", "channels")
+    readiness.add_check("mt5_connected", lambda: trading_platform.connected)
     
     try:
-        print("🔑 Connecting to Telegram...")
-        await client.start(phone=PHONE)
-        print("✅ Successfully connected to Telegram!")
-        
-        # Start WebSocket server with more robust configuration
-        print("\n🌐 Starting WebSocket server...")
-        websocket_server = await websockets.serve(
-            websocket_handler,
-            "0.0.0.0",
-            8765,
-            ping_interval=30,  # Send ping every 30 seconds
-            ping_timeout=10,   # Wait 10 seconds for pong
-            close_timeout=10,  # Wait 10 seconds before closing
-            max_size=2**20    # 1MB max message size
-        )
-        print("✅ WebSocket server started on ws://0.0.0.0:8765")
+        # None of these depend on each other, so bring them up together
+        _, _, client = await asyncio.gather(start_servers(), connect_mt5(), login_telegram(client))
         
         # Get the channel entities
         channels = []
         for channel_username in CHANNELS:
             try:
-                print(f"\n📡 Connecting to channel: {channel_username}")
-                # Try to get the channel by its username
-                try:
-                    channel = await client.get_entity(channel_username)
-                except ValueError:
-                    # If that fails, try with the @ symbol
-                    try:
-                        channel = await client.get_entity(f"@{channel_username}")
-                    except ValueError:
-                        # If that fails, try to get the channel by invite link
-                        try:
-                            # First try without @
-                            channel = await client.get_entity(f"https://t.me/{channel_username}")
-                        except ValueError:
-                            # Then try with @
-                            channel = await client.get_entity(f"https://t.me/@{channel_username}")
+                logger.info(f"\n📡 Connecting to channel: {channel_username}")
+                # Reuse the handle resolved by a previous run
+                channel = entity_cache.get_by_username(channel_username)
+                if channel is None or channel.access_hash is None:
+                    channel = entity_cache.put(await resolve_channel(client, channel_username))
+                else:
+                    logger.info("⚡ Using cached channel handle")
                 
+                if channel_username in CHANNEL_FORMATS:
+                    parser_registry.assign(channel.peer_id, CHANNEL_FORMATS[channel_username])
                 channels.append(channel)
-                print(f"✅ Connected to channel: {channel.title}")
-                print(f"🔍 Channel ID: {channel.id}")
-                print(f"🔍 Channel username: {channel.username}")
-                print(f"🔍 Channel access hash: {channel.access_hash}")
-                
-                # Fetch last messages from this channel
-                await get_last_messages(client, channel)
+                logger.info(f"✅ Connected to channel: {channel.title}")
+                logger.info(f"🔍 Channel ID: {channel.id}")
+                logger.info(f"🔍 Channel username: {channel.username}")
+                logger.info(f"🔍 Channel access hash: {channel.access_hash}")
                 
             except Exception as e:
-                print(f"❌ Failed to connect to channel {channel_username}: {str(e)}")
-                print("⚠️ Please make sure you are a member of this channel and the username is correct")
+                logger.info(f"❌ Failed to connect to channel {channel_username}: {str(e)}")
+                logger.info("⚠️ Please make sure you are a member of this channel and the username is correct")
         
         if not channels:
-            print("❌ No channels found. Please check the channel usernames and make sure you are a member.")
+            logger.info("❌ No channels found. Please check the channel usernames and make sure you are a member.")
             return
         
-        print(f"\n✅ Successfully connected to {len(channels)} channels")
+        logger.info(f"\n✅ Successfully connected to {len(channels)} channels")
+        
+        # Start the ingest pipeline workers
+        await ingest_pipeline.start()
+        
+        # Listen for new messages before backfilling so none are missed
+        from telethon import events
+        peers = [channel.input_peer() for channel in channels]
+        client.add_event_handler(handle_new_message, events.NewMessage(chats=peers))
+        client.add_event_handler(handle_new_message, events.MessageEdited(chats=peers))
+        readiness.done("channels")
         
-        @client.on(events.NewMessage(chats=channels))
-        async def handle_new_message(event):
-            await handle_new_message(event)
+        # Fetch last messages from all channels concurrently
+        await backfill_channels(client, channels)
+        readiness.done("backfill")
         
         # Keep the script running
-        print("\n🎯 Bot is now running and monitoring channels...")
-        print("Press Ctrl+C to stop.\n")
+        logger.info("\n🎯 Bot is now running and monitoring channels...")
+        logger.info("Press Ctrl+C to stop.\n")
         await client.run_until_disconnected()
         
     except Exception as e:
-        print(f"\n❌ Fatal error: {str(e)}")
-        print("⚠️ Please check your credentials and internet connection")
+        logger.info(f"\n❌ Fatal error: {str(e)}")
+        logger.info("⚠️ Please check your credentials and internet connection")
 
 if __name__ == '__main__':
-    asyncio.run(main()) 
\ No newline at end of file
+    asyncio.run(main()) 
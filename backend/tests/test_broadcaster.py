@@ -0,0 +1,105 @@
+import asyncio
+import json
+
+import pytest
+
+from broadcaster import DISCONNECT, DROP_NEWEST, DROP_OLDEST, Broadcaster
+from feed_protocol import FeedLog
+
+
+class FakeWebSocket:
+    """Records sent frames; a slow one blocks in send() until released"""
+
+    def __init__(self, slow=False):
+        self.frames = []
+        self.released = asyncio.Event()
+        if not slow:
+            self.released.set()
+        self.closed = None
+
+    async def send(self, payload):
+        await self.released.wait()
+        self.frames.append(json.loads(payload))
+
+    async def close(self, code=None, reason=None):
+        self.closed = code
+
+    def seqs(self):
+        return [(frame["prev"], frame["seq"]) for frame in self.frames]
+
+
+def message(i):
+    return {"channel": "Gold", "sender": "admin", "text": f"message {i}", "timestamp": str(i)}
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+async def publish_burst(policy):
+    """One fast and one stuck client with two-frame queues, then four deltas"""
+    broadcaster = Broadcaster(max_queue_size=2, policy=policy)
+    feed = FeedLog()
+    fast, slow = FakeWebSocket(), FakeWebSocket(slow=True)
+    broadcaster.register(fast)
+    broadcaster.register(slow)
+
+    # The slow client's writer takes the first delta and blocks sending it
+    broadcaster.publish(*feed.append([message(1)]))
+    await settle()
+    for i in range(2, 5):
+        broadcaster.publish(*feed.append([message(i)]))
+        await settle()
+    slow.released.set()
+    await settle()
+    return broadcaster, fast, slow
+
+
+def test_fast_client_gets_every_delta_while_another_is_stuck():
+    async def scenario():
+        broadcaster, fast, _ = await publish_burst(DROP_OLDEST)
+        assert fast.seqs() == [(0, 1), (1, 2), (2, 3), (3, 4)]
+        await broadcaster.unregister(fast)
+
+    asyncio.run(scenario())
+
+
+def test_drop_oldest_leaves_a_detectable_gap():
+    async def scenario():
+        broadcaster, _, slow = await publish_burst(DROP_OLDEST)
+        # Delta 2 was coalesced away; delta 3's prev is ahead of the client's position
+        assert slow.seqs() == [(0, 1), (2, 3), (3, 4)]
+        assert broadcaster.get_stats()["drops"] == 1
+        assert broadcaster.clients[slow].dropped == 1
+        assert len(broadcaster) == 2
+
+    asyncio.run(scenario())
+
+
+def test_drop_newest_keeps_the_queued_deltas():
+    async def scenario():
+        broadcaster, _, slow = await publish_burst(DROP_NEWEST)
+        assert slow.seqs() == [(0, 1), (1, 2), (2, 3)]
+        assert broadcaster.get_stats()["drops"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_disconnect_evicts_the_slow_client():
+    async def scenario():
+        broadcaster, fast, slow = await publish_burst(DISCONNECT)
+        assert slow.closed == 1008
+        assert slow not in broadcaster.clients
+        # Its writer was cancelled mid-send, so nothing after the eviction arrives
+        assert slow.seqs() == []
+        assert broadcaster.get_stats()["evictions"] == 1
+        assert len(fast.seqs()) == 4
+        assert len(broadcaster) == 1
+
+    asyncio.run(scenario())
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        Broadcaster(policy="block")
@@ -0,0 +1,43 @@
+from types import SimpleNamespace
+
+from checkpoint_store import NOT_PROCESSED, CheckpointStore
+
+SIGNAL = {"type": "buy", "instrument": "XAUUSD", "entry": 2350.0, "sl": [2338.0], "tps": [2353.0]}
+
+
+def message(message_id, edit_date=None):
+    return SimpleNamespace(id=message_id, edit_date=edit_date)
+
+
+def test_backfill_does_not_advance_until_done():
+    store = CheckpointStore(":memory:")
+    # Newest first, as iter_messages returns them; a crash here must not skip 1-5
+    store.mark_processed(1, [(10, None, None), (9, None, None)], advance=False)
+    assert store.get_checkpoint(1) == 0
+    store.advance(1, 10)
+    assert store.get_checkpoint(1) == 10
+    store.advance(1, 7)
+    assert store.get_checkpoint(1) == 10
+
+
+def test_published_signal_is_executed_once():
+    store = CheckpointStore(":memory:")
+    assert store.get_state(1, 5, None) is NOT_PROCESSED
+    store.mark_processed(1, [(5, None, SIGNAL)], advance=False)
+    assert store.get_state(1, 5, None) == (SIGNAL, False)
+    store.mark_executed(1, 5, None)
+    assert store.get_state(1, 5, None) == (SIGNAL, True)
+    # Re-delivery of the same version keeps its executed state
+    store.mark_processed(1, [(5, None, SIGNAL)])
+    assert store.get_state(1, 5, None) == (SIGNAL, True)
+    assert store.filter_unprocessed(1, [message(5), message(6)])[0].id == 6
+
+
+def test_processed_messages_are_pruned():
+    store = CheckpointStore(":memory:", keep_per_channel=20)
+    for message_id in range(1, 101):
+        store.mark_processed(1, [(message_id, None, None)])
+    count = store._conn.execute("SELECT COUNT(*) FROM processed_messages").fetchone()[0]
+    assert count <= 22
+    assert store.get_signal(1, 100, None) is None
+    assert store.get_signal(1, 1, None) is NOT_PROCESSED
@@ -0,0 +1,69 @@
+import asyncio
+import contextlib
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import telegram_bot
+from bench_pipeline import ReplayChat, ReplayEvent, ReplayMessage, reset_bot
+
+SIGNAL_TEXT = "XAUUSD BUY NOW 2300.0\n\nSL 2290.0\nTP 2305.0\nTP 2310.0"
+EDITED_TEXT = "XAUUSD BUY NOW 2300.0\n\nSL 2295.0\nTP 2305.0\nTP 2310.0"
+DATE = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def sltp_requests(backend):
+    return [request for _, request in backend.orders if request["action"] == backend.TRADE_ACTION_SLTP]
+
+
+async def run(events, delay=0.01):
+    """Feed events into the bot 10 ms apart while the first signal's orders are in flight"""
+    backend = reset_bot(broker_latency=0.05)
+    # One leg per TP
+    telegram_bot.trading_platform.default_volume = 0.02
+    await telegram_bot.ingest_pipeline.start()
+    try:
+        for event in events:
+            await telegram_bot.handle_new_message(event)
+            await asyncio.sleep(delay)
+        # Orders, the SL/TP batch window and the modify round trips
+        for _ in range(200):
+            await asyncio.sleep(0.01)
+            if not len(telegram_bot.execute_turns) and sltp_requests(backend):
+                break
+        await asyncio.sleep(0.2)
+    finally:
+        await telegram_bot.ingest_pipeline.stop()
+        telegram_bot.order_executor.stop()
+    return backend
+
+
+@pytest.fixture(autouse=True)
+def quiet():
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def test_edit_during_placement_modifies_positions():
+    chat = ReplayChat(1000, "Channel")
+    signal = ReplayMessage(1, SIGNAL_TEXT, DATE)
+    edit = ReplayMessage(1, EDITED_TEXT, DATE)
+    edit.edit_date = DATE + timedelta(seconds=5)
+
+    backend = asyncio.run(run([ReplayEvent(chat, signal), ReplayEvent(chat, edit)]))
+
+    assert [position.sl for position in backend.positions.values()] == [2295.0, 2295.0]
+    assert len(sltp_requests(backend)) == 2
+
+
+def test_reply_during_placement_is_applied():
+    chat = ReplayChat(1000, "Channel")
+    signal = ReplayMessage(1, SIGNAL_TEXT, DATE)
+    reply = ReplayMessage(2, "Move SL to 2298", DATE + timedelta(seconds=1))
+    reply.reply_to_msg_id = 1
+
+    backend = asyncio.run(run([ReplayEvent(chat, signal), ReplayEvent(chat, reply)]))
+
+    assert [position.sl for position in backend.positions.values()] == [2298.0, 2298.0]
+    assert telegram_bot.lifecycle.find(chat.id, 2) is not None
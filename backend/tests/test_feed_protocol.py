@@ -0,0 +1,111 @@
+import asyncio
+import json
+
+import pytest
+
+from broadcaster import Broadcaster
+from feed_protocol import FIELDS, FeedLog, ProtocolError, Subscription, parse_connect_params
+
+SIGNAL = {"type": "buy", "instrument": "XAUUSD", "entry": 2300.0, "sl": [2290.0], "tps": [2305.0]}
+
+
+def message(i, channel="Gold", signal=None):
+    return {"channel": channel, "text": f"message {i}", "timestamp": str(i), "trading_signal": signal}
+
+
+def texts(rows):
+    return [row[FIELDS.index("text")] for row in rows]
+
+
+def test_append_numbers_rows_in_sequence():
+    feed = FeedLog()
+    assert feed.append([message(1), message(2)])[:2] == (0, 2)
+    prev, seq, rows = feed.append([message(3)])
+    assert (prev, seq, texts(rows)) == (2, 3, ["message 3"])
+
+
+def test_snapshot_holds_the_newest_matching_rows():
+    feed = FeedLog(snapshot_size=2)
+    feed.append([message(1), message(2, signal=SIGNAL), message(3), message(4, signal=SIGNAL)])
+    snapshot = feed.snapshot()
+    assert (snapshot["type"], snapshot["seq"], snapshot["epoch"]) == ("snapshot", 4, feed.epoch)
+    assert texts(snapshot["rows"]) == ["message 3", "message 4"]
+    assert texts(feed.snapshot(Subscription(signals_only=True))["rows"]) == ["message 2", "message 4"]
+
+
+def test_resume_replays_only_missed_rows():
+    feed = FeedLog()
+    feed.append([message(i) for i in range(1, 6)])
+    frames = feed.catch_up(feed.epoch, 3)
+    assert [(frame["type"], frame["prev"], frame["seq"]) for frame in frames] == [("delta", 3, 5)]
+    assert texts(frames[0]["rows"]) == ["message 4", "message 5"]
+    # Up to date: nothing to send
+    assert feed.catch_up(feed.epoch, 5) == []
+
+
+def test_resume_filters_missed_rows_by_subscription():
+    feed = FeedLog()
+    feed.append([message(1), message(2, channel="Forex"), message(3)])
+    frames = feed.catch_up(feed.epoch, 1, Subscription(channels=["Gold"]))
+    assert (frames[0]["prev"], frames[0]["seq"], texts(frames[0]["rows"])) == (1, 3, ["message 3"])
+
+
+@pytest.mark.parametrize("epoch_offset, resume", [
+    (0, 2),      # Evicted from the ring buffer
+    (0, 99),     # Ahead of the feed
+    (1, 8),      # From before a restart
+    (0, None),   # Fresh connection
+])
+def test_catch_up_falls_back_to_a_snapshot(epoch_offset, resume):
+    feed = FeedLog(capacity=5)
+    feed.append([message(i) for i in range(1, 11)])
+    frames = feed.catch_up(feed.epoch + epoch_offset, resume)
+    assert [frame["type"] for frame in frames] == ["snapshot"]
+    assert frames[0]["seq"] == 10
+    assert texts(frames[0]["rows"]) == [f"message {i}" for i in range(6, 11)]
+
+
+def test_oldest_buffered_position_still_resumes():
+    feed = FeedLog(capacity=5)
+    feed.append([message(i) for i in range(1, 11)])
+    frames = feed.catch_up(feed.epoch, 5)
+    assert frames[0]["type"] == "delta"
+    assert texts(frames[0]["rows"]) == [f"message {i}" for i in range(6, 11)]
+
+
+def test_group_deltas_chain_across_skipped_rows():
+    class Recorder:
+        def __init__(self):
+            self.frames = []
+
+        async def send(self, payload):
+            self.frames.append(json.loads(payload))
+
+    async def scenario():
+        broadcaster = Broadcaster()
+        feed = FeedLog()
+        gold, everything = Recorder(), Recorder()
+        broadcaster.register(gold, subscription=Subscription(channels=["Gold"]))
+        broadcaster.register(everything)
+        for batch in ([message(1)], [message(2, channel="Forex")], [message(3, channel="Forex")], [message(4)]):
+            broadcaster.publish(*feed.append(batch))
+            await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        return gold, everything
+
+    gold, everything = asyncio.run(scenario())
+    # No delta for rows outside the subscription, but no gap either: prev follows the last seq sent
+    assert [(frame["prev"], frame["seq"]) for frame in gold.frames] == [(0, 1), (1, 4)]
+    assert [(frame["prev"], frame["seq"]) for frame in everything.frames] == [(0, 1), (1, 2), (2, 3), (3, 4)]
+
+
+def test_connect_params():
+    version, encoding, epoch, resume, subscription = parse_connect_params(
+        "/?v=1&epoch=7&resume=42&channel=Gold&channel=Forex&instrument=XAUUSD"
+    )
+    assert (version, encoding, epoch, resume) == (1, "json", 7, 42)
+    assert subscription.channels == {"Gold", "Forex"} and subscription.signals_only
+    assert parse_connect_params("/")[2:4] == (None, None)
+    for path in ("/?v=2", "/?resume=abc", "/?encoding=xml"):
+        with pytest.raises(ProtocolError):
+            parse_connect_params(path)
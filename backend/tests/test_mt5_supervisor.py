@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from broker_backends import SimulatedMT5
+from mt5_supervisor import AccountWorkerPool, MT5Supervisor
+from trading_platform import TradingPlatform
+
+SIGNAL = {"type": "buy", "instrument": "XAUUSD", "entry": 2300.0, "sl": [2290.0], "tps": [2305.0, 2310.0]}
+
+
+class RecordingMT5(SimulatedMT5):
+    """SimulatedMT5 that records session setup and teardown calls"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.calls = []
+
+    def initialize(self, path=None, **kwargs):
+        self.calls.append("initialize")
+        return super().initialize(path, **kwargs)
+
+    def shutdown(self):
+        self.calls.append("shutdown")
+        super().shutdown()
+
+
+def test_check_shuts_down_a_lost_session_before_reconnecting():
+    backend = RecordingMT5()
+    platform = TradingPlatform(symbols=["XAUUSD"], backend=backend)
+    assert platform.connect()
+    supervisor = MT5Supervisor(platform, executor=None, initial_backoff=0)
+
+    # The terminal dropped its trade server connection; the platform has not noticed
+    backend.connected = False
+    backend.calls.clear()
+    assert supervisor.check()
+    assert backend.calls == ["shutdown", "initialize"]
+    assert platform.connected
+    assert supervisor.get_stats()["reconnects"] == 1
+
+
+def test_check_leaves_a_healthy_session_alone():
+    backend = RecordingMT5()
+    platform = TradingPlatform(backend=backend)
+    assert platform.connect()
+    supervisor = MT5Supervisor(platform, executor=None)
+    assert supervisor.check()
+    assert backend.calls == ["initialize"]
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    # Worker processes build their own platform, on the simulator
+    monkeypatch.setenv("BROKER_BACKEND", "sim")
+    pool = AccountWorkerPool({"main": {"symbols": ["XAUUSD"]}, "second": {"symbols": ["XAUUSD"]}},
+                             check_interval=0.1, max_attempts=1)
+    pool.start()
+    yield pool
+    pool.stop()
+
+
+def test_pool_places_a_signal_on_every_account(pool):
+    reports = asyncio.run(pool.place_signal_orders(dict(SIGNAL), accounts=["main", "second"]))
+    assert set(reports) == {"main", "second"}
+    assert all(report["success"] for report in reports.values())
+    # Each account has its own terminal
+    assert asyncio.run(pool.run("second", "get_order_book"))[0]["ticket"] == 1
+
+
+def test_pool_reports_worker_errors(pool):
+    with pytest.raises(AttributeError):
+        asyncio.run(pool.run("main", "no_such_method"))
+    reports = asyncio.run(pool.place_signal_orders({"instrument": "XAUUSD"}, accounts=["main"]))
+    # An invalid signal fails in the worker without raising
+    assert reports["main"]["success"] is False
+    # The worker keeps serving after an error
+    assert asyncio.run(pool.run("main", "get_account_info"))["balance"] > 0
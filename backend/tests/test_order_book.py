@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from broker_backends import SimulatedMT5
+from order_book import CancelBatcher, OrderBook, OrderBookPoller
+from order_executor import OrderExecutor
+from trading_platform import TradingPlatform
+
+SIGNAL = {"type": "buy", "instrument": "XAUUSD", "entry": 2300.0, "sl": [2290.0], "tps": [2305.0, 2310.0]}
+
+
+@pytest.fixture
+def platform():
+    # Two 0.01 legs for SIGNAL's two TPs
+    platform = TradingPlatform(symbols=["XAUUSD"], backend=SimulatedMT5(seed=1), default_volume=0.02)
+    assert platform.connect()
+    return platform
+
+
+@pytest.fixture
+def executor(platform):
+    executor = OrderExecutor(platform)
+    yield executor
+    executor.stop()
+
+
+def place_pending(platform, price):
+    mt5 = platform.mt5
+    return mt5.order_send({
+        "action": mt5.TRADE_ACTION_PENDING, "symbol": "XAUUSD", "type": mt5.ORDER_TYPE_BUY_LIMIT,
+        "volume": 0.01, "price": price, "sl": price - 10, "tp": price + 10
+    }).order
+
+
+def test_cancel_orders_removes_orders_and_closes_positions(platform):
+    report = platform.place_signal_orders(SIGNAL)
+    positions = [leg["ticket"] for leg in report["legs"]]
+    order = place_pending(platform, 2290.0)
+
+    results = platform.cancel_orders([order, *positions, 999])
+    assert [result["success"] for result in results] == [True, True, True, False]
+    assert platform.mt5.positions_get() == ()
+    assert platform.mt5.orders_get() == ()
+
+
+def test_cancel_orders_when_disconnected(platform):
+    platform.connected = False
+    assert platform.cancel_orders([1]) == [{"ticket": 1, "success": False, "message": "Not connected to MT5"}]
+
+
+def test_book_versions_only_change_with_the_book():
+    async def scenario():
+        book = OrderBook()
+        assert book.update([])
+        assert not book.update([])
+        subscriber = book.subscribe()
+        waiter = asyncio.create_task(book.wait_for_change(book.version, timeout=5))
+        await asyncio.sleep(0)
+        assert book.update([{"ticket": 1}])
+        assert (await waiter)["version"] == 2
+        book.update([{"ticket": 2}])
+        # Subscribers only keep the latest book
+        assert subscriber.get_nowait()["orders"] == [{"ticket": 2}]
+        book.unsubscribe(subscriber)
+        assert book.get_stats()["subscribers"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_poller_and_cancel_batcher(platform, executor):
+    async def scenario():
+        book = OrderBook()
+        poller = OrderBookPoller(book, executor, platform, interval=60)
+        batcher = CancelBatcher(executor, platform, poller, window=0.01)
+        tickets = [place_pending(platform, 2290.0 - i) for i in range(3)]
+
+        assert await poller.poll()
+        assert sorted(order["ticket"] for order in book.orders) == sorted(tickets)
+
+        poller.start()
+        results = await asyncio.gather(batcher.cancel(tickets[0]), batcher.cancel_many(tickets[1:]))
+        assert results[0]["success"] and all(result["success"] for result in results[1])
+        # One cancel_orders call for all three, then the poke refreshes the book
+        assert batcher.get_stats()["batches"] == 1
+        if book.orders:
+            await book.wait_for_change(book.version, timeout=5)
+        await poller.stop()
+        return book.orders
+
+    assert asyncio.run(scenario()) == []
+
+
+def test_poll_failure_keeps_the_book(platform, executor):
+    async def scenario():
+        book = OrderBook()
+        poller = OrderBookPoller(book, executor, platform)
+        platform.connected = False
+        assert not await poller.poll()
+        return poller.get_stats(), book.version
+
+    stats, version = asyncio.run(scenario())
+    assert stats == {"polls": 1, "failed_polls": 1}
+    assert version == 0
@@ -0,0 +1,27 @@
+import asyncio
+
+from order_executor import OrderExecutor
+
+
+class FakePlatform:
+    def place_signal_orders(self, signal, total_volume=None):
+        return {"success": True, "legs": [], "wall_time_ms": 0.0}
+
+    def is_healthy(self):
+        return True
+
+
+def test_only_order_placement_counts_as_order_latency():
+    executor = OrderExecutor(FakePlatform())
+
+    async def scenario():
+        for _ in range(5):
+            assert await executor.run(executor.trading_platform.is_healthy)
+        report = await executor.place_signal_orders({"instrument": "XAUUSD"})
+        assert report["success"]
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        executor.stop()
+    assert executor.get_stats()["orders_processed"] == 1
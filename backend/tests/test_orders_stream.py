@@ -0,0 +1,38 @@
+import asyncio
+
+import pytest
+
+main = pytest.importorskip("main")
+
+
+class FakeWebSocket:
+    """Client that reads the first book, then disconnects"""
+
+    def __init__(self):
+        self.sent = []
+        self.gone = asyncio.Event()
+
+    async def accept(self):
+        pass
+
+    async def send_json(self, data):
+        self.sent.append(data)
+
+    async def receive(self):
+        await self.gone.wait()
+        return {"type": "websocket.disconnect", "code": 1000}
+
+
+def test_stream_unsubscribes_on_disconnect_without_book_change():
+    async def scenario():
+        websocket = FakeWebSocket()
+        stream = asyncio.create_task(main.stream_orders(websocket))
+        await asyncio.sleep(0.01)
+        assert main.mt5_control.order_book.get_stats()["subscribers"] == 1
+        websocket.gone.set()
+        await asyncio.wait_for(stream, 5)
+        return websocket.sent
+
+    sent = asyncio.run(scenario())
+    assert len(sent) == 1
+    assert main.mt5_control.order_book.get_stats()["subscribers"] == 0
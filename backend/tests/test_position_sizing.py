@@ -0,0 +1,113 @@
+from types import SimpleNamespace
+
+import pytest
+
+from broker_backends import SimulatedMT5
+from position_sizing import ExposureBook, PositionSizer, floor_volume, lot_risk
+from trading_platform import TradingPlatform
+
+# Like SimulatedMT5's XAUUSD: one lot moves 100 per 1.00 of price
+GOLD = SimpleNamespace(trade_tick_size=0.01, trade_tick_value=1.0, point=0.01,
+                       volume_min=0.01, volume_max=100.0, volume_step=0.01)
+ACCOUNT = {"equity": 10000.0}
+
+
+def signal(instrument="XAUUSD", entry=2300.0, sl=2290.0, tps=(2305.0, 2310.0)):
+    return {"type": "buy", "instrument": instrument, "entry": entry, "sl": [sl], "tps": list(tps)}
+
+
+def test_lot_risk_and_floor_volume():
+    assert lot_risk(2300.0, 2290.0, GOLD) == pytest.approx(1000.0)
+    assert lot_risk(2300.0, 2290.0, SimpleNamespace()) == 0.0
+    assert floor_volume(0.3, 0.1) == 0.3
+    assert floor_volume(0.129, 0.01) == 0.12
+
+
+def test_size_risks_a_share_of_equity():
+    sizer = PositionSizer(risk_pct=1.0)
+    sizing = sizer.size(signal(), GOLD, ACCOUNT)
+    assert sizing["volume"] == pytest.approx(0.1)
+    assert sizing["risk"] == pytest.approx(100.0)
+    assert sizing["reason"] is None
+
+
+def test_size_caps_at_volume_max():
+    sizer = PositionSizer(risk_pct=1.0)
+    small_max = dict(vars(GOLD), volume_max=0.05)
+    assert sizer.size(signal(sl=2299.0), SimpleNamespace(**small_max), ACCOUNT)["volume"] == 0.05
+
+
+def test_size_rejects_untradable_signals():
+    sizer = PositionSizer(risk_pct=1.0)
+    assert sizer.size(signal(), GOLD, None)["reason"] == "no account state"
+    assert sizer.size(signal(sl=2300.0), GOLD, ACCOUNT)["reason"] == "cannot price the stop loss distance"
+    # 1% of 10000 cannot cover one minimum lot with a 200.00 stop
+    assert sizer.size(signal(sl=2100.0), GOLD, ACCOUNT)["volume"] == 0
+    assert sizer.rejected == 3
+
+
+def test_exposure_limits_cap_and_reject():
+    sizer = PositionSizer(risk_pct=2.0, max_total_risk_pct=5.0, max_symbol_risk_pct=3.0, max_open_signals=2)
+    first = sizer.size(signal(), GOLD, ACCOUNT)
+    sizer.record(signal(), first, [{"ticket": 1, "volume": first["volume"], "success": True}])
+    # Only 1% is left on XAUUSD
+    second = sizer.size(signal(), GOLD, ACCOUNT)
+    assert second["volume"] == pytest.approx(0.1)
+    assert sizer.capped == 1
+    sizer.record(signal(), second, [{"ticket": 2, "volume": second["volume"], "success": True}])
+    # Two signals open: the open signal limit rejects a third, on any symbol
+    assert sizer.size(signal("EURUSD"), GOLD, ACCOUNT)["reason"] == "exposure limit reached"
+
+
+def test_record_skips_failed_legs():
+    sizer = PositionSizer()
+    sizing = sizer.size(signal(), GOLD, ACCOUNT)
+    assert sizer.record(signal(), sizing, [{"ticket": None, "volume": 0.05, "success": False}]) is None
+    assert sizer.exposure.total_risk == 0.0
+
+
+def test_sync_releases_closed_legs():
+    book = ExposureBook()
+    first = book.open("XAUUSD", {1: 50.0, 2: 50.0})
+    book.open("EURUSD", {3: 30.0})
+    book.sync({2, 3})
+    assert book.total_risk == pytest.approx(80.0)
+    book.sync({3})
+    assert book.get_stats() == {"open_signals": 1, "total_risk": pytest.approx(30.0), "symbols": 1}
+    book.close(first)
+    book.sync(set())
+    assert book.get_stats() == {"open_signals": 0, "total_risk": 0.0, "symbols": 0}
+
+
+def test_platform_sizes_orders_and_syncs_exposure():
+    platform = TradingPlatform(symbols=["XAUUSD"], backend=SimulatedMT5(seed=1),
+                               sizer=PositionSizer(risk_pct=1.0))
+    assert platform.connect()
+    report = platform.place_signal_orders(signal())
+    assert report["success"]
+    assert sum(leg["volume"] for leg in report["legs"]) == pytest.approx(0.1)
+    assert platform.sizer.exposure.total_risk == pytest.approx(100.0)
+
+    # One TP leg closes at the broker; the next account refresh releases its risk
+    platform.mt5.positions.pop(report["legs"][0]["ticket"])
+    platform.account_cache.refresh()
+    assert platform.sizer.exposure.total_risk == pytest.approx(50.0)
+
+
+
+def test_unsized_signal_splits_the_default_volume():
+    platform = TradingPlatform(symbols=["XAUUSD"], backend=SimulatedMT5(seed=1))
+    assert platform.connect()
+    # 0.01 cannot be split, so only the first TP gets an order: the single-order exposure
+    report = platform.place_signal_orders(signal(tps=(2305.0, 2310.0, 2315.0)))
+    assert [(leg["tp"], leg["volume"]) for leg in report["legs"]] == [(2305.0, 0.01)]
+
+    platform.default_volume = 0.03
+    report = platform.place_signal_orders(signal(tps=(2305.0, 2310.0, 2315.0)))
+    assert [leg["volume"] for leg in report["legs"]] == [0.01, 0.01, 0.01]
+
+def test_account_refresh_is_quiet_while_disconnected(caplog):
+    platform = TradingPlatform(symbols=["XAUUSD"], backend=SimulatedMT5(), sizer=PositionSizer(risk_pct=1.0))
+    with caplog.at_level("INFO"):
+        assert platform.account_cache.refresh() is None
+    assert caplog.records == []
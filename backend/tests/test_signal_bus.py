@@ -0,0 +1,74 @@
+import asyncio
+import json
+
+from signal_bus import BusLog, BusSubscriber, SignalBus
+
+
+def run(coro):
+    return asyncio.run(asyncio.wait_for(coro, 10))
+
+
+async def wait_until(predicate):
+    while not predicate():
+        await asyncio.sleep(0.01)
+
+
+def test_subscriber_survives_handler_errors(tmp_path):
+    async def scenario():
+        address = f"unix:{tmp_path / 'bus.sock'}"
+        bus = SignalBus(address, ":memory:")
+        await bus.start()
+        received = []
+        failures = [1]
+
+        async def handler(messages, bus_id, last_seq):
+            if failures[0]:
+                failures[0] -= 1
+                raise KeyError("channel")
+            received.extend(messages)
+
+        subscriber = BusSubscriber("test", handler, address, reconnect_delay=0.01)
+        subscriber.start()
+        await bus.publish([{"text": "hello"}])
+        await wait_until(lambda: received)
+        await subscriber.stop()
+        await bus.stop()
+        return received, subscriber.get_stats()
+
+    received, stats = run(scenario())
+    # The failed batch was not acked, so it came again after the reconnect
+    assert received == [{"text": "hello"}]
+    assert stats["errors"] == 1
+
+
+def test_bus_ignores_malformed_frames(tmp_path):
+    async def scenario():
+        address = str(tmp_path / "bus.sock")
+        bus = SignalBus(f"unix:{address}", ":memory:")
+        await bus.start()
+        await bus.publish([{"text": "hello"}])
+        reader, writer = await asyncio.open_unix_connection(address)
+        await reader.readline()
+        writer.write(b'{"op": "subscribe", "name": "raw", "after": 0}\n')
+        batch = json.loads(await reader.readline())
+        for frame in (b'[1, 2]\n', b'"ack"\n', b'{"op": "ack"}\n', b'{"op": "ack", "seq": "x"}\n'):
+            writer.write(frame)
+        writer.write(b'{"op": "ack", "seq": %d}\n' % batch["messages"][-1]["seq"])
+        await writer.drain()
+        await wait_until(lambda: bus.log.get_offset("raw") == batch["messages"][-1]["seq"])
+        writer.close()
+        await bus.stop()
+
+    run(scenario())
+
+
+def test_trim_keeps_history_until_a_subscriber_acks():
+    log = BusLog(":memory:")
+    log.append([json.dumps(i) for i in range(10)])
+    # No subscriber yet: a first-time subscriber still finds the retention window
+    log.trim(retention=4)
+    assert [seq for seq, _ in log.read(0, 100)] == [7, 8, 9, 10]
+
+    log.set_offset("api_server", 8)
+    log.trim(retention=4)
+    assert [seq for seq, _ in log.read(0, 100)] == [9, 10]
@@ -0,0 +1,27 @@
+from signal_dedup import DUPLICATE, MODIFIED, NEW, UNKNOWN_EDIT, SignalDeduplicator
+
+SIGNAL = {"type": "BUY", "instrument": "XAUUSD", "entry": 2350.0, "sl": [2338.0], "tps": [2353.0, 2356.0]}
+
+
+def test_repost_is_duplicate():
+    dedup = SignalDeduplicator()
+    assert dedup.check(1, 10, SIGNAL, now=0)[0] == NEW
+    assert dedup.check(1, 11, SIGNAL, now=1)[0] == DUPLICATE
+
+
+def test_edit_of_known_message_is_modified():
+    dedup = SignalDeduplicator()
+    dedup.check(1, 10, SIGNAL, now=0)
+    edited = dict(SIGNAL, sl=[2340.0])
+    assert dedup.check(1, 10, edited, now=1, edited=True)[0] == MODIFIED
+
+
+def test_edit_of_unknown_message_never_opens():
+    dedup = SignalDeduplicator(window=3600)
+    dedup.check(1, 5, SIGNAL, now=0)
+    # Expired from the window, e.g. an old post edited to add "TP1 ✅"
+    decision, record = dedup.check(1, 5, SIGNAL, now=4000, edited=True)
+    assert decision == UNKNOWN_EDIT
+    assert record is None
+    # Never indexed, so the next edit is still not treated as new
+    assert dedup.check(1, 5, SIGNAL, now=4001, edited=True)[0] == UNKNOWN_EDIT
@@ -0,0 +1,51 @@
+from signal_lifecycle import CLOSE, MOVE_SL, SL_TO_ENTRY, TP_HIT, LifecycleTracker, parse_follow_up
+
+SIGNAL = {"type": "buy", "instrument": "XAUUSD", "entry": 2350.0, "sl": [2338.0],
+          "tps": [2353.0, 2356.0, 2359.0]}
+
+
+def legs(*successes):
+    return [{"ticket": 100 + i, "tp": tp, "success": ok}
+            for i, (tp, ok) in enumerate(zip(SIGNAL["tps"], successes))]
+
+
+def test_parse_follow_up():
+    assert parse_follow_up("TP1 hit ✅ move SL to entry") == [(TP_HIT, 1), (SL_TO_ENTRY, None)]
+    assert parse_follow_up("Move SL to 2345.5") == [(MOVE_SL, 2345.5)]
+    assert parse_follow_up("Close all now") == [(CLOSE, None)]
+    assert parse_follow_up("Gold running nicely") == []
+
+
+def test_tp_hit_closes_its_own_leg_when_another_was_rejected():
+    tracker = LifecycleTracker()
+    # The TP1 order was rejected, so only the TP2 and TP3 legs are open
+    tracked = tracker.track(1, 10, SIGNAL, legs(False, True, True))
+    updates, closes = tracker.apply(tracked, [(TP_HIT, 1)])
+    assert closes == []
+    # TP1 hit moves SL to entry on both remaining legs, closing neither
+    assert [leg.ticket for leg in tracked.open_legs] == [101, 102]
+    assert [(ticket, sl) for ticket, _, sl, _ in updates] == [(101, 2350.0), (102, 2350.0)]
+
+    updates, _ = tracker.apply(tracked, [(TP_HIT, 2)])
+    assert [leg.ticket for leg in tracked.open_legs] == [102]
+
+
+def test_edited_levels_follow_tp_numbers():
+    tracker = LifecycleTracker()
+    tracked = tracker.track(1, 10, SIGNAL, legs(False, True, True))
+    edited = dict(SIGNAL, sl=[2340.0], tps=[2354.0, 2357.0, 2360.0])
+    updates = tracker.update_levels(tracked, edited)
+    assert updates == [(101, "XAUUSD", 2340.0, 2357.0), (102, "XAUUSD", 2340.0, 2360.0)]
+
+
+def test_reply_to_follow_up_finds_signal():
+    tracker = LifecycleTracker()
+    tracked = tracker.track(1, 10, SIGNAL, legs(True, True, True))
+    tracker.link(1, 11, tracked)
+
+    class Reply:
+        reply_to_msg_id = 11
+        text = "close"
+
+    assert tracker.match_follow_up(1, Reply()) == (tracked, [(CLOSE, None)])
+    assert tracker.match_follow_up(2, Reply()) is None
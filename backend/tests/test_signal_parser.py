@@ -0,0 +1,46 @@
+from signal_parser import GOLDHUNTER, ParserRegistry, SignalFormat, TradingSignal
+
+SIGNAL_TEXT = "XAUUSD BUY NOW 2350.0\n\nSL 2338.0\nTP 2353.0\nTP 2356.0"
+
+
+def tagged(name):
+    """A format matching the goldhunter layout whose parser reports its name"""
+    return SignalFormat(name, GOLDHUNTER.instruments,
+                        parser=lambda fmt, lines, index, first_line: TradingSignal(fmt.name, "XAUUSD", 0.0, (), ()))
+
+
+def test_assigned_formats_are_tried_in_order():
+    registry = ParserRegistry([tagged("first"), tagged("second")])
+    registry.assign(1, ["second", "first"])
+    registry.assign(2, ["first", "second"])
+    assert registry.parse(SIGNAL_TEXT, 1).type == "second"
+    assert registry.parse(SIGNAL_TEXT, 2).type == "first"
+
+
+def test_default_formats_are_tried_in_order():
+    registry = ParserRegistry([tagged("first"), tagged("second")], default=["second", "first"])
+    assert registry.parse(SIGNAL_TEXT).type == "second"
+
+
+def test_replaced_format_reaches_assigned_channels():
+    registry = ParserRegistry([tagged("first")])
+    registry.assign(1, ["first"])
+    registry.register(GOLDHUNTER._replace(name="first"))
+    assert registry.parse(SIGNAL_TEXT, 1).entry == 2350.0
+
+
+def test_single_format_matches_indexed_parse():
+    single = ParserRegistry([GOLDHUNTER], default=[GOLDHUNTER.name])
+    # A second, never-matching format keeps the channel on the indexed path
+    indexed = ParserRegistry([GOLDHUNTER, SignalFormat("other", (("eurusd", "EURUSD"),))],
+                             default=[GOLDHUNTER.name, "other"])
+    for text in [SIGNAL_TEXT, "Gold sell 2350\nSL 2360\nTP 2340", "XAUUSD update\nSL 2338\nTP 2353",
+                 "Good morning traders", "", "\n\n"]:
+        assert single.parse(text) == indexed.parse(text), text
+    assert single.parse(SIGNAL_TEXT) == TradingSignal("buy", "XAUUSD", 2350.0, (2338.0,), (2353.0, 2356.0))
+
+
+def test_single_custom_parser_still_needs_header_keywords():
+    registry = ParserRegistry([tagged("only")], default=["only"])
+    assert registry.parse("Good morning traders") is None
+    assert registry.parse(SIGNAL_TEXT).type == "only"
@@ -0,0 +1,18 @@
+import os
+import subprocess
+import sys
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_import_creates_no_files_or_connections(tmp_path):
+    code = (
+        f"import sys; sys.path.insert(0, {BACKEND!r})\n"
+        "import telegram_bot\n"
+        "assert telegram_bot.checkpoints is None and telegram_bot.signal_bus is None\n"
+        "assert not telegram_bot.trading_platform.connected\n"
+        "assert 'telethon' not in sys.modules\n"
+    )
+    env = dict(os.environ, BROKER_BACKEND="sim")
+    subprocess.run([sys.executable, "-c", code], cwd=tmp_path, env=env, check=True)
+    assert list(tmp_path.iterdir()) == []
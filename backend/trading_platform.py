@@ -1,6 +1,8 @@
-import MetaTrader5 as mt5
 from datetime import datetime
 import logging
+import threading
+import time
+from broker_backends import get_backend
 
 # Configure logging
 logging.basicConfig(
@@ -9,103 +11,603 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Default lot size (0.01 lot = 1000 units), for a whole signal when no sizer is set
+DEFAULT_LOT = 0.01
+
+# MT5 ORDER_TYPE_* values as shown to API clients
+ORDER_TYPE_NAMES = {
+    0: "BUY",
+    1: "SELL",
+    2: "BUY_LIMIT",
+    3: "SELL_LIMIT",
+    4: "BUY_STOP",
+    5: "SELL_STOP",
+    6: "BUY_STOP_LIMIT",
+    7: "SELL_STOP_LIMIT",
+}
+
+
+def split_volume(total_volume, legs, volume_step, volume_min):
+    """Split a volume across `legs` orders in multiples of `volume_step`
+
+    Legs that would fall below `volume_min` are dropped, so fewer (but at
+    least one) volumes may be returned. Any remainder goes to the first leg.
+    """
+    steps = int(round(total_volume / volume_step))
+    min_steps = max(1, int(round(volume_min / volume_step)))
+    legs = max(1, min(legs, steps // min_steps))
+    per_leg = max(steps // legs, min_steps)
+    volumes = [per_leg] * legs
+    volumes[0] += max(0, steps - per_leg * legs)
+    return [round(v * volume_step, 8) for v in volumes]
+
+
+class BackgroundRefresher:
+    """Daemon thread calling `refresh` every `interval` seconds until stopped
+
+    `run` schedules each call, e.g. an OrderExecutor's submit so the
+    terminal is only touched from the MT5 worker thread.
+    """
+
+    def __init__(self, refresh, name, description):
+        self.refresh = refresh
+        self.name = name
+        self.description = description
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self, interval, run=None):
+        """Start the thread (no-op if already running)"""
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, args=(interval, run), name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the thread and wait for it"""
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+
+    def _loop(self, interval, run):
+        """Background loop driving `refresh`"""
+        while not self._stop_event.wait(interval):
+            try:
+                if run is None:
+                    self.refresh()
+                else:
+                    run(self.refresh)
+            except Exception as e:
+                logger.warning(f"{self.description} refresh failed: {str(e)}")
+
+
+class SymbolInfoCache:
+    """Cache of MT5 symbol metadata (digits, volume step, stops level, ...)
+
+    Entries older than `ttl` seconds are refetched on access. A background
+    refresher can keep them warm so the order path never waits on the terminal.
+    """
+
+    def __init__(self, fetch, ttl=300):
+        self.fetch = fetch
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._refresher = BackgroundRefresher(self.refresh_stale, "mt5-symbol-refresh", "Symbol info")
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    def get(self, symbol):
+        """Get symbol info, fetching it from the terminal on a miss"""
+        entry = self._entries.get(symbol)
+        if entry is not None and time.monotonic() - entry[1] < self.ttl:
+            self.hits += 1
+            return entry[0]
+
+        self.misses += 1
+        return self._load(symbol)
+
+    def warm(self, symbols):
+        """Fetch info for every symbol up front"""
+        for symbol in symbols:
+            self._load(symbol)
+
+    def invalidate(self, symbol=None):
+        """Drop one symbol, or every symbol if none is given"""
+        with self._lock:
+            if symbol is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(symbol, None)
+
+    def refresh_stale(self, max_age=None):
+        """Refetch entries older than `max_age` seconds (default half the TTL)"""
+        if max_age is None:
+            max_age = self.ttl / 2
+        now = time.monotonic()
+        stale = [symbol for symbol, (_, fetched_at) in list(self._entries.items())
+                 if now - fetched_at >= max_age]
+        for symbol in stale:
+            self._load(symbol)
+            self.refreshes += 1
+
+    def start_refresh(self, interval=None, run=None):
+        """Refresh stale entries in the background every `interval` seconds (see BackgroundRefresher)"""
+        self._refresher.start(self.ttl / 2 if interval is None else interval, run)
+
+    def stop_refresh(self):
+        """Stop the background refresher"""
+        self._refresher.stop()
+
+    def get_stats(self):
+        """Get cache size and hit/miss counters"""
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes
+        }
+
+    def _load(self, symbol):
+        """Fetch symbol info and store it, including negative results"""
+        info = self.fetch(symbol)
+        with self._lock:
+            self._entries[symbol] = (info, time.monotonic())
+        return info
+
+
+class AccountStateCache:
+    """Last known balance, equity and margin of the account
+
+    Entries older than `max_age` seconds are refetched on access. A
+    background refresher keeps the state current, so readers such as the
+    position sizer get it without a terminal round-trip.
+    """
+
+    def __init__(self, fetch, max_age=30):
+        self.fetch = fetch
+        self.max_age = max_age
+        self._state = None
+        self._fetched_at = 0.0
+        self._refresher = BackgroundRefresher(self._background_refresh, "mt5-account-refresh", "Account state")
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    def get(self):
+        """Get the account state, fetching it from the terminal when stale"""
+        if self._state is not None and time.monotonic() - self._fetched_at < self.max_age:
+            self.hits += 1
+            return self._state
+
+        self.misses += 1
+        return self.refresh()
+
+    def refresh(self):
+        """Fetch the account state now, keeping the last one if the fetch fails"""
+        state = self.fetch()
+        if state is not None:
+            self._state = state
+            self._fetched_at = time.monotonic()
+        return self._state
+
+    def invalidate(self):
+        """Forget the cached state"""
+        self._state = None
+
+    def start_refresh(self, interval=5, run=None):
+        """Refresh the state in the background every `interval` seconds (see BackgroundRefresher)"""
+        self._refresher.start(interval, run)
+
+    def stop_refresh(self):
+        """Stop the background refresher"""
+        self._refresher.stop()
+
+    def get_stats(self):
+        """Get state age and hit/miss counters"""
+        return {
+            "age_seconds": time.monotonic() - self._fetched_at if self._state is not None else -1,
+            "hits": self.hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes
+        }
+
+    def _background_refresh(self):
+        """Refresh from the background thread, counting it"""
+        self.refresh()
+        self.refreshes += 1
+
+
 class TradingPlatform:
-    def __init__(self, login=None, password=None, server=None):
+    def __init__(self, login=None, password=None, server=None, symbols=(), symbol_ttl=300, path=None,
+                 backend=None, sizer=None, account_ttl=30, default_volume=DEFAULT_LOT):
+        # Broker backend: the MetaTrader5 module or a stand-in with the same API,
+        # imported on first use so constructing a platform stays cheap
+        self._backend = backend
         self.login = login
         self.password = password
         self.server = server
+        # Terminal executable, to pick one of several installed terminals
+        self.path = path
         self.connected = False
+        # Instruments to preload into the symbol cache on connect
+        self.symbols = list(symbols)
+        self.symbol_cache = SymbolInfoCache(lambda symbol: self.mt5.symbol_info(symbol), ttl=symbol_ttl)
+        self.account_cache = AccountStateCache(self._fetch_account_state, max_age=account_ttl)
+        # Risk-based volumes when set; otherwise `default_volume` per signal,
+        # split across its TPs as far as the symbol's volume step allows
+        self.sizer = sizer
+        self.default_volume = default_volume
+        
+    @property
+    def mt5(self):
+        """The broker backend, loaded on first access"""
+        if self._backend is None:
+            self._backend = get_backend()
+        return self._backend
         
     def connect(self):
         """Connect to MetaTrader 5"""
-        if not mt5.initialize():
-            print("❌ Failed to initialize MT5")
+        initialized = self.mt5.initialize(self.path) if self.path else self.mt5.initialize()
+        if not initialized:
+            logger.warning("❌ Failed to initialize MT5")
             return False
             
-        if not mt5.login(self.login, self.password, self.server):
-            print(f"❌ Failed to login to MT5: {mt5.last_error()}")
-            mt5.shutdown()
+        if not self.mt5.login(self.login, self.password, self.server):
+            logger.warning(f"❌ Failed to login to MT5: {self.mt5.last_error()}")
+            self.mt5.shutdown()
             return False
             
         self.connected = True
-        print("✅ Successfully connected to MT5")
+        logger.info("✅ Successfully connected to MT5")
+
+        # Symbol metadata and account state from a previous session may be stale
+        self.symbol_cache.invalidate()
+        self.symbol_cache.warm(self.symbols)
+        self.account_cache.invalidate()
         return True
         
+    def is_healthy(self):
+        """Check that the terminal is running and connected to the trade server"""
+        try:
+            terminal_info = self.mt5.terminal_info()
+            return terminal_info is not None and bool(terminal_info.connected)
+        except Exception:
+            return False
+            
     def disconnect(self):
         """Disconnect from MetaTrader 5"""
         if self.connected:
-            mt5.shutdown()
+            self.mt5.shutdown()
             self.connected = False
-            print("✅ Disconnected from MT5")
+            self.symbol_cache.invalidate()
+            self.account_cache.invalidate()
+            logger.info("✅ Disconnected from MT5")
             
     def place_order(self, signal):
-        """Place an order based on the trading signal"""
+        """Place an order based on the trading signal
+
+        Returns the order ticket on success, False otherwise.
+        """
         if not self.connected:
-            print("❌ Not connected to MT5")
+            logger.warning("❌ Not connected to MT5")
             return False
             
         try:
             # Validate signal
-            if not all([signal.get('type'), signal.get('instrument'), 
-                       signal.get('entry'), signal.get('sl'), signal.get('tps')]):
-                raise ValueError("Invalid signal format")
+            self._validate_signal(signal)
             
-            # Prepare order request
+            # Get symbol info (cached)
             symbol = signal['instrument']
-            order_type = mt5.ORDER_TYPE_BUY if signal['type'].lower() == 'buy' else mt5.ORDER_TYPE_SELL
-            price = signal['entry']
-            sl = signal['sl'][0]
-            tp = signal['tps'][0]
-            
-            # Get symbol info
-            symbol_info = mt5.symbol_info(symbol)
+            symbol_info = self.symbol_cache.get(symbol)
             if symbol_info is None:
-                print(f"❌ Symbol {symbol} not found")
+                logger.warning(f"❌ Symbol {symbol} not found")
                 return False
                 
-            # Calculate lot size (0.01 lot = 1000 units)
-            lot = 0.01  # Default lot size
+            # Size from risk when a sizer is configured (no broker calls)
+            volume = self.default_volume
+            if self.sizer is not None:
+                sizing = self.sizer.size(signal, symbol_info, self.account_cache.get())
+                volume = sizing["volume"]
+                if not volume:
+                    logger.warning(f"❌ Order not placed: {sizing['reason']}")
+                    return False
             
             # Prepare order request
+            request = self._build_order_request(
+                signal, signal['sl'][0], signal['tps'][0], volume
+            )
+            
+            # Send order
+            result = self.mt5.order_send(request)
+            
+            if result.retcode != self.mt5.TRADE_RETCODE_DONE:
+                logger.warning(f"❌ Order failed: {result.comment}")
+                return False
+                
+            if self.sizer is not None:
+                self.sizer.record(signal, sizing, [{"ticket": result.order, "volume": volume, "success": True}])
+            logger.info(f"✅ Order placed successfully: {result.comment}")
+            return result.order
+            
+        except Exception as e:
+            logger.error(f"❌ Error placing order: {str(e)}")
+            return False
+            
+    def place_signal_orders(self, signal, total_volume=None):
+        """Place one order per TP level, splitting the volume across them
+
+        All legs are sent back to back in a single call, so on the MT5 worker
+        thread the whole ladder costs one queue hop. Without `total_volume`
+        the sizer (if any) picks it from the risk budget, and `default_volume`
+        is used otherwise. Returns a dict with
+        the result of each leg and the total wall time.
+        """
+        start = time.perf_counter()
+        report = {"success": False, "legs": [], "wall_time_ms": 0.0}
+        
+        if not self.connected:
+            logger.warning("❌ Not connected to MT5")
+            return report
+            
+        try:
+            # Validate signal
+            self._validate_signal(signal)
+            
+            # Get symbol info once for every leg (cached)
+            symbol = signal['instrument']
+            symbol_info = self.symbol_cache.get(symbol)
+            if symbol_info is None:
+                logger.warning(f"❌ Symbol {symbol} not found")
+                return report
+            
+            tps = signal['tps']
+            sizing = None
+            if total_volume is None and self.sizer is not None:
+                sizing = self.sizer.size(signal, symbol_info, self.account_cache.get())
+                report["sizing"] = sizing
+                if not sizing["volume"]:
+                    logger.warning(f"❌ Orders not placed for {symbol}: {sizing['reason']}")
+                    return report
+                total_volume = sizing["volume"]
+            elif total_volume is None:
+                # The same exposure as a single order, not one default lot per TP
+                total_volume = self.default_volume
+            volumes = split_volume(
+                total_volume,
+                len(tps),
+                getattr(symbol_info, 'volume_step', DEFAULT_LOT) or DEFAULT_LOT,
+                getattr(symbol_info, 'volume_min', DEFAULT_LOT) or DEFAULT_LOT
+            )
+            
+            sl = signal['sl'][0]
+            for tp, volume in zip(tps, volumes):
+                leg = {"tp": tp, "volume": volume, "success": False, "ticket": None, "comment": ""}
+                leg_start = time.perf_counter()
+                try:
+                    result = self.mt5.order_send(self._build_order_request(signal, sl, tp, volume))
+                    leg["comment"] = result.comment
+                    if result.retcode == self.mt5.TRADE_RETCODE_DONE:
+                        leg["success"] = True
+                        leg["ticket"] = result.order
+                except Exception as e:
+                    leg["comment"] = str(e)
+                leg["latency_ms"] = (time.perf_counter() - leg_start) * 1000
+                report["legs"].append(leg)
+            
+            if sizing is not None:
+                self.sizer.record(signal, sizing, report["legs"])
+            
+            placed = sum(1 for leg in report["legs"] if leg["success"])
+            report["success"] = placed == len(report["legs"]) and placed > 0
+            logger.info(f"{'✅' if report['success'] else '❌'} Placed {placed}/{len(report['legs'])} TP orders for {symbol}")
+            
+        except Exception as e:
+            logger.error(f"❌ Error placing orders: {str(e)}")
+            
+        report["wall_time_ms"] = (time.perf_counter() - start) * 1000
+        return report
+            
+    def _validate_signal(self, signal):
+        """Raise ValueError if the signal is missing required fields"""
+        if not all([signal.get('type'), signal.get('instrument'), 
+                   signal.get('entry'), signal.get('sl'), signal.get('tps')]):
+            raise ValueError("Invalid signal format")
+            
+    def _build_order_request(self, signal, sl, tp, volume):
+        """Prepare a market order request for one SL/TP pair"""
+        order_type = self.mt5.ORDER_TYPE_BUY if signal['type'].lower() == 'buy' else self.mt5.ORDER_TYPE_SELL
+        return {
+            "action": self.mt5.TRADE_ACTION_DEAL,
+            "symbol": signal['instrument'],
+            "volume": volume,
+            "type": order_type,
+            "price": signal['entry'],
+            "sl": sl,
+            "tp": tp,
+            "deviation": 10,
+            "magic": 234000,
+            "comment": f"Telegram Signal {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+            "type_time": self.mt5.ORDER_TIME_GTC,
+            "type_filling": self.mt5.ORDER_FILLING_IOC,
+        }
+            
+    def modify_position(self, ticket, symbol, sl, tp):
+        """Update SL/TP of an open position"""
+        if not self.connected:
+            logger.warning("❌ Not connected to MT5")
+            return False
+            
+        try:
             request = {
-                "action": mt5.TRADE_ACTION_DEAL,
+                "action": self.mt5.TRADE_ACTION_SLTP,
+                "position": ticket,
                 "symbol": symbol,
-                "volume": lot,
-                "type": order_type,
-                "price": price,
                 "sl": sl,
                 "tp": tp,
-                "deviation": 10,
                 "magic": 234000,
-                "comment": f"Telegram Signal {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
-                "type_time": mt5.ORDER_TIME_GTC,
-                "type_filling": mt5.ORDER_FILLING_IOC,
             }
             
-            # Send order
-            result = mt5.order_send(request)
+            result = self.mt5.order_send(request)
             
-            if result.retcode != mt5.TRADE_RETCODE_DONE:
-                print(f"❌ Order failed: {result.comment}")
+            if result.retcode != self.mt5.TRADE_RETCODE_DONE:
+                logger.warning(f"❌ Modification failed: {result.comment}")
                 return False
                 
-            print(f"✅ Order placed successfully: {result.comment}")
+            logger.info(f"✅ Position {ticket} modified: SL {sl}, TP {tp}")
             return True
             
         except Exception as e:
-            print(f"❌ Error placing order: {str(e)}")
+            logger.error(f"❌ Error modifying position: {str(e)}")
             return False
             
+    def get_order_book(self):
+        """Get open positions and pending orders as dicts, or None on failure"""
+        if not self.connected:
+            return None
+            
+        try:
+            positions = self.mt5.positions_get()
+            orders = self.mt5.orders_get()
+            if positions is None or orders is None:
+                logger.warning(f"❌ Failed to get orders: {self.mt5.last_error()}")
+                return None
+            
+            book = [
+                self._order_entry("position", p.ticket, p.symbol, p.type, p.volume, p.price_open,
+                                  p.sl, p.tp, p.time, p.comment)
+                for p in positions
+            ]
+            book.extend(
+                self._order_entry("order", o.ticket, o.symbol, o.type, o.volume_current, o.price_open,
+                                  o.sl, o.tp, o.time_setup, o.comment)
+                for o in orders
+            )
+            return book
+            
+        except Exception as e:
+            logger.error(f"❌ Error getting orders: {str(e)}")
+            return None
+            
+    def cancel_orders(self, tickets):
+        """Remove pending orders and close positions by ticket, in one pass
+
+        Positions and orders are looked up once for the whole batch. Returns
+        one {"ticket", "success", "message"} dict per ticket.
+        """
+        if not self.connected:
+            return [{"ticket": t, "success": False, "message": "Not connected to MT5"} for t in tickets]
+            
+        try:
+            positions = {p.ticket: p for p in self.mt5.positions_get() or ()}
+            orders = {o.ticket for o in self.mt5.orders_get() or ()}
+        except Exception as e:
+            return [{"ticket": t, "success": False, "message": str(e)} for t in tickets]
+        
+        results = []
+        for ticket in tickets:
+            try:
+                if ticket in orders:
+                    request = {"action": self.mt5.TRADE_ACTION_REMOVE, "order": ticket}
+                elif ticket in positions:
+                    request = self._build_close_request(positions[ticket])
+                else:
+                    results.append({"ticket": ticket, "success": False, "message": f"Order {ticket} not found"})
+                    continue
+                
+                result = self.mt5.order_send(request)
+                success = result.retcode == self.mt5.TRADE_RETCODE_DONE
+                message = f"Order {ticket} cancelled successfully" if success else result.comment
+            except Exception as e:
+                success, message = False, str(e)
+            results.append({"ticket": ticket, "success": success, "message": message})
+        
+        cancelled = sum(1 for result in results if result["success"])
+        if cancelled == len(results):
+            logger.info(f"✅ Cancelled {cancelled}/{len(results)} orders")
+        else:
+            logger.warning(f"❌ Cancelled {cancelled}/{len(results)} orders")
+        return results
+            
+    def _build_close_request(self, position):
+        """Prepare an opposite market deal that closes a position"""
+        tick = self.mt5.symbol_info_tick(position.symbol)
+        if position.type == self.mt5.ORDER_TYPE_BUY:
+            order_type, price = self.mt5.ORDER_TYPE_SELL, tick.bid
+        else:
+            order_type, price = self.mt5.ORDER_TYPE_BUY, tick.ask
+        return {
+            "action": self.mt5.TRADE_ACTION_DEAL,
+            "position": position.ticket,
+            "symbol": position.symbol,
+            "volume": position.volume,
+            "type": order_type,
+            "price": price,
+            "deviation": 10,
+            "magic": 234000,
+            "comment": "Closed via API",
+            "type_time": self.mt5.ORDER_TIME_GTC,
+            "type_filling": self.mt5.ORDER_FILLING_IOC,
+        }
+            
+    @staticmethod
+    def _order_entry(kind, ticket, symbol, order_type, volume, price, sl, tp, timestamp, comment):
+        """Format a position or pending order for API clients"""
+        return {
+            "ticket": ticket,
+            "kind": kind,
+            "symbol": symbol,
+            "type": ORDER_TYPE_NAMES.get(order_type, str(order_type)),
+            "volume": volume,
+            "price": price,
+            "sl": sl,
+            "tp": tp,
+            "time": datetime.fromtimestamp(timestamp).isoformat(),
+            "comment": comment
+        }
+            
     def get_account_info(self):
-        """Get account information"""
+        """Get account information, from the account state cache"""
+        if not self.connected:
+            logger.warning("❌ Not connected to MT5")
+            return None
+        return self.account_cache.get()
+        
+    def _fetch_account_state(self):
+        """Fetch account information, and release the sizer's risk on closed tickets"""
+        if not self.connected:
+            # Runs every few seconds from the refresher; the supervisor reports the outage
+            logger.debug("Skipping account refresh, not connected to MT5")
+            return None
+        account = self._fetch_account_info()
+        if account is not None and self.sizer is not None:
+            try:
+                positions = self.mt5.positions_get()
+                orders = self.mt5.orders_get()
+                if positions is not None and orders is not None:
+                    self.sizer.exposure.sync({p.ticket for p in positions} | {o.ticket for o in orders})
+            except Exception as e:
+                logger.warning(f"❌ Error syncing exposure: {str(e)}")
+        return account
+            
+    def _fetch_account_info(self):
+        """Get account information from the terminal"""
         if not self.connected:
-            print("❌ Not connected to MT5")
+            logger.warning("❌ Not connected to MT5")
             return None
             
         try:
-            account_info = mt5.account_info()
+            account_info = self.mt5.account_info()
             if account_info is None:
-                print("❌ Failed to get account info")
+                logger.warning("❌ Failed to get account info")
                 return None
                 
             return {
@@ -117,5 +619,5 @@ class TradingPlatform:
             }
             
         except Exception as e:
-            print(f"❌ Error getting account info: {str(e)}")
+            logger.error(f"❌ Error getting account info: {str(e)}")
             return None 
\ No newline at end of file
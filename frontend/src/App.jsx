@@ -18,6 +18,10 @@ function App() {
   ])
   const [showOnlySignals, setShowOnlySignals] = useState(false)
   const ws = useRef(null)
+  // Last feed position seen, so reconnects only fetch missed deltas
+  const feed = useRef({ epoch: null, seq: null, fields: null })
+  // Mirrors showOnlySignals for the reconnect closure
+  const signalsOnly = useRef(false)
 
   useEffect(() => {
     const connectWebSocket = () => {
@@ -26,8 +30,11 @@ function App() {
         ws.current.close()
       }
 
-      // Create new WebSocket connection
-      ws.current = new WebSocket('ws://localhost:8765')
+      // Create new WebSocket connection, resuming from the last sequence id
+      const { epoch, seq } = feed.current
+      const resume = epoch !== null ? `&epoch=${epoch}&resume=${seq}` : ''
+      const filter = signalsOnly.current ? '&signals_only=1' : ''
+      ws.current = new WebSocket(`ws://localhost:8765/?v=1${resume}${filter}`)
       
       ws.current.onopen = () => {
         console.log('✅ Connected to WebSocket server')
@@ -35,22 +42,48 @@ function App() {
       
       ws.current.onmessage = (event) => {
         try {
-          const newMessage = JSON.parse(event.data)
-          console.log('📩 Received new message:', newMessage)
+          const data = JSON.parse(event.data)
+          console.log('📩 Received feed frame:', data)
+          
+          if (data.type === 'delta' && data.prev > feed.current.seq) {
+            // Missed part of the feed: reconnect without resuming to get a snapshot
+            feed.current.epoch = null
+            ws.current.close()
+            return
+          }
+          if (data.type === 'snapshot') {
+            feed.current.epoch = data.epoch
+            feed.current.fields = data.fields
+            feed.current.seq = data.seq
+          } else if (data.type === 'delta') {
+            feed.current.seq = data.seq
+          } else {
+            return
+          }
+          
+          // Rows are arrays in the snapshot's field order
+          const newMessages = data.rows.map(row => {
+            const message = Object.fromEntries(feed.current.fields.map((field, i) => [field, row[i]]))
+            message.is_trading_signal = message.trading_signal !== null
+            return message
+          })
           
           setMessages(prevMessages => {
-            // Check if message already exists
-            const messageExists = prevMessages.some(msg => 
-              msg.channel === newMessage.channel && 
-              msg.text === newMessage.text && 
-              msg.timestamp === newMessage.timestamp
-            )
-            
-            if (!messageExists) {
-              // Add new message to the beginning of the array
-              return [newMessage, ...prevMessages]
+            let updatedMessages = prevMessages
+            for (const newMessage of newMessages) {
+              // Check if message already exists
+              const messageExists = updatedMessages.some(msg => 
+                msg.channel === newMessage.channel && 
+                msg.text === newMessage.text && 
+                msg.timestamp === newMessage.timestamp
+              )
+              
+              if (!messageExists) {
+                // Add new message to the beginning of the array
+                updatedMessages = [newMessage, ...updatedMessages]
+              }
             }
-            return prevMessages
+            return updatedMessages
           })
         } catch (error) {
           console.error('❌ Error parsing message:', error)
@@ -79,6 +112,16 @@ function App() {
     }
   }, [])
 
+  const toggleSignalsOnly = () => {
+    const next = !showOnlySignals
+    signalsOnly.current = next
+    setShowOnlySignals(next)
+    // Let the server stop sending what we would hide anyway
+    if (ws.current && ws.current.readyState === WebSocket.OPEN) {
+      ws.current.send(JSON.stringify({ type: 'subscribe', signals_only: next }))
+    }
+  }
+
   const filteredMessages = showOnlySignals 
     ? messages.filter(msg => msg.is_trading_signal)
     : messages
@@ -88,7 +131,7 @@ function App() {
       <h1>Telegram Channel Messages</h1>
       <div className="controls">
         <button 
-          onClick={() => setShowOnlySignals(!showOnlySignals)}
+          onClick={toggleSignalsOnly}
           className={`filter-button ${showOnlySignals ? 'active' : ''}`}
         >
           {showOnlySignals ? 'Show All Messages' : 'Show Only Trading Signals'}
@@ -140,6 +183,13 @@ function App() {
               </div>
             ) : (
               <div className="message-content">
+                {message.follow_up && (
+                  <div className="follow-up">
+                    {message.follow_up.map((action, i) => (
+                      <span key={i} className="follow-up-action">{action.replace(/_/g, ' ').toUpperCase()}</span>
+                    ))}
+                  </div>
+                )}
                 {message.text}
               </div>
             )}